@@ -0,0 +1,120 @@
+import time
+from tsl_reader import init, inventory
+
+class AntennaScheduler:
+    """
+    Round-robin inventory over several antenna ports of one reader.
+
+    Each port is switched in with its own power level and held for a number
+    of inventory rounds (the dwell). With a fixed dwell every port gets
+    `dwell_rounds` rounds per cycle. With `adaptive=True` a port keeps
+    inventorying, up to `max_rounds`, for as long as its last round still
+    turned up tags it had not seen at the current pose; once a port stops
+    finding new tags it drops back to `dwell_rounds`.
+
+    Every returned read carries the port it was taken on in 'Antenna', so a
+    single pose produces a separate set of measurements per port.
+    """
+
+    def __init__(self, ser, port_powers, dwell_rounds=1, adaptive=False, max_rounds=5, switch_delay=0.1,
+                 telemetry=None):
+        """
+        Args:
+        ser (serial.Serial): Open connection to the reader.
+        port_powers (dict): Antenna port (1-4) -> reader power (0-3000).
+        dwell_rounds (int): Inventory rounds per port per cycle (minimum rounds when adaptive).
+        adaptive (bool): Extend the dwell while a port keeps finding new tags.
+        max_rounds (int): Upper limit of rounds per port per cycle when adaptive.
+        switch_delay (float): Seconds to wait after switching port.
+        telemetry (ReaderTelemetry): Records the duration and reads of every inventory round, if given.
+        """
+        for port, power in port_powers.items():
+            if not 1 <= port <= 4:
+                raise ValueError(f"Antenna port must be between 1 and 4, got {port}")
+            if not 0 <= power <= 3000:
+                raise ValueError(f"Power must be between 0 and 3000, got {power} for port {port}")
+        if not port_powers:
+            raise ValueError("At least one antenna port is required")
+        self.ser = ser
+        self.port_powers = dict(port_powers)
+        self.dwell_rounds = max(1, dwell_rounds)
+        self.adaptive = adaptive
+        self.max_rounds = max(self.dwell_rounds, max_rounds)
+        self.switch_delay = switch_delay
+        self.telemetry = telemetry
+        self.active_port = None
+        self.new_pose()
+
+    def new_pose(self):
+        """Forget which tags each port has seen; call this whenever the antennas move."""
+        self.seen_tags = {port: set() for port in self.port_powers}
+        self.new_tag_counts = {port: 0 for port in self.port_powers}
+        # Inventory rounds per port at this pose, the denominator of a tag's read ratio
+        self.round_counts = {port: 0 for port in self.port_powers}
+
+    def select_port(self, port):
+        """Switch the reader to `port` with its configured power, if it is not already active."""
+        if port != self.active_port:
+            init(self.ser, port, self.port_powers[port], delay=self.switch_delay)
+            self.active_port = port
+
+    def dwell(self, port):
+        """Inventory on `port` for its dwell and return the reads, each tagged with the port."""
+        self.select_port(port)
+        reads = []
+        rounds = 0
+        while True:
+            round_time = time.time()
+            if self.telemetry is None:
+                tags = inventory(self.ser)
+            else:
+                start = time.perf_counter()
+                try:
+                    tags = inventory(self.ser)
+                except Exception:
+                    self.telemetry.record_inventory_failure(time.perf_counter() - start)
+                    raise
+                self.telemetry.record_inventory(tags, time.perf_counter() - start)
+            rounds += 1
+            self.round_counts[port] += 1
+            new_tags = 0
+            for tag in tags:
+                tag['Antenna'] = port
+                tag['Timestamp'] = round_time
+                if tag['Tag ID'] not in self.seen_tags[port]:
+                    self.seen_tags[port].add(tag['Tag ID'])
+                    new_tags += 1
+            self.new_tag_counts[port] += new_tags
+            reads.extend(tags)
+            if rounds >= self.max_rounds:
+                break
+            if rounds >= self.dwell_rounds and (not self.adaptive or new_tags == 0):
+                break
+        return reads
+
+    def run_cycle(self):
+        """Visit every configured port once and return all reads in the order they were taken."""
+        reads = []
+        for port in self.port_powers:
+            reads.extend(self.dwell(port))
+        return reads
+
+def parse_port_powers(text, default_power=None):
+    """
+    Parse a port/power specification such as '1:2500,2:2700,3,4'.
+
+    Ports listed without a power use `default_power`.
+    """
+    port_powers = {}
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if ':' in item:
+            port, power = item.split(':', 1)
+            port_powers[int(port)] = int(power)
+        else:
+            if default_power is None:
+                raise ValueError(f"No power given for antenna port {item}")
+            port_powers[int(item)] = default_power
+    return port_powers
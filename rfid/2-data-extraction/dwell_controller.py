@@ -0,0 +1,108 @@
+import math
+import os
+import sys
+import time
+import numpy as np
+from pose_aggregator import RunningStats
+
+# Band widths come from the error model stage's noise model artifact, as in localization
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4-error-model'))
+from noise_model import load_noise_model
+
+def get_rms_rssi(rssi):
+    """Band half-width [dB] localization draws for a mean RSSI (noise model lookup)."""
+    return load_noise_model().half_width(rssi)
+
+class DwellController:
+    """
+    Sequential stopping rule for the dwell at one pose.
+
+    Reads are accumulated per (tag, antenna). The pose is finished once every
+    visible tag has at least `min_reads` reads and the confidence interval of
+    its mean RSSI is narrower than `band_fraction` times the width of the
+    sensitivity band (2 * get_rms_rssi) localization will draw for it. More
+    reads would then no longer change the band noticeably. `max_time` bounds
+    the dwell for tags that never settle.
+    """
+
+    def __init__(self, band_fraction=0.1, z_score=1.96, min_reads=5, min_time=1.0, max_time=30.0):
+        """
+        Args:
+        band_fraction (float): Largest allowed confidence interval width, as a fraction of the band width.
+        z_score (float): Two-sided z-score of the confidence interval (1.96 for 95%).
+        min_reads (int): Reads a tag needs before it can be considered converged.
+        min_time (float): Minimum dwell in seconds, so slowly responding tags are still seen.
+        max_time (float): Maximum dwell in seconds; also the fixed dwell the time saving is measured against.
+        """
+        self.band_fraction = band_fraction
+        self.z_score = z_score
+        self.min_reads = max(2, min_reads)
+        self.min_time = min_time
+        self.max_time = max_time
+        self.session_dwell = 0.0
+        self.session_saved = 0.0
+        self.poses = 0
+        self.start_pose()
+
+    def start_pose(self):
+        """Reset the statistics for a new pose and start its timer."""
+        self.stats = {}
+        self.pose_start = time.time()
+        self.finished = False
+
+    def add(self, tag_id, antenna, rssi):
+        key = (tag_id, antenna)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = RunningStats()
+        stats.add(rssi)
+
+    def interval_width(self, key):
+        """Width of the confidence interval of the mean RSSI of (tag, antenna)."""
+        stats = self.stats[key]
+        if stats.count < 2:
+            return math.inf
+        return 2 * self.z_score * stats.std / math.sqrt(stats.count)
+
+    def target_width(self, key):
+        """Largest interval width accepted for (tag, antenna)."""
+        return self.band_fraction * 2 * get_rms_rssi(self.stats[key].mean)
+
+    def converged(self):
+        """True when every tag seen at this pose has a narrow enough interval."""
+        if not self.stats:
+            return False
+        return all(self.stats[key].count >= self.min_reads and
+                   self.interval_width(key) < self.target_width(key)
+                   for key in self.stats)
+
+    def done(self):
+        """True when the dwell at this pose can end; records the dwell time once it does."""
+        elapsed = time.time() - self.pose_start
+        if elapsed < self.min_time:
+            return False
+        if elapsed < self.max_time and not self.converged():
+            return False
+        if not self.finished:
+            self.finished = True
+            self.poses += 1
+            self.session_dwell += elapsed
+            self.session_saved += max(0.0, self.max_time - elapsed)
+        return True
+
+    def pose_report(self):
+        """One line describing the dwell at the current pose."""
+        elapsed = time.time() - self.pose_start
+        open_tags = [key for key in self.stats
+                     if self.stats[key].count < self.min_reads or self.interval_width(key) >= self.target_width(key)]
+        status = 'converged' if not open_tags else f'{len(open_tags)} tags not converged'
+        return (f"Dwell {elapsed:.1f} s ({status}), "
+                f"{max(0.0, self.max_time - elapsed):.1f} s saved against a {self.max_time:.0f} s fixed dwell")
+
+    def session_report(self):
+        """Summary of the dwell time and time saved over the session."""
+        if self.poses == 0:
+            return "No poses measured with adaptive dwell."
+        return (f"Adaptive dwell over {self.poses} poses: {self.session_dwell:.1f} s in total "
+                f"({self.session_dwell / self.poses:.1f} s per pose), "
+                f"{self.session_saved:.1f} s saved against a {self.max_time:.0f} s fixed dwell")
@@ -0,0 +1,262 @@
+import argparse
+import json
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# File layout: 16-byte header, then fixed-size little-endian records.
+# The EPC dictionary and tag ground truth live in a JSON sidecar (<file>.json).
+MAGIC = b'RFIDMEAS'
+VERSION = 1
+HEADER_SIZE = 16
+
+MEASUREMENT_DTYPE = np.dtype([
+    ('timestamp', '<i8'),   # Nanoseconds since the epoch
+    ('tag', '<u4'),         # Index into the EPC dictionary
+    ('rssi', '<i2'),        # Centi-dBm, as reported by the reader
+    ('phase', '<u2'),       # 12-bit phase, PHASE_UNKNOWN when not reported
+    ('antenna', 'u1'),      # Antenna port
+    ('x', '<f4'),           # Antenna pose [m, m, m, deg]
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('rot_z', '<f4'),
+    ('rounds', '<u4'),      # Inventory rounds on the antenna port during the pose's dwell, ROUNDS_UNKNOWN if none
+    ('dwell', '<f4')        # Dwell time of the pose [s], NaN if not measured in one dwell
+])
+
+PHASE_UNKNOWN = 0xFFFF
+ROUNDS_UNKNOWN = 0
+
+def sidecar_path(path):
+    return path + '.json'
+
+def _parse_phase(phase):
+    """Phase as 12-bit integer; accepts the reader's hex string, a number or None/'Unknown'."""
+    if phase is None or phase == 'Unknown':
+        return PHASE_UNKNOWN
+    if isinstance(phase, str):
+        return int(phase, 16)
+    if isinstance(phase, float) and math.isnan(phase):
+        return PHASE_UNKNOWN
+    return int(phase)
+
+class MeasurementWriter:
+    """
+    Appends reads to a binary measurement file.
+
+    EPCs are interned to uint32 indices on first sight; the dictionary is
+    kept in the JSON sidecar together with the tag ground truth. Reads are
+    buffered and written `flush_every` at a time, so the file can be opened
+    (and memory-mapped) while a session is still running. Opening an
+    existing file appends to it.
+    """
+
+    def __init__(self, path, flush_every=1000):
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = []
+        self.epcs = []
+        self.tag_locations = {}
+        if os.path.exists(path):
+            _check_header(path)
+            metadata = read_metadata(path)
+            self.epcs = list(metadata['epcs'])
+            self.tag_locations = dict(metadata.get('tag_locations', {}))
+        else:
+            with open(path, 'wb') as f:
+                f.write(_header())
+        self.epc_index = {epc: index for index, epc in enumerate(self.epcs)}
+
+    def intern(self, tag_id):
+        index = self.epc_index.get(tag_id)
+        if index is None:
+            index = self.epc_index[tag_id] = len(self.epcs)
+            self.epcs.append(tag_id)
+        return index
+
+    def set_tag_location(self, tag_id, x, y):
+        self.intern(tag_id)
+        self.tag_locations[tag_id] = [x, y]
+
+    def add(self, tag_id, rssi, antenna, pose, timestamp=None, phase=None, rounds=None, dwell=None):
+        """
+        Add one read.
+
+        Args:
+        tag_id (str): Tag EPC.
+        rssi (float): RSSI in dBm.
+        antenna (int): Antenna port.
+        pose (tuple): Antenna (x, y, z, rot_z).
+        timestamp (float): Seconds since the epoch; now when None.
+        phase: Phase as hex string, 12-bit number or None.
+        rounds (int): Inventory rounds on the antenna port during the pose's dwell, or None.
+        dwell (float): Dwell time of the pose [s], or None.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        x, y, z, rot_z = pose
+        rounds = ROUNDS_UNKNOWN if rounds is None or rounds != rounds else int(rounds)
+        dwell = np.nan if dwell is None else dwell
+        self.buffer.append((int(timestamp * 1e9), self.intern(tag_id), int(round(rssi * 100)),
+                            _parse_phase(phase), int(antenna), x, y, z, rot_z, rounds, dwell))
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def append_records(self, records):
+        """Append reads that are already a MEASUREMENT_DTYPE array (tags interned with this writer)."""
+        self.flush()
+        with open(self.path, 'ab') as f:
+            f.write(np.asarray(records, dtype=MEASUREMENT_DTYPE).tobytes())
+
+    def flush(self):
+        if self.buffer:
+            with open(self.path, 'ab') as f:
+                f.write(np.array(self.buffer, dtype=MEASUREMENT_DTYPE).tobytes())
+            self.buffer = []
+        # Written to a temporary file first so a reader never sees a half-written dictionary
+        with open(sidecar_path(self.path) + '.tmp', 'w') as f:
+            json.dump({'version': VERSION, 'epcs': self.epcs, 'tag_locations': self.tag_locations}, f)
+        os.replace(sidecar_path(self.path) + '.tmp', sidecar_path(self.path))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _header():
+    return MAGIC + np.array([VERSION, MEASUREMENT_DTYPE.itemsize], dtype='<u2').tobytes() + bytes(4)
+
+def _check_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a binary measurement file")
+    version, itemsize = np.frombuffer(header[len(MAGIC):len(MAGIC) + 4], dtype='<u2')
+    if version != VERSION or itemsize != MEASUREMENT_DTYPE.itemsize:
+        raise ValueError(f"Unsupported measurement file version {version} (record size {itemsize})")
+
+def record_count(path):
+    """Number of reads in a measurement file."""
+    _check_header(path)
+    return (os.path.getsize(path) - HEADER_SIZE) // MEASUREMENT_DTYPE.itemsize
+
+def read_metadata(path):
+    """EPC dictionary and tag ground truth of a measurement file."""
+    try:
+        with open(sidecar_path(path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{path} has no sidecar {sidecar_path(path)} with its EPC dictionary; "
+                                f"the two files must be kept together") from None
+
+def open_measurements(path):
+    """
+    Memory-map a measurement file.
+
+    Returns:
+    records (np.memmap): Structured array with MEASUREMENT_DTYPE, read lazily from disk.
+    epcs (list): EPC of each tag index.
+    tag_locations (dict): Tag ID -> (x, y) of the tags with known ground truth.
+    """
+    _check_header(path)
+    metadata = read_metadata(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // MEASUREMENT_DTYPE.itemsize
+    if count == 0:
+        records = np.zeros(0, dtype=MEASUREMENT_DTYPE)
+    else:
+        records = np.memmap(path, dtype=MEASUREMENT_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+    tag_locations = {epc: tuple(xy) for epc, xy in metadata.get('tag_locations', {}).items()}
+    return records, metadata['epcs'], tag_locations
+
+def rssi_dbm(records):
+    return records['rssi'] / 100.0
+
+def tag_records(records, epcs, tag_id):
+    """Reads of one tag, as a (copied) structured array."""
+    return records[records['tag'] == epcs.index(tag_id)]
+
+def to_frame(records, epcs, tag_locations=None):
+    """
+    Reads as a DataFrame with the logger's Excel columns.
+
+    Meant for a selection of the reads (e.g. one tag); scans over the whole
+    file should work on the structured array directly.
+    """
+    tag_locations = tag_locations or {}
+    tag_ids = np.array(epcs, dtype=object)[records['tag']] if len(records) else np.array([], dtype=object)
+    tag_xy = np.array([tag_locations.get(tag_id, (np.nan, np.nan)) for tag_id in tag_ids], dtype=float).reshape(-1, 2)
+    # float32 keeps ~7 significant digits; rounding to micrometres gives back the logged decimal pose exactly
+    x = records['x'].astype(float).round(6)
+    y = records['y'].astype(float).round(6)
+    z = records['z'].astype(float).round(6)
+    phase = records['phase']
+    return pd.DataFrame({
+        'Tag ID': tag_ids,
+        'RSSI': rssi_dbm(records),
+        'Phase': np.where(phase == PHASE_UNKNOWN, np.nan, phase),
+        'Antenna': records['antenna'],
+        'Antenna X [m]': x,
+        'Antenna Y [m]': y,
+        'Antenna Z [m]': z,
+        'Antenna Rot Z [deg]': records['rot_z'].astype(float).round(4),
+        'Distance [m]': np.sqrt(x ** 2 + y ** 2 + z ** 2).round(3),
+        'Tag X [m]': tag_xy[:, 0],
+        'Tag Y [m]': tag_xy[:, 1],
+        'Timestamp': records['timestamp'] / 1e9,
+        'Rounds': np.where(records['rounds'] == ROUNDS_UNKNOWN, np.nan, records['rounds']),
+        'Dwell [s]': records['dwell'].astype(float).round(6)
+    })
+
+def convert_excel(excel_file, path):
+    """Convert a logger Excel file ('All Data' sheet) to a binary measurement file."""
+    df = pd.read_excel(excel_file, sheet_name='All Data')
+    timestamps = df['Timestamp'] if 'Timestamp' in df else pd.Series(os.path.getmtime(excel_file), index=df.index)
+    phases = df['Phase'] if 'Phase' in df else pd.Series(None, index=df.index, dtype=object)
+    records = np.zeros(len(df), dtype=MEASUREMENT_DTYPE)
+    with MeasurementWriter(path) as writer:
+        for tag_id, group in df.groupby('Tag ID', sort=False):
+            tag_x, tag_y = float(group['Tag X [m]'].iloc[0]), float(group['Tag Y [m]'].iloc[0])
+            if not (math.isnan(tag_x) or math.isnan(tag_y)):
+                writer.set_tag_location(str(tag_id), tag_x, tag_y)
+        records['timestamp'] = (timestamps.to_numpy(dtype=float) * 1e9).astype(np.int64)
+        records['tag'] = [writer.intern(str(tag_id)) for tag_id in df['Tag ID']]
+        records['rssi'] = np.round(df['RSSI'].to_numpy(dtype=float) * 100)
+        records['phase'] = [_parse_phase(phase) for phase in phases]
+        records['antenna'] = df['Antenna']
+        records['rounds'] = df['Rounds'].fillna(ROUNDS_UNKNOWN).to_numpy() if 'Rounds' in df else ROUNDS_UNKNOWN
+        records['dwell'] = df['Dwell [s]'].to_numpy(dtype=float) if 'Dwell [s]' in df else np.nan
+        for field, column in (('x', 'Antenna X [m]'), ('y', 'Antenna Y [m]'), ('z', 'Antenna Z [m]'),
+                              ('rot_z', 'Antenna Rot Z [deg]')):
+            records[field] = df[column]
+        writer.append_records(records)
+
+def main():
+    parser = argparse.ArgumentParser(description='Binary RFID measurement files.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help='Convert a logger Excel file to the binary format')
+    convert.add_argument('excel_file')
+    convert.add_argument('output', nargs='?', help='Output file (default: the Excel file name with .rfid)')
+    info = subparsers.add_parser('info', help='Summarise a binary measurement file')
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        output = args.output or os.path.splitext(args.excel_file)[0] + '.rfid'
+        convert_excel(args.excel_file, output)
+        print(f"{args.excel_file} ({os.path.getsize(args.excel_file)} bytes) -> "
+              f"{output} ({os.path.getsize(output)} bytes)")
+    else:
+        records, epcs, tag_locations = open_measurements(args.path)
+        counts = np.bincount(records['tag'], minlength=len(epcs))
+        print(f"{len(records)} reads of {len(epcs)} tags, {len(tag_locations)} with known location")
+        for index, epc in enumerate(epcs):
+            print(f"{epc}: {counts[index]} reads")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import sys
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tsl_reader import tsl_name, find_ports, open_reader, init, inventory
+
+# -------------------
+# Constants
+# -------------------
+RETRY_DELAY = 0.1  # Wait after the first failed inventory round of a reader [s]
+MAX_RETRY_DELAY = 5.0  # Longest wait between retries; the wait doubles with every consecutive failure [s]
+MAX_FAILURES = 10  # Consecutive failed rounds after which a reader is dropped
+
+class ReaderSession:
+    """One reader of a multi-reader acquisition: its serial connection, worker thread and read queue."""
+
+    def __init__(self, port, ser, antenna, power, queue_size=10000):
+        self.port = port
+        self.ser = ser
+        self.antenna = antenna
+        self.power = power
+        # A dedicated thread per reader keeps a blocking serial read from holding up the others
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'reader-{port}')
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.rounds = 0
+        self.reads = 0
+        self.errors = 0
+        self.dropped = False
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.ser.close()
+
+class MultiReaderAcquisition:
+    """
+    Concurrent inventory on every connected TSL reader.
+
+    Each reader runs its inventory loop (serial I/O and response parsing) in
+    its own worker thread and pushes timestamped reads onto its own queue.
+    The per-reader queues are merged into a single stream, so throughput
+    grows with the number of readers instead of being bounded by one
+    blocking `ser.read` at a time.
+    """
+
+    def __init__(self, ports=None, antenna=1, power=3000, portname=tsl_name):
+        """
+        Args:
+        ports (list): Serial devices to use; discovered by `portname` when omitted.
+        antenna (int): Antenna port (1-4) to select on every reader.
+        power (int): Reader power (0-3000) to set on every reader.
+        portname (str): Port description used to discover the readers.
+        """
+        self.ports = list(ports) if ports else find_ports(portname)
+        self.antenna = antenna
+        self.power = power
+        self.sessions = []
+        self.merged = None
+        self.stop_event = None
+        self.done_event = None
+        self.tasks = []
+
+    async def start(self):
+        """
+        Open and configure every reader, then start their acquisition loops.
+
+        Raises:
+        Exception: Whatever opening or initialising a reader raised; the
+            readers opened before it are closed again first.
+        """
+        loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        self.done_event = asyncio.Event()
+        self.merged = asyncio.Queue()
+        try:
+            for port in self.ports:
+                ser = open_reader(port)
+                session = ReaderSession(port, ser, self.antenna, self.power)
+                self.sessions.append(session)
+                await loop.run_in_executor(session.executor, init, ser, self.antenna, self.power)
+        except Exception:
+            for session in self.sessions:
+                session.close()
+            self.sessions = []
+            raise
+        for session in self.sessions:
+            self.tasks.append(asyncio.create_task(self._acquire(session)))
+            self.tasks.append(asyncio.create_task(self._forward(session)))
+
+    async def _acquire(self, session):
+        """
+        Inventory loop of one reader; parsing happens in the reader's own thread.
+
+        A failed round is retried after a wait that doubles with every
+        consecutive failure (RETRY_DELAY up to MAX_RETRY_DELAY); after
+        MAX_FAILURES consecutive failures the reader is dropped and the
+        others carry on.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                tags = await loop.run_in_executor(session.executor, inventory, session.ser)
+            except Exception as e:
+                session.errors += 1
+                failures += 1
+                if failures >= MAX_FAILURES:
+                    session.dropped = True
+                    print(f"Reader {session.port}: {e}; dropped after {failures} consecutive failures")
+                    return
+                delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                print(f"Reader {session.port}: {e}; retrying in {delay:.1f} s")
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            failures = 0
+            timestamp = time.time()
+            session.rounds += 1
+            for tag in tags:
+                tag['Reader'] = session.port
+                tag['Timestamp'] = timestamp
+                await session.queue.put(tag)
+            session.reads += len(tags)
+
+    async def _forward(self, session):
+        """Move the reads of one reader onto the merged stream."""
+        while True:
+            tag = await session.queue.get()
+            await self.merged.put(tag)
+
+    async def reads(self):
+        """Yield the timestamped reads of all readers as one stream, in arrival order."""
+        while not (self.done_event.is_set() and self.merged.empty()):
+            try:
+                yield await asyncio.wait_for(self.merged.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+
+    async def stop(self):
+        """Stop acquisition once every reader has finished its current inventory round."""
+        self.stop_event.set()
+        acquire_tasks = self.tasks[0::2]
+        forward_tasks = self.tasks[1::2]
+        await asyncio.gather(*acquire_tasks, return_exceptions=True)
+        # Let the forwarders drain the per-reader queues before stopping them
+        while any(not session.queue.empty() for session in self.sessions):
+            await asyncio.sleep(0.01)
+        for task in forward_tasks:
+            task.cancel()
+        await asyncio.gather(*forward_tasks, return_exceptions=True)
+        for session in self.sessions:
+            session.close()
+        self.done_event.set()
+
+    def summary(self):
+        """Per-reader round, read and error counts, and whether the reader was dropped."""
+        return pd.DataFrame([{
+            'Reader': session.port,
+            'Rounds': session.rounds,
+            'Reads': session.reads,
+            'Errors': session.errors,
+            'Dropped': session.dropped
+        } for session in self.sessions])
+
+async def collect(acquisition, duration):
+    """Run `acquisition` for `duration` seconds and return all merged reads."""
+    await acquisition.start()
+    rows = []
+    start = time.time()
+
+    async def stop_later():
+        await asyncio.sleep(duration)
+        await acquisition.stop()
+
+    stopper = asyncio.create_task(stop_later())
+    async for tag in acquisition.reads():
+        rows.append(tag)
+    await stopper
+    elapsed = time.time() - start
+    return pd.DataFrame(rows), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent inventory on every connected TSL reader.')
+    parser.add_argument('--ports', nargs='*', help='Serial devices to use (default: discover by reader name)')
+    parser.add_argument('--antenna', type=int, default=1, help='Antenna port (1-4) on every reader')
+    parser.add_argument('--power', type=int, default=3000, help='Reader power (0-3000)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Acquisition time in seconds')
+    args = parser.parse_args()
+
+    try:
+        acquisition = MultiReaderAcquisition(args.ports, args.antenna, args.power)
+    except Exception as e:
+        print(f"Error opening serial port: {e}")
+        sys.exit(1)
+
+    df, elapsed = asyncio.run(collect(acquisition, args.duration))
+    print(acquisition.summary())
+    print(f"\n{len(df)} reads from {len(acquisition.sessions)} readers in {elapsed:.1f} s "
+          f"({len(df) / elapsed:.0f} reads/s)")
+
+    timestamp = datetime.now().strftime('%d%m%y_%H%M%S')
+    filename = f'rfid_multi_reader_{timestamp}.csv'
+    df.to_csv(filename, index=False)
+    print(f'Results saved to {filename}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import math
+import pandas as pd
+
+# The reader reports phase as a 12-bit value: 4096 steps per full turn
+PHASE_STEPS = 4096
+
+class RunningStats:
+    """Running count, mean, variance, min and max of a stream of values (Welford's algorithm)."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        """Sample variance (NaN with fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+class CircularStats:
+    """Running circular mean and variance of angles in radians."""
+
+    __slots__ = ('count', 'sum_cos', 'sum_sin')
+
+    def __init__(self):
+        self.count = 0
+        self.sum_cos = 0.0
+        self.sum_sin = 0.0
+
+    def add(self, angle):
+        self.count += 1
+        self.sum_cos += math.cos(angle)
+        self.sum_sin += math.sin(angle)
+
+    @property
+    def mean(self):
+        """Circular mean in [0, 2*pi), NaN when empty."""
+        if self.count == 0:
+            return math.nan
+        return math.atan2(self.sum_sin, self.sum_cos) % (2 * math.pi)
+
+    @property
+    def resultant_length(self):
+        """Mean resultant length R: 1 for identical angles, 0 for uniformly spread ones."""
+        if self.count == 0:
+            return math.nan
+        return math.hypot(self.sum_cos, self.sum_sin) / self.count
+
+    @property
+    def variance(self):
+        """Circular variance 1 - R."""
+        return 1.0 - self.resultant_length
+
+class PoseAggregator:
+    """
+    Online per-(tag, pose, antenna) statistics of RSSI and phase.
+
+    Every read updates its group in O(1) and only the running statistics are
+    kept, so memory depends on the number of groups and not on the number of
+    reads. RSSI gets count, mean, standard deviation, min and max; the 12-bit
+    phase gets a circular mean and circular variance, since an arithmetic
+    mean is meaningless for a value that wraps at 4096.
+    """
+
+    def __init__(self, pose_columns=('X [m]', 'Y [m]', 'Z [m]', 'Rot Z [deg]')):
+        """
+        Args:
+        pose_columns (tuple): Column names of the pose values, used in the exported table.
+        """
+        self.pose_columns = tuple(pose_columns)
+        self.groups = {}
+        self.pose_keys = {}
+
+    def add(self, tag_id, pose, antenna, rssi, phase=None):
+        """
+        Add one read.
+
+        Args:
+        tag_id (str): Tag EPC.
+        pose (tuple): Antenna/robot pose, one value per pose column.
+        antenna (int or str): Antenna port of the read.
+        rssi (float): RSSI in dBm.
+        phase (float): Phase as 12-bit decimal value (0-4095), or None/NaN when not available.
+        """
+        key = (tag_id, tuple(pose), antenna)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = (RunningStats(), CircularStats())
+            self.pose_keys.setdefault(key[1], []).append(key)
+        rssi_stats, phase_stats = group
+        if rssi is not None and not math.isnan(rssi):
+            rssi_stats.add(rssi)
+        if phase is not None and not math.isnan(phase):
+            phase_stats.add(2 * math.pi * phase / PHASE_STEPS)
+
+    def _row(self, key):
+        tag_id, pose, antenna = key
+        rssi_stats, phase_stats = self.groups[key]
+        phase_mean = phase_stats.mean
+        row = {'Tag ID': tag_id, 'Antenna': antenna}
+        row.update(zip(self.pose_columns, pose))
+        row.update({
+            'Read Count': rssi_stats.count,
+            'RSSI Mean': rssi_stats.mean if rssi_stats.count else math.nan,
+            'RSSI Std': rssi_stats.std,
+            'RSSI Min': rssi_stats.min if rssi_stats.count else math.nan,
+            'RSSI Max': rssi_stats.max if rssi_stats.count else math.nan,
+            'Phase Mean Decimal': phase_mean * PHASE_STEPS / (2 * math.pi),
+            'Phase Mean [deg]': math.degrees(phase_mean),
+            'Phase Circular Variance': phase_stats.variance
+        })
+        return row
+
+    def pose_summary(self, pose):
+        """Statistics of every tag and antenna at `pose`, as a DataFrame."""
+        pose = tuple(pose)
+        return pd.DataFrame([self._row(key) for key in self.pose_keys.get(pose, [])])
+
+    def to_frame(self):
+        """Statistics of every (tag, pose, antenna) group, as a DataFrame."""
+        return pd.DataFrame([self._row(key) for key in self.groups])
@@ -0,0 +1,192 @@
+import bisect
+import json
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+import pandas as pd
+
+# Antenna pose; timestamp in seconds since the epoch (None for planned poses)
+Pose = namedtuple('Pose', ['timestamp', 'x', 'y', 'z', 'rot_z'])
+
+# Accepted column/key names for each pose field
+POSE_FIELDS = {
+    'timestamp': ('timestamp', 't', 'Timestamp', 'time'),
+    'x': ('x', 'X', 'Antenna X [m]', 'Robot X [m]'),
+    'y': ('y', 'Y', 'Antenna Y [m]', 'Robot Y [m]'),
+    'z': ('z', 'Z', 'Antenna Z [m]', 'Robot Z [m]'),
+    'rot_z': ('rot_z', 'Rot Z', 'Antenna Rot Z [deg]', 'Robot Rot Z [deg]')
+}
+
+def pose_from_record(record, default_timestamp=None):
+    """Build a Pose from a dict using any of the accepted field names; Z and timestamp are optional."""
+    values = {}
+    for field, names in POSE_FIELDS.items():
+        value = next((record[name] for name in names if name in record and pd.notna(record[name])), None)
+        values[field] = None if value is None else float(value)
+    if values['x'] is None or values['y'] is None or values['rot_z'] is None:
+        raise ValueError(f"Pose record needs X, Y and Rot Z: {record}")
+    if values['z'] is None:
+        values['z'] = 0.0
+    if values['timestamp'] is None:
+        values['timestamp'] = default_timestamp
+    return Pose(**values)
+
+def read_records(path):
+    """Read a CSV or JSON-lines file into a list of dicts."""
+    if os.path.splitext(path)[1].lower() in ('.jsonl', '.json', '.ndjson'):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return pd.read_csv(path).to_dict('records')
+
+def load_poses(path):
+    """Load a list of poses (CSV or JSON lines); rows without timestamp are planned poses."""
+    return [pose_from_record(record) for record in read_records(path)]
+
+def load_pose_track(path):
+    """Load a recorded pose track (CSV or JSON lines); every pose needs a timestamp."""
+    poses = load_poses(path)
+    if not poses:
+        raise ValueError(f"{path} contains no poses")
+    missing = sum(pose.timestamp is None for pose in poses)
+    if missing:
+        raise ValueError(f"{missing} of the {len(poses)} poses in {path} have no timestamp")
+    return poses
+
+def load_tag_locations(path):
+    """Load tag ground truth (CSV or JSON lines with Tag ID, X and Y) into a Tag ID -> (x, y) dict."""
+    locations = {}
+    for record in read_records(path):
+        tag_id = record.get('Tag ID', record.get('tag_id', record.get('EPC')))
+        x = record.get('Tag X [m]', record.get('x', record.get('X')))
+        y = record.get('Tag Y [m]', record.get('y', record.get('Y')))
+        if tag_id is None or x is None or y is None:
+            raise ValueError(f"Tag location record needs Tag ID, X and Y: {record}")
+        locations[str(tag_id)] = (float(x), float(y))
+    return locations
+
+class PoseTrack:
+    """
+    Time-ordered poses, safe to append to from another thread.
+
+    Reads are joined to the pose nearest to their timestamp.
+    """
+
+    def __init__(self, poses=()):
+        self.lock = threading.Lock()
+        self.timestamps = []
+        self.poses = []
+        for pose in poses:
+            self.add(pose)
+
+    def add(self, pose):
+        with self.lock:
+            index = bisect.bisect_right(self.timestamps, pose.timestamp)
+            self.timestamps.insert(index, pose.timestamp)
+            self.poses.insert(index, pose)
+
+    def nearest(self, timestamp, max_gap=0.5):
+        """Pose closest in time to `timestamp`, or None if there is none within `max_gap` seconds."""
+        with self.lock:
+            if not self.timestamps:
+                return None
+            index = bisect.bisect_left(self.timestamps, timestamp)
+            candidates = [i for i in (index - 1, index) if 0 <= i < len(self.timestamps)]
+            best = min(candidates, key=lambda i: abs(self.timestamps[i] - timestamp))
+            if abs(self.timestamps[best] - timestamp) > max_gap:
+                return None
+            return self.poses[best]
+
+    def latest(self):
+        with self.lock:
+            return self.poses[-1] if self.poses else None
+
+    def __len__(self):
+        return len(self.poses)
+
+class SocketPoseSource:
+    """
+    Receives poses from the robot controller as JSON lines over UDP or TCP.
+
+    Each message is one JSON object such as
+    {"t": 1717400000.12, "x": 0.6, "y": 0.4, "z": 0.0, "rot_z": -90}.
+    Messages without a timestamp are stamped with the time they arrive, so
+    the controller and the logger should share a clock when "t" is sent.
+    """
+
+    def __init__(self, url, track=None):
+        """
+        Args:
+        url (str): 'udp://host:port' or 'tcp://host:port' to listen on.
+        track (PoseTrack): Track to append received poses to.
+        """
+        scheme, address = url.split('://', 1)
+        host, port = address.rsplit(':', 1)
+        if scheme not in ('udp', 'tcp'):
+            raise ValueError(f"Unsupported pose socket scheme: {scheme}")
+        self.scheme = scheme
+        self.address = (host, int(port))
+        self.track = track if track is not None else PoseTrack()
+        self.running = False
+        self.thread = None
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        target = self._serve_udp if self.scheme == 'udp' else self._serve_tcp
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+    def _handle_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            self.track.add(pose_from_record(json.loads(line), default_timestamp=time.time()))
+        except (ValueError, TypeError):
+            self.errors += 1
+
+    def _serve_udp(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(self.address)
+            sock.settimeout(0.2)
+            while self.running:
+                try:
+                    data, _ = sock.recvfrom(65536)
+                except socket.timeout:
+                    continue
+                for line in data.decode('utf-8', errors='replace').splitlines():
+                    self._handle_line(line)
+
+    def _serve_tcp(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(self.address)
+            server.listen(1)
+            server.settimeout(0.2)
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    conn.settimeout(0.2)
+                    buffer = b''
+                    while self.running:
+                        try:
+                            data = conn.recv(65536)
+                        except socket.timeout:
+                            continue
+                        if not data:
+                            break
+                        buffer += data
+                        *lines, buffer = buffer.split(b'\n')
+                        for line in lines:
+                            self._handle_line(line.decode('utf-8', errors='replace'))
@@ -0,0 +1,187 @@
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from tsl_reader import open_reader, init, inventory
+from pose_sources import Pose, load_poses, load_tag_locations
+
+def parse_ports(text):
+    """
+    Parse a list of antenna ports such as '1,2'.
+
+    Raises:
+    ValueError: If an entry is not a plain port number (the sweep sets the powers with --powers).
+    """
+    ports = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if not item.isdigit():
+            raise ValueError(f"Invalid antenna port '{item}': give plain ports; powers are set with --powers")
+        ports.append(int(item))
+    return ports
+
+def sweep_order(configurations, pose_index):
+    """
+    Order in which the (power, antenna) configurations are run at a pose.
+
+    Every other pose runs the list backwards, so the last configuration of a
+    pose is also the first of the next one and needs no `$ir` command.
+    """
+    return list(configurations) if pose_index % 2 == 0 else list(reversed(configurations))
+
+class PowerSweep:
+    """Runs every (power, antenna port) configuration at each pose of a calibration campaign."""
+
+    def __init__(self, ser, powers, ports, rounds=3, switch_delay=0.1):
+        """
+        Args:
+        ser (serial.Serial): Open connection to the reader.
+        powers (list): Reader power levels (0-3000) to sweep.
+        ports (list): Antenna ports (1-4) to sweep.
+        rounds (int): Inventory rounds per configuration and pose.
+        switch_delay (float): Seconds to wait after changing the configuration.
+        """
+        for power in powers:
+            if not 0 <= power <= 3000:
+                raise ValueError(f"Power must be between 0 and 3000, got {power}")
+        for port in ports:
+            if not 1 <= port <= 4:
+                raise ValueError(f"Antenna port must be between 1 and 4, got {port}")
+        self.ser = ser
+        # Ports vary fastest so a power level is kept for all antennas before moving on
+        self.configurations = [(power, port) for power in powers for port in ports]
+        self.rounds = rounds
+        self.switch_delay = switch_delay
+        self.active = None
+        self.switches = 0
+
+    def configure(self, power, port):
+        if (power, port) != self.active:
+            init(self.ser, port, power, delay=self.switch_delay)
+            self.active = (power, port)
+            self.switches += 1
+
+    def measure_pose(self, pose_index):
+        """Run all configurations at the current pose; every read is tagged with its power and port."""
+        reads = []
+        for power, port in sweep_order(self.configurations, pose_index):
+            self.configure(power, port)
+            for _ in range(self.rounds):
+                round_time = time.time()
+                for tag in inventory(self.ser):
+                    tag.update({'Power': power, 'Antenna': port, 'Timestamp': round_time})
+                    reads.append(tag)
+        return reads
+
+def tidy_dataset(reads, tag_locations):
+    """
+    Turn the sweep reads into a tidy table keyed by power.
+
+    When the tag location is known the antenna-tag distance and the azimuth
+    angle phi (relative to the antenna heading) are added, which are the
+    inputs of the distance and phi calibration fits.
+    """
+    df = pd.DataFrame(reads)
+    if df.empty:
+        return df
+    tag_xy = np.array([tag_locations.get(tag_id, (np.nan, np.nan)) for tag_id in df['Tag ID']], dtype=float)
+    dx = tag_xy[:, 0] - df['Antenna X [m]'].to_numpy()
+    dy = tag_xy[:, 1] - df['Antenna Y [m]'].to_numpy()
+    df['Tag X [m]'] = tag_xy[:, 0]
+    df['Tag Y [m]'] = tag_xy[:, 1]
+    df['Distance'] = np.hypot(dx, dy).round(3)
+    bearing = np.degrees(np.arctan2(dx, dy))
+    df['phi'] = ((bearing - df['Antenna Rot Z [deg]'].to_numpy() + 180.0) % 360.0 - 180.0).round(1)
+    columns = ['Power', 'Antenna', 'Pose', 'Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]',
+               'Antenna Rot Z [deg]', 'Tag ID', 'Tag X [m]', 'Tag Y [m]', 'Distance', 'phi',
+               'RSSI', 'Phase', 'Timestamp']
+    return df[columns].sort_values(['Power', 'Antenna', 'Pose', 'Tag ID'], kind='stable')
+
+def get_pose_from_user(index):
+    """Ask for the pose of the next measurement."""
+    print(f"\nPose {index + 1}")
+    values = []
+    for prompt in ('X position [m]', 'Y position [m]', 'Z position [m]', 'Z rotation [deg]'):
+        while True:
+            try:
+                values.append(float(input(f"Please enter the Antenna {prompt}: ")))
+                break
+            except ValueError:
+                print("Error: Please enter a valid number.")
+    return Pose(None, *values)
+
+def main():
+    parser = argparse.ArgumentParser(description='Power and antenna sweep for RSSI calibration campaigns.')
+    parser.add_argument('--powers', required=True,
+                        help='Reader power levels, e.g. "1500,2000,2500,3000" or a range "1500:3000:500"')
+    parser.add_argument('--ports', default='1', help='Antenna ports, e.g. "1,2"')
+    parser.add_argument('--rounds', type=int, default=3, help='Inventory rounds per configuration and pose')
+    parser.add_argument('--poses', help='CSV/JSON-lines file of planned poses (default: prompt for each pose)')
+    parser.add_argument('--settle', type=float, default=2.0, help='Seconds between planned poses')
+    parser.add_argument('--tags', help='CSV/JSON-lines file with the Tag ID, X and Y of every tag')
+    args = parser.parse_args()
+
+    if ':' in args.powers:
+        start, stop, step = (int(value) for value in args.powers.split(':'))
+        powers = list(range(start, stop + 1, step))
+    else:
+        powers = [int(value) for value in args.powers.split(',')]
+    try:
+        ports = parse_ports(args.ports)
+    except ValueError as e:
+        parser.error(str(e))
+    tag_locations = load_tag_locations(args.tags) if args.tags else {}
+
+    try:
+        ser = open_reader()
+    except Exception as e:
+        print(f"Error opening serial port: {e}")
+        sys.exit(1)
+
+    sweep = PowerSweep(ser, powers, ports, args.rounds)
+    planned = load_poses(args.poses) if args.poses else None
+    reads = []
+    start = time.time()
+    index = 0
+    try:
+        while planned is None or index < len(planned):
+            pose = planned[index] if planned else get_pose_from_user(index)
+            try:
+                pose_reads = sweep.measure_pose(index)
+            except Exception as e:
+                print(f"Error during measurement: {e}")
+                pose_reads = []
+            for tag in pose_reads:
+                tag.update({'Pose': index, 'Antenna X [m]': pose.x, 'Antenna Y [m]': pose.y,
+                            'Antenna Z [m]': pose.z, 'Antenna Rot Z [deg]': pose.rot_z})
+            reads.extend(pose_reads)
+            print(f"Pose {index + 1}: {len(pose_reads)} reads over {len(sweep.configurations)} configurations")
+            index += 1
+            if planned and index < len(planned):
+                time.sleep(args.settle)
+    except KeyboardInterrupt:
+        print("\nSweep stopped by user.")
+    finally:
+        ser.close()
+
+    elapsed = time.time() - start
+    print(f"\n{index} poses, {len(reads)} reads, {sweep.switches} configuration changes in {elapsed:.0f} s")
+
+    df = tidy_dataset(reads, tag_locations)
+    timestamp = datetime.now().strftime('%d%m%y_%H%M%S')
+    filename = f'rfid_power_sweep_{timestamp}.csv'
+    df.to_csv(filename, index=False)
+    print(f'Results saved to {filename}')
+    # One file per power level, with the Distance/phi/RSSI columns and the ';' separator the calibration fits read
+    if not df.empty:
+        for power, group in df.groupby('Power'):
+            power_file = f'rfid_power_sweep_{timestamp}_P{power}.csv'
+            group.to_csv(power_file, sep=';', index=False)
+            print(f'Power {power}: {len(group)} reads saved to {power_file}')
+
+if __name__ == "__main__":
+    main()
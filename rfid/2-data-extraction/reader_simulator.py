@@ -0,0 +1,287 @@
+import argparse
+import os
+import re
+import select
+import sys
+import threading
+import time
+import tty
+import numpy as np
+from tsl_reader import calculate_checksum, open_reader, init, inventory
+
+# The RSSI forward model is the localization pattern model of the antenna pattern stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-antenna-pattern'))
+from pattern_atlas import rssi_angle, rssi_distance
+
+# Read noise comes from the error model stage's noise model artifact, as in localization
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4-error-model'))
+from noise_model import load_noise_model
+
+# Carrier wavelength used for the simulated phase (EU band, 866-868 MHz)
+WAVELENGTH = 0.346
+# Weakest RSSI the simulated reader still reports
+SENSITIVITY = -80.0
+# Error code answered to a command whose checksum does not match
+CHECKSUM_ERROR_CODE = 5
+
+def rssi_std(rssi):
+    """Standard deviation of a single RSSI read, from the noise model (clamped at the sensitivity)."""
+    return load_noise_model().std(np.maximum(rssi, SENSITIVITY))
+
+class ReaderSimulator:
+    """
+    Simulated TSL reader behind a pseudo-terminal.
+
+    The simulator answers `$ir` (antenna/power setting) and `$ba -go`
+    (inventory) on the slave side of a pty, so `serial.Serial(sim.port)` can
+    be used in place of real hardware. Inventory responses contain `BH:`,
+    `TR:` and `EC:` lines generated from the RSSI forward model
+    (`rssi_distance` + `rssi_angle`) for a virtual layout of tags around the
+    current antenna pose. Every command is checked against its Fletcher-16
+    checksum and answered with `EC: 5` when it does not match.
+    """
+
+    def __init__(self, tags, read_rate=20.0, inventory_time=0.1, latency=0.0,
+                 antenna_headings=None, reference_power=3000, seed=None):
+        """
+        Args:
+        tags (dict): Tag ID -> (x, y) position in metres.
+        read_rate (float): Reads per second of a tag that is in range.
+        inventory_time (float): Duration of one `$ba -go` round in seconds.
+        latency (float): Extra delay before every response in seconds.
+        antenna_headings (dict): Antenna port -> heading offset [deg] relative to the pose rotation.
+        reference_power (int): Reader power at which the RSSI model was calibrated.
+        seed (int): Seed of the noise generator.
+        """
+        self.tags = dict(tags)
+        self.tag_ids = list(self.tags)
+        self.tag_xy = np.array([self.tags[tag_id] for tag_id in self.tag_ids], dtype=float).reshape(-1, 2)
+        self.read_rate = read_rate
+        self.inventory_time = inventory_time
+        self.latency = latency
+        self.antenna_headings = antenna_headings or {1: 0.0, 2: 90.0, 3: 180.0, 4: 270.0}
+        self.reference_power = reference_power
+        self.rng = np.random.default_rng(seed)
+        self.pose = (0.0, 0.0, 0.0)
+        self.antenna = 1
+        self.power = reference_power
+        self.commands = 0
+        self.checksum_errors = 0
+        self.reads = 0
+        self.lock = threading.Lock()
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = False
+        self.thread = None
+
+    def set_pose(self, x, y, rot_z):
+        """Move the simulated antenna to (x, y) with heading `rot_z` [deg] (clockwise from the Y axis)."""
+        with self.lock:
+            self.pose = (float(x), float(y), float(rot_z))
+
+    def start(self):
+        """Start answering commands in a background thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread and close the pty."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve(self):
+        buffer = b''
+        last_input = time.time()
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                # A command that never completed a valid checksum is answered as corrupt
+                if b'\n' in buffer and time.time() - last_input > 0.2:
+                    end = buffer.rfind(b'\n')
+                    self._handle(buffer[:end])
+                    buffer = buffer[end + 1:]
+                continue
+            try:
+                buffer += os.read(self.master, 4096)
+            except OSError:
+                break
+            last_input = time.time()
+            while True:
+                frame, buffer = self._next_frame(buffer)
+                if frame is None:
+                    break
+                self._handle(frame)
+
+    def _next_frame(self, buffer):
+        """Split the next command (checksum included, line feed stripped) off the input buffer."""
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                return None, buffer
+            frame = buffer[:end]
+            if len(frame) >= 2 and calculate_checksum(frame[:-2]) == frame[-2:]:
+                return frame, buffer[end + 1:]
+            # The line feed may be a byte of the binary checksum, in which case the
+            # real terminator follows within two bytes
+            next_end = buffer.find(b'\n', end + 1)
+            if next_end < 0:
+                if len(buffer) - end - 1 < 2:
+                    return None, buffer
+                return frame, buffer[end + 1:]
+            if next_end - end > 2:
+                return frame, buffer[end + 1:]
+            start = end + 1
+
+    def _handle(self, frame):
+        self.commands += 1
+        if len(frame) < 2 or calculate_checksum(frame[:-2]) != frame[-2:]:
+            self.checksum_errors += 1
+            response = f'EC: {CHECKSUM_ERROR_CODE}\r\n'
+        else:
+            command = frame[:-2].decode('ascii', errors='replace')
+            if command.startswith('$ir'):
+                response = self._set_inventory(command)
+            elif command.startswith('$ba'):
+                response = self._inventory()
+            else:
+                response = 'EC: 1\r\n'
+        if self.latency > 0:
+            time.sleep(self.latency)
+        # A large response does not fit the pty buffer at once; write it in full as the host reads it
+        data = response.encode()
+        while data:
+            data = data[os.write(self.master, data):]
+
+    def _set_inventory(self, command):
+        antenna = re.search(r'-anx(\w+)', command)
+        power = re.search(r'-dbx(\w+)', command)
+        with self.lock:
+            if antenna:
+                self.antenna = int(antenna.group(1), 16)
+            if power:
+                self.power = int(power.group(1), 16)
+        return 'EC: 0\r\n'
+
+    def expected_rssi(self):
+        """Noise-free RSSI and distance of every tag seen from the current antenna."""
+        with self.lock:
+            x, y, rot_z = self.pose
+            antenna = self.antenna
+            power = self.power
+        heading = rot_z + self.antenna_headings.get(antenna, 0.0)
+        dx = self.tag_xy[:, 0] - x
+        dy = self.tag_xy[:, 1] - y
+        distance = np.hypot(dx, dy)
+        bearing = np.degrees(np.arctan2(dx, dy))
+        phi = (bearing - heading + 180.0) % 360.0 - 180.0
+        rssi = rssi_distance(distance) + rssi_angle(phi) + (power - self.reference_power) / 100.0
+        # Behind the antenna and beyond the calibrated range the tag is not energised
+        in_range = (np.abs(phi) <= 90.0) & (distance <= 3.5) & (rssi >= SENSITIVITY - 6.0)
+        return np.where(in_range, rssi, -np.inf), distance
+
+    def _inventory(self):
+        if self.inventory_time > 0:
+            time.sleep(self.inventory_time)
+        rssi, distance = self.expected_rssi()
+        counts = self.rng.poisson(self.read_rate * self.inventory_time, size=len(self.tag_ids))
+        lines = [f'BH: A={self.antenna}, B=0, R=0, P={self.power}']
+        for index in np.flatnonzero(np.isfinite(rssi) & (counts > 0)):
+            reads = rssi[index] + self.rng.normal(0.0, rssi_std(rssi[index]), counts[index])
+            phase = (4 * np.pi * distance[index] / WAVELENGTH + self.rng.normal(0.0, 0.05, counts[index])) % (2 * np.pi)
+            for read_rssi, read_phase in zip(reads, phase):
+                if read_rssi < SENSITIVITY:
+                    continue
+                phase_code = int(read_phase / (2 * np.pi) * 4096) % 4096
+                lines.append(f'TR: {self.reads % 65536:04X} | EP: {self.tag_ids[index]} | '
+                             f'RI: {int(round(read_rssi * 100))} | PH: {phase_code:03X}')
+                self.reads += 1
+        lines.append('EC: 0')
+        return '\r\n'.join(lines) + '\r\n'
+
+def random_layout(n_tags, area=(0.0, 3.0), seed=None):
+    """Place `n_tags` virtual tags uniformly at random in a square area."""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(area[0], area[1], size=(n_tags, 2))
+    return {f'E2009A4050003AF{index:09d}': tuple(position) for index, position in enumerate(positions)}
+
+def load_test(simulator, rounds, timeout=0.5):
+    """
+    Run `rounds` inventory rounds against `simulator` through pyserial and report the read rate.
+
+    Every response is read up to its terminating line, so the rate is that of
+    complete rounds rather than of the serial timeout.
+
+    Raises:
+    RuntimeError: If a round failed (e.g. a truncated or timed-out response) or fewer reads arrived than were sent.
+    """
+    ser = open_reader(simulator.port)
+    ser.timeout = timeout
+    try:
+        init(ser, 1, simulator.reference_power, delay=0)
+        reads = 0
+        failures = 0
+        sent = simulator.reads
+        start = time.time()
+        for _ in range(rounds):
+            try:
+                reads += len(inventory(ser))
+            except Exception as e:
+                failures += 1
+                print(f"Error during measurement: {e}")
+        elapsed = time.time() - start
+        sent = simulator.reads - sent
+    finally:
+        ser.close()
+    print(f"{reads} reads in {rounds} rounds, {elapsed:.2f} s ({reads / elapsed:.0f} reads/s)")
+    if failures or reads != sent:
+        raise RuntimeError(f"Load test failed: {failures} failed rounds, {reads} of {sent} reads received")
+    return reads, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated TSL reader on a pseudo-terminal.')
+    parser.add_argument('--tags', type=int, default=10, help='Number of virtual tags')
+    parser.add_argument('--read-rate', type=float, default=20.0, help='Reads per second per tag in range')
+    parser.add_argument('--inventory-time', type=float, default=0.1, help='Seconds per inventory round')
+    parser.add_argument('--latency', type=float, default=0.0, help='Extra response delay in seconds')
+    parser.add_argument('--pose', type=float, nargs=3, default=(1.5, 0.0, 0.0), metavar=('X', 'Y', 'ROT_Z'),
+                        help='Antenna pose (X [m], Y [m], Rot Z [deg])')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--load-test', type=int, default=0, metavar='ROUNDS',
+                        help='Run this many inventory rounds against the simulator and exit')
+    args = parser.parse_args()
+
+    simulator = ReaderSimulator(random_layout(args.tags, seed=args.seed), args.read_rate,
+                                args.inventory_time, args.latency, seed=args.seed)
+    simulator.set_pose(*args.pose)
+    with simulator:
+        if args.load_test:
+            try:
+                load_test(simulator, args.load_test)
+            except RuntimeError as e:
+                print(e)
+                sys.exit(1)
+            return
+        print(f"Simulated reader listening on {simulator.port}")
+        print("Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\n{simulator.commands} commands, {simulator.reads} reads, "
+                  f"{simulator.checksum_errors} checksum errors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import bisect
+import json
+import os
+import time
+from tsl_reader import response_complete
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in seconds; O(log buckets) per observation."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction `q` of the observations lies."""
+        if self.count == 0:
+            return float('nan')
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], self.counts))
+        }
+
+class ReaderTelemetry:
+    """
+    Counters and latency histograms of a reader session.
+
+    Records command round-trip times per command, inventory round durations,
+    reads per tag, `EC:` error codes and responses that ended without their
+    terminating line (truncated or timed out). Snapshots are
+    appended to a JSON-lines file and written as a Prometheus text file every
+    `interval` seconds.
+    """
+
+    def __init__(self, directory=None, interval=10.0):
+        """
+        Args:
+        directory (str): Directory for `reader-telemetry.jsonl` and `reader-telemetry.prom`; None disables export.
+        interval (float): Seconds between exports.
+        """
+        self.directory = directory
+        self.interval = interval
+        self.start = time.time()
+        self.last_export = self.start
+        self.command_latency = {}
+        self.inventory_duration = LatencyHistogram()
+        self.commands = 0
+        self.truncated = 0
+        self.error_codes = {}
+        self.inventory_rounds = 0
+        self.inventory_failures = 0
+        self.tag_reads = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record_command(self, command, latency, response):
+        """Record one command: its round-trip time and the raw response bytes."""
+        name = command.split(b' ', 1)[0].decode('ascii', errors='replace')
+        histogram = self.command_latency.get(name)
+        if histogram is None:
+            histogram = self.command_latency[name] = LatencyHistogram()
+        histogram.observe(latency)
+        self.commands += 1
+        if not response_complete(response):
+            self.truncated += 1
+        start = response.find(b'EC:')
+        while start >= 0:
+            end = response.find(b'\n', start)
+            code = response[start + 3:end if end >= 0 else len(response)].strip().decode('ascii', errors='replace')
+            self.error_codes[code] = self.error_codes.get(code, 0) + 1
+            start = response.find(b'EC:', start + 3)
+        self.maybe_export()
+
+    def record_inventory(self, tags, duration):
+        """Record one inventory round: its duration and the tags that were read."""
+        self.inventory_rounds += 1
+        self.inventory_duration.observe(duration)
+        for tag in tags:
+            tag_id = tag['Tag ID']
+            self.tag_reads[tag_id] = self.tag_reads.get(tag_id, 0) + 1
+        self.maybe_export()
+
+    def record_inventory_failure(self, duration):
+        self.inventory_rounds += 1
+        self.inventory_failures += 1
+        self.inventory_duration.observe(duration)
+
+    def snapshot(self):
+        """Current telemetry as a dict."""
+        now = time.time()
+        elapsed = max(now - self.start, 1e-9)
+        errors = sum(count for code, count in self.error_codes.items() if code != '0')
+        return {
+            'timestamp': now,
+            'uptime [s]': elapsed,
+            'commands': self.commands,
+            'truncated responses': self.truncated,
+            'error codes': dict(self.error_codes),
+            'error rate': errors / self.commands if self.commands else 0.0,
+            'inventory rounds': self.inventory_rounds,
+            'inventory failures': self.inventory_failures,
+            'command latency [s]': {name: histogram.snapshot() for name, histogram in self.command_latency.items()},
+            'inventory duration [s]': self.inventory_duration.snapshot(),
+            'tag reads': dict(self.tag_reads),
+            'tag read rate [1/s]': {tag_id: count / elapsed for tag_id, count in self.tag_reads.items()}
+        }
+
+    def prometheus_text(self):
+        """Current telemetry in the Prometheus text exposition format."""
+        lines = [
+            '# TYPE rfid_reader_commands_total counter',
+            f'rfid_reader_commands_total {self.commands}',
+            '# TYPE rfid_reader_truncated_responses_total counter',
+            f'rfid_reader_truncated_responses_total {self.truncated}',
+            '# TYPE rfid_reader_error_codes_total counter'
+        ]
+        lines += [f'rfid_reader_error_codes_total{{code="{code}"}} {count}' for code, count in self.error_codes.items()]
+        lines += [
+            '# TYPE rfid_reader_inventory_rounds_total counter',
+            f'rfid_reader_inventory_rounds_total {self.inventory_rounds}',
+            '# TYPE rfid_reader_inventory_failures_total counter',
+            f'rfid_reader_inventory_failures_total {self.inventory_failures}',
+            '# TYPE rfid_reader_tag_reads_total counter'
+        ]
+        lines += [f'rfid_reader_tag_reads_total{{epc="{tag_id}"}} {count}' for tag_id, count in self.tag_reads.items()]
+        histograms = [('rfid_reader_command_latency_seconds', f'command="{name}"', histogram)
+                      for name, histogram in self.command_latency.items()]
+        histograms.append(('rfid_reader_inventory_duration_seconds', '', self.inventory_duration))
+        declared = set()
+        for metric, labels, histogram in histograms:
+            if metric not in declared:
+                lines.append(f'# TYPE {metric} histogram')
+                declared.add(metric)
+            separator = ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip([str(bound) for bound in histogram.buckets] + ['+Inf'], histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{metric}_sum{suffix} {histogram.sum}')
+            lines.append(f'{metric}_count{suffix} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def maybe_export(self):
+        if self.directory and time.time() - self.last_export >= self.interval:
+            self.export()
+
+    def export(self):
+        """Append a JSON snapshot and rewrite the Prometheus text file."""
+        if not self.directory:
+            return
+        self.last_export = time.time()
+        with open(os.path.join(self.directory, 'reader-telemetry.jsonl'), 'a') as f:
+            f.write(json.dumps(self.snapshot()) + '\n')
+        # Write to a temporary file first so a scraper never sees a half-written file
+        prom_path = os.path.join(self.directory, 'reader-telemetry.prom')
+        with open(prom_path + '.tmp', 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(prom_path + '.tmp', prom_path)
+
+class TelemetrySerial:
+    """
+    Wrapper around an open serial connection that times every command.
+
+    The round trip is measured from the write of a command to the read that
+    completes its response (or times out); a response is usually read in
+    several chunks. All other attributes are forwarded to the wrapped
+    connection, like `RecordingSerial`.
+    """
+
+    def __init__(self, ser, telemetry):
+        self.ser = ser
+        self.telemetry = telemetry
+        self.pending = None
+
+    def _record(self):
+        if self.pending is not None:
+            command, start, response = self.pending
+            self.pending = None
+            self.telemetry.record_command(command, time.perf_counter() - start, bytes(response))
+
+    def write(self, data):
+        # A response that was never completed is recorded before the next command
+        self._record()
+        self.pending = (bytes(data), time.perf_counter(), bytearray())
+        return self.ser.write(data)
+
+    def read(self, size=1):
+        data = self.ser.read(size)
+        if self.pending is not None:
+            self.pending[2].extend(data)
+            if not data or response_complete(self.pending[2]):
+                self._record()
+        return data
+
+    def close(self):
+        self.telemetry.export()
+        self.ser.close()
+
+    def __getattr__(self, name):
+        return getattr(self.ser, name)
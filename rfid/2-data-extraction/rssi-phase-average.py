@@ -1,99 +1,12 @@
-import serial
-import serial.tools.list_ports
+import argparse
+import csv
 import signal
 import sys
-import time
-import pandas as pd
 from datetime import datetime
 from math import sqrt
-
-# Serial port configuration for an RFID reader
-tsl_name = 'TSL RAIN RFID MODULE'
-tsl_baudrate = 921600
-tsl_bytesize = 8
-tsl_parity = 'N'
-tsl_stopbits = 1
-tsl_timeout = 2
-
-def find_port(portname):
-    """Scan for a COM port that includes the given port name and return its device name."""
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        if portname in str(port.description):
-            print("Port found: " + port.device)
-            return port.device
-    raise Exception("Port not found. Check the connection.")
-
-def calculate_checksum(command):
-    """Calculate Fletcher-16 checksum for a command."""
-    c0, c1 = 0, 0
-    for char in command:
-        c0 = (c0 + char) % 255
-        c1 = (c1 + c0) % 255
-    checksum = (c1 << 8) | c0
-    return checksum.to_bytes(2, byteorder='big')
-
-def send_command(command):
-    """Send a command with an appended checksum to the RFID device and read the response."""
-    command_with_checksum = command + calculate_checksum(command)
-    ser.write(command_with_checksum + b'\x0A')  # End command with line feed
-    response = ser.read(3000)  # Read the response (up to 3000 bytes)
-    return response.decode('utf-8')
-
-def init(antenna_number, power):
-    """
-    Set the antenna number on the RFID reader.
-
-    Args:
-    antenna_number (int): The antenna number to set.
-    power (int): The power level to set.
-
-    Raises:
-    Exception: If setting the antenna fails.
-    """
-    inventory_command = f'$ir -bnx0 -sex0 -tax0 -slx0 -dtx1 -anx{antenna_number} -dbx{hex(power)[2:]} -trxFFFF'
-    print(inventory_command)
-    lines = send_command(inventory_command.encode()).split('\n')
-    time.sleep(1)  # Delay for command processing
-    for line in lines:
-        if line.startswith('EC:'):
-            error_code = line.split(': ', 1)[1]
-            if error_code != '0':
-                raise Exception(f"Antenna setting to {antenna_number} failed. EC: {error_code}")
-            else:
-                print(f"Antenna set to {antenna_number}")
-
-def extract_tag_details(lines):
-    """Extract and return tag details and parameters from response lines."""
-    tags = []
-    current_antenna = 'Unknown'
-    bank_number = 'Unknown'
-    rf_mode = 'Unknown'
-    power = 'Unknown'
-    for line in lines:
-        if line.startswith('BH:'):
-            bh_details = line.split(': ', 1)[1].split(',')
-            bank_header = {part.split('=')[0].strip(): part.split('=')[1].strip() for part in bh_details}
-            current_antenna = bank_header.get('A', 'Unknown')
-            bank_number = bank_header.get('B', 'Unknown')
-            rf_mode = bank_header.get('R', 'Unknown')
-            power = bank_header.get('P', 'Unknown')
-        elif line.startswith('TR:'):
-            tag_details = line.split(' | ')
-            tag_info = {detail.split(': ', 1)[0].strip(): detail.split(': ', 1)[1].strip() for detail in tag_details if ': ' in detail}
-            tags.append({
-                'Tag ID': tag_info.get('EP', 'Unknown'),
-                'RSSI': tag_info.get('RI', 'Unknown'),
-                'Phase': tag_info.get('PH', 'Unknown'),
-                'Antenna': current_antenna
-            })
-        elif line.startswith('EC:'):
-            error_code = line.split(': ', 1)[1]
-            if error_code == str(10):
-                raise Exception(f"Disconnected, poorly-connected or mismatched impedance of the antenna")
-            elif error_code != str(0):
-                raise Exception(f"EC: {error_code}")
-    return tags, [bank_number, rf_mode, power]
+from tsl_reader import open_reader, init, inventory
+from traffic_capture import CaptureWriter, RecordingSerial
+from pose_aggregator import PoseAggregator
 
 def hex_to_decimal(hex_value):
     """Convert phase from hexadecimal to decimal."""
@@ -103,49 +16,22 @@ def hex_to_decimal(hex_value):
     except ValueError:
         return float('nan')  # Return NaN for invalid values
 
-def hex_phase_to_degrees(decimal_phase):
-    """Convert phase from decimal to degrees."""
-    try:
-        # Convert to degrees (360 degrees mapped to 4096 values)
-        return (decimal_phase * 360.0) / 4096.0
-    except (ValueError, TypeError):
-        return float('nan')  # Return NaN for invalid values
-
-# Function to handle Ctrl+C and save the DataFrame to CSV
+# Function to handle Ctrl+C and save the per-position statistics to CSV
 def signal_handler(sig, frame):
-    # Convert RSSI and Phase to numeric
-    df['RSSI'] = pd.to_numeric(df['RSSI'], errors='coerce')
-    df['Phase Decimal'] = pd.to_numeric(df['Phase Decimal'], errors='coerce')
-    
-    # Calculate averages for each unique distance
-    avg_data = df.groupby('Distance [m]').agg({
-        'RSSI': 'mean',
-        'Phase Decimal': 'mean'
-    }).reset_index()
-    
-    # Round the averages to 2 decimal places
-    avg_data['Avg RSSI'] = avg_data['RSSI'].round(2)
-    avg_data['Avg Phase Decimal'] = avg_data['Phase Decimal'].round(2)
-    
-    # Drop the original columns used for calculation
-    avg_data = avg_data.drop(['RSSI', 'Phase Decimal'], axis=1)
-    
-    # Merge the averages back to the original dataframe based on Distance
-    final_df = df.merge(avg_data, on='Distance [m]', how='left')
-    
-    # Sort the dataframe by Distance for better readability
-    final_df = final_df.sort_values('Distance [m]')
-    
-    timestamp = datetime.now().strftime('%d%m%y_%H%M%S')
-    filename = f'robot_rfid_data_{timestamp}.csv'
+    raw_file.close()
+    summary = aggregator.to_frame()
+    if not summary.empty:
+        summary = summary.sort_values(['Distance [m]', 'Tag ID', 'Antenna'])
+    filename = f'robot_rfid_summary_{session_timestamp}.csv'
     print(f'\nSaving results to {filename}...')
-    
-    # Print the averages for each distance
-    print("\nAverages for each distance:")
-    print(avg_data)
-    
-    final_df.to_csv(filename, index=False)
+
+    # Print the statistics for each position
+    print("\nStatistics for each position:")
+    print(summary.round(2))
+
+    summary.to_csv(filename, index=False)
     print(f'Results saved to {filename}')
+    print(f'Raw measurements saved to {raw_filename}')
     ser.close()
     sys.exit(0)
 
@@ -153,22 +39,37 @@ def calculate_distance(x, y, z):
     return sqrt(x**2 + y**2 + z**2)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='RSSI and phase logger with per-distance averaging.')
+    parser.add_argument('--port', help='Serial device of the reader (default: discover by reader name)')
+    parser.add_argument('--capture', help='Record the raw serial traffic to this capture file')
+    args = parser.parse_args()
+
     try:
-        ser = serial.Serial('COM3', baudrate=tsl_baudrate, bytesize=tsl_bytesize, 
-                          parity=tsl_parity, stopbits=tsl_stopbits, timeout=tsl_timeout)
+        ser = open_reader(args.port)
     except Exception as e:
         print(f"Error opening serial port: {e}")
         exit(1)
+    if args.capture:
+        ser = RecordingSerial(ser, CaptureWriter(args.capture))
+        print(f"Recording raw serial traffic to {args.capture}")
 
     # Initialize antenna and power settings
     antenna = int(input("Please enter the antenna port (1-4): "))
     power = int(input("Please enter the reader power (0-3000): "))
-    init(antenna, power)
-
-    # DataFrame to store the results - now including Phase Decimal
-    df = pd.DataFrame(columns=['Tag ID', 'RSSI', 'Phase', 'Phase Decimal', 'Antenna', 
-                             'Robot X [m]', 'Robot Y [m]', 'Robot Z [m]', 
-                             'Robot Rot Z [deg]', 'Distance [m]', 'Note'])
+    init(ser, antenna, power)
+
+    # Raw reads are streamed to CSV; only the running statistics per position stay in memory
+    raw_columns = ['Tag ID', 'RSSI', 'Phase', 'Phase Decimal', 'Antenna',
+                   'Robot X [m]', 'Robot Y [m]', 'Robot Z [m]',
+                   'Robot Rot Z [deg]', 'Distance [m]', 'Note']
+    session_timestamp = datetime.now().strftime('%d%m%y_%H%M%S')
+    raw_filename = f'robot_rfid_data_{session_timestamp}.csv'
+    raw_file = open(raw_filename, 'w', newline='')
+    raw_writer = csv.DictWriter(raw_file, fieldnames=raw_columns)
+    raw_writer.writeheader()
+    aggregator = PoseAggregator(pose_columns=('Robot X [m]', 'Robot Y [m]', 'Robot Z [m]',
+                                              'Robot Rot Z [deg]', 'Distance [m]'))
+    total_reads = 0
 
     signal.signal(signal.SIGINT, signal_handler)
 
@@ -184,13 +85,12 @@ if __name__ == "__main__":
 
         # Calculate distance from origin
         distance = calculate_distance(robot_x, robot_y, robot_z)
+        pose = (robot_x, robot_y, robot_z, robot_rot_z, distance)
 
         # Perform inventory
-        tag_data = send_command(f'$ba -go'.encode())
-        tag_lines = tag_data.split('\n')
-        tags, header_bank = extract_tag_details(tag_lines)
+        tags = inventory(ser)
 
-        # Add measurements to DataFrame
+        # Add measurements to the raw log and the running statistics
         for tag in tags:
             # Convert phase to decimal first
             phase_decimal = hex_to_decimal(tag['Phase'])
@@ -208,11 +108,14 @@ if __name__ == "__main__":
                 'Distance [m]': distance,
                 'Note': note
             }
-            df = df._append(tag_data, ignore_index=True)
-
-        print("\nCurrent measurements:")
-        print(pd.DataFrame([tag_data]))
-        print(f"\nTotal measurements recorded: {len(df)}")
+            raw_writer.writerow(tag_data)
+            aggregator.add(tag['Tag ID'], pose, tag['Antenna'], tag['RSSI'], phase_decimal)
+        total_reads += len(tags)
+        raw_file.flush()
+
+        print("\nCurrent position statistics:")
+        print(aggregator.pose_summary(pose).round(2))
+        print(f"\nTotal measurements recorded: {total_reads}")
         
         # Ask user to proceed to the next measurement
-        input(f"Current distance from origin: {distance:.2f} meters. Press Enter to continue to the next measurement or Ctrl+C to stop.")
\ No newline at end of file
+        input(f"Current distance from origin: {distance:.2f} meters. Press Enter to continue to the next measurement or Ctrl+C to stop.")
@@ -1,90 +1,31 @@
-import serial
-import serial.tools.list_ports
+import argparse
 import signal
 import sys
 import time
 import pandas as pd
 from datetime import datetime
 from math import sqrt
+from tsl_reader import open_reader
+from antenna_scheduler import AntennaScheduler, parse_port_powers
+from traffic_capture import CaptureWriter, RecordingSerial
+from reader_telemetry import ReaderTelemetry, TelemetrySerial
+from measurement_store import MeasurementWriter
+from dwell_controller import DwellController
+from pose_sources import Pose, PoseTrack, SocketPoseSource, load_poses, load_pose_track, load_tag_locations
 
-# Serial port configuration for an RFID reader
-tsl_name = 'TSL RAIN RFID MODULE'
-tsl_baudrate = 921600
-tsl_bytesize = 8
-tsl_parity = 'N'
-tsl_stopbits = 1
-tsl_timeout = 2
-
-def find_port(portname):
-    """Scan for a COM port that includes the given port name and return its device name."""
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        if portname in str(port.description):
-            print("Port found: " + port.device)
-            return port.device
-    raise Exception("Port not found. Check the connection.")
-
-def calculate_checksum(command):
-    """Calculate Fletcher-16 checksum for a command."""
-    c0, c1 = 0, 0
-    for char in command:
-        c0 = (c0 + char) % 255
-        c1 = (c1 + c0) % 255
-    checksum = (c1 << 8) | c0
-    return checksum.to_bytes(2, byteorder='big')
-
-def send_command(command):
-    """Send a command with an appended checksum to the RFID device and read the response."""
-    command_with_checksum = command + calculate_checksum(command)
-    ser.write(command_with_checksum + b'\x0A')  # End command with line feed
-    response = ser.read(3000)  # Read the response (up to 3000 bytes)
-    return response.decode('utf-8')
-
-def init(antenna_number, power):
-    """Set the antenna number on the RFID reader."""
-    inventory_command = f'$ir -bnx0 -sex0 -tax0 -slx0 -dtx1 -anx{antenna_number} -dbx{hex(power)[2:]} -trxFFFF'
-    print(inventory_command)
-    lines = send_command(inventory_command.encode()).split('\n')
-    time.sleep(1)  # Delay for command processing
-    for line in lines:
-        if line.startswith('EC:'):
-            error_code = line.split(': ', 1)[1]
-            if error_code != '0':
-                raise Exception(f"Antenna setting to {antenna_number} failed. EC: {error_code}")
-            else:
-                print(f"Antenna set to {antenna_number}")
-
-def extract_tag_details(lines):
-    """Extract and return tag details from response lines."""
-    tags = []
-    current_antenna = 'Unknown'
-    for line in lines:
-        if line.startswith('BH:'):
-            bh_details = line.split(': ', 1)[1].split(',')
-            bank_header = {part.split('=')[0].strip(): part.split('=')[1].strip() for part in bh_details}
-            current_antenna = bank_header.get('A', 'Unknown')
-        elif line.startswith('TR:'):
-            tag_details = line.split(' | ')
-            tag_info = {detail.split(': ', 1)[0].strip(): detail.split(': ', 1)[1].strip() for detail in tag_details if ': ' in detail}
-            # Convert RSSI to float and divide by 100
-            rssi = float(tag_info.get('RI', '0')) / 100
-            tags.append({
-                'Tag ID': tag_info.get('EP', 'Unknown'),
-                'RSSI': rssi,
-                'Antenna': current_antenna
-            })
-        elif line.startswith('EC:'):
-            error_code = line.split(': ', 1)[1]
-            if error_code == str(10):
-                raise Exception(f"Disconnected, poorly-connected or mismatched impedance of the antenna")
-            elif error_code != str(0):
-                raise Exception(f"EC: {error_code}")
-    return tags
-
-def signal_handler(sig, frame):
+def save_results():
+    """Save all measurements to Excel, one sheet per tag (or close the binary file), and close the reader."""
+    if dwell_controller is not None:
+        print(dwell_controller.session_report())
+    if measurement_writer is not None:
+        measurement_writer.close()
+        print(f'\n{read_count} reads saved to {measurement_writer.path}')
+        ser.close()
+        return
     timestamp = datetime.now().strftime('%d%m%y_%H%M%S')
     filename = f'rfid_data_{timestamp}.xlsx'
     print(f'\nSaving results to {filename}...')
+    df = pd.DataFrame(rows, columns=columns)
     
     # Create Excel writer object
     with pd.ExcelWriter(filename, engine='openpyxl') as writer:
@@ -100,34 +41,216 @@ def signal_handler(sig, frame):
     print(f'Results saved to {filename}')
     print('\nData has been organized by Tag ID in separate sheets.')
     ser.close()
+
+def signal_handler(sig, frame):
+    save_results()
     sys.exit(0)
 
+def measure_pose():
+    """Inventory on every antenna port at the current pose; repeated until converged when the dwell is adaptive."""
+    scheduler.new_pose()
+    if dwell_controller is not None:
+        dwell_controller.start_pose()
+    tags = []
+    pose_start = time.time()
+    while True:
+        cycle_tags = scheduler.run_cycle()
+        tags.extend(cycle_tags)
+        if dwell_controller is None:
+            break
+        for tag in cycle_tags:
+            dwell_controller.add(tag['Tag ID'], tag['Antenna'], tag['RSSI'])
+        if dwell_controller.done():
+            break
+    return tags, time.time() - pose_start
+
+def get_tag_location(tag_id):
+    """Location of a tag: preloaded, asked from the user, or unknown (NaN) in unattended mode."""
+    if tag_id not in tag_locations:
+        print(f"\nNew Tag ID detected: {tag_id}")
+        if unattended:
+            print(f"No location known for Tag {tag_id}; its Tag X/Y are left empty.")
+            tag_locations[tag_id] = (float('nan'), float('nan'))
+        else:
+            tag_x = get_valid_float(f"Please enter the Tag X position [m] for Tag {tag_id}: ")
+            tag_y = get_valid_float(f"Please enter the Tag Y position [m] for Tag {tag_id}: ")
+            tag_locations[tag_id] = (tag_x, tag_y)
+    return tag_locations[tag_id]
+
+def phase_decimal(phase):
+    """Reader phase (12-bit hex string) as decimal, NaN when the reader did not report it."""
+    if phase is None or phase == 'Unknown':
+        return float('nan')
+    return int(phase, 16)
+
+def record_reads(tags, pose, dwell=None):
+    """
+    Add the reads taken at `pose` to the measurement rows, or stream them to the binary file.
+
+    When the pose was measured in one dwell, every row also gets the dwell
+    time and the number of inventory rounds on its antenna port, so the read
+    count and read rate of each tag per pose can be derived from the rows.
+    With --binary the reads go straight to the measurement writer and are
+    not kept in memory.
+    """
+    global read_count, last_row
+    distance = calculate_distance(pose.x, pose.y, pose.z)
+    for tag in tags:
+        tag_x, tag_y = get_tag_location(tag['Tag ID'])
+        row = {
+            'Tag ID': tag['Tag ID'],
+            'RSSI': tag['RSSI'],
+            'Phase': phase_decimal(tag.get('Phase')),
+            'Antenna': tag['Antenna'],
+            'Antenna X [m]': pose.x,
+            'Antenna Y [m]': pose.y,
+            'Antenna Z [m]': pose.z,
+            'Antenna Rot Z [deg]': pose.rot_z,
+            'Distance [m]': distance,
+            'Tag X [m]': tag_x,
+            'Tag Y [m]': tag_y,
+            'Timestamp': tag.get('Timestamp'),
+            'Rounds': scheduler.round_counts[tag['Antenna']] if dwell is not None else float('nan'),
+            'Dwell [s]': dwell if dwell is not None else float('nan')
+        }
+        read_count += 1
+        last_row = row
+        if measurement_writer is None:
+            rows.append(row)
+            continue
+        if tag['Tag ID'] not in measurement_writer.tag_locations and pd.notna(tag_x) and pd.notna(tag_y):
+            measurement_writer.set_tag_location(tag['Tag ID'], tag_x, tag_y)
+        measurement_writer.add(tag['Tag ID'], tag['RSSI'], tag['Antenna'], (pose.x, pose.y, pose.z, pose.rot_z),
+                               timestamp=tag.get('Timestamp'), phase=tag.get('Phase'), rounds=row['Rounds'],
+                               dwell=row['Dwell [s]'])
+
+def print_pose_summary(tags, pose, dwell=None):
+    """Print the reads of the last pose per antenna port, and per tag with the read rate when the dwell is known."""
+    print("\nCurrent measurements:")
+    if last_row is not None:
+        print(pd.DataFrame([last_row]))
+    print(f"\nTotal measurements recorded: {read_count}")
+    for antenna, new_tags in scheduler.new_tag_counts.items():
+        print(f"Antenna port {antenna}: {sum(1 for tag in tags if tag['Antenna'] == antenna)} reads, {new_tags} tags")
+    if dwell:
+        counts = {}
+        for tag in tags:
+            counts[tag['Tag ID']] = counts.get(tag['Tag ID'], 0) + 1
+        for tag_id, count in counts.items():
+            print(f"Tag {tag_id}: {count} reads, {count / dwell:.1f} reads/s")
+    print(f"Current distance from origin: {calculate_distance(pose.x, pose.y, pose.z):.2f} meters")
+    if dwell_controller is not None:
+        print(dwell_controller.pose_report())
+
+def run_interactive():
+    """Poses typed in by the operator, one measurement per pose."""
+    while True:
+        # Get antenna position and rotation
+        antenna_x = get_valid_float("Please enter the Antenna X position [m]: ")
+        antenna_y = get_valid_float("Please enter the Antenna Y position [m]: ")
+        antenna_z = get_valid_float("Please enter the Antenna Z position [m]: ")
+        antenna_rot_z = get_valid_float("Please enter the Antenna Z rotation [deg]: ")
+        pose = Pose(None, antenna_x, antenna_y, antenna_z, antenna_rot_z)
+
+        try:
+            tags, dwell = measure_pose()
+            record_reads(tags, pose, dwell)
+            print_pose_summary(tags, pose, dwell)
+        except Exception as e:
+            print(f"Error during measurement: {e}")
+            print("Continuing to next measurement...")
+            continue
+
+        # With adaptive dwell the logger moves on as soon as the pose has converged
+        if dwell_controller is not None:
+            continue
+
+        # Ask user to proceed to the next measurement
+        input("Press Enter to continue to the next measurement or Ctrl+C to stop.")
+
+def run_planned(poses, settle):
+    """Measure each planned pose in turn, waiting `settle` seconds for the robot in between."""
+    for index, pose in enumerate(poses, 1):
+        print(f"\nPose {index}/{len(poses)}: X={pose.x} Y={pose.y} Z={pose.z} Rot Z={pose.rot_z}")
+        try:
+            tags, dwell = measure_pose()
+            record_reads(tags, pose, dwell)
+            print_pose_summary(tags, pose, dwell)
+        except Exception as e:
+            print(f"Error during measurement: {e}")
+        if index < len(poses):
+            time.sleep(settle)
+
+def run_tracked(track, max_gap, end_time=None):
+    """Inventory continuously and join every read to the pose nearest to it in time."""
+    current_pose = None
+    dropped = 0
+    while end_time is None or time.time() <= end_time:
+        latest = track.latest()
+        if latest is not current_pose:
+            scheduler.new_pose()
+            current_pose = latest
+        try:
+            tags = scheduler.run_cycle()
+        except Exception as e:
+            print(f"Error during measurement: {e}")
+            continue
+        joined = {}
+        for tag in tags:
+            pose = track.nearest(tag['Timestamp'], max_gap)
+            if pose is None:
+                dropped += 1
+                continue
+            joined.setdefault(pose, []).append(tag)
+        for pose, pose_tags in joined.items():
+            record_reads(pose_tags, pose)
+        print(f"\r{read_count} reads recorded over {len(track)} poses, {dropped} without a pose", end='')
+    print()
+
 def calculate_distance(x, y, z):
     """Calculate the Euclidean distance from origin (0,0,0) to point (x,y,z)."""
     return round(sqrt(x**2 + y**2 + z**2), 3)  # Round to 3 decimal places
 
-def get_valid_antenna():
-    """Get valid antenna input from user."""
+def get_valid_antennas():
+    """Get one or more valid antenna ports from user."""
     while True:
         try:
-            antenna = int(input("Please enter the antenna port (1-4): "))
-            if 1 <= antenna <= 4:
-                return antenna
-            print("Error: Antenna port must be between 1 and 4. Please try again.")
+            ports = [int(p) for p in input("Please enter the antenna ports (1-4), separated by commas: ").split(',') if p.strip()]
+            if ports and all(1 <= p <= 4 for p in ports):
+                return list(dict.fromkeys(ports))
+            print("Error: Antenna ports must be between 1 and 4. Please try again.")
         except ValueError:
-            print("Error: Please enter a valid number.")
+            print("Error: Please enter valid numbers.")
 
-def get_valid_power():
-    """Get valid power input from user."""
+def get_valid_power(antenna):
+    """Get valid power input for an antenna port from user."""
     while True:
         try:
-            power = int(input("Please enter the reader power (0-3000): "))
+            power = int(input(f"Please enter the reader power for antenna port {antenna} (0-3000): "))
             if 0 <= power <= 3000:
                 return power
             print("Error: Power must be between 0 and 3000. Please try again.")
         except ValueError:
             print("Error: Please enter a valid number.")
 
+def get_valid_dwell():
+    """Get the number of inventory rounds per antenna port, or adaptive dwell, from user."""
+    while True:
+        answer = input("Please enter the inventory rounds per antenna port (press Enter for adaptive): ").strip()
+        if not answer:
+            return None
+        try:
+            rounds = int(answer)
+            if rounds >= 1:
+                return rounds
+            print("Error: At least one round is required. Please try again.")
+        except ValueError:
+            print("Error: Please enter a valid number.")
+
+def get_port_powers():
+    """Ask the user for the antenna ports to cycle through and the power of each."""
+    return {antenna: get_valid_power(antenna) for antenna in get_valid_antennas()}
+
 def get_valid_float(prompt):
     """Get valid float input from user."""
     while True:
@@ -138,90 +261,109 @@ def get_valid_float(prompt):
             print("Error: Please enter a valid number.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='RSSI logger for a TSL RFID reader.')
+    parser.add_argument('--capture', help='Record the raw serial traffic to this capture file')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='Write reader latency, error and read-rate telemetry to this directory')
+    parser.add_argument('--telemetry-interval', type=float, default=10.0,
+                        help='Seconds between telemetry exports')
+    parser.add_argument('--binary', action='store_true',
+                        help='Stream the reads to a binary measurement file (.rfid) instead of saving Excel')
+    parser.add_argument('--adaptive-dwell', action='store_true',
+                        help='Inventory until every tag\'s mean RSSI has converged, then advance automatically')
+    parser.add_argument('--band-fraction', type=float, default=0.1,
+                        help='Converged when the RSSI confidence interval is below this fraction of the band width')
+    parser.add_argument('--max-dwell', type=float, default=30.0, help='Maximum dwell per pose in seconds')
+    parser.add_argument('--ports', help='Antenna ports and powers, e.g. "1:2500,2:2700" (skips the prompts)')
+    parser.add_argument('--dwell', type=int, help='Inventory rounds per antenna port (default with --ports: adaptive)')
+    parser.add_argument('--tags', help='CSV/JSON-lines file with the Tag ID, X and Y of every tag')
+    poses = parser.add_mutually_exclusive_group()
+    poses.add_argument('--poses', help='CSV/JSON-lines file of planned poses, measured in order')
+    poses.add_argument('--pose-socket', help='Receive timestamped poses from the robot, e.g. udp://0.0.0.0:5005')
+    poses.add_argument('--pose-track', help='CSV/JSON-lines file of timestamped poses to join the reads to')
+    parser.add_argument('--settle', type=float, default=2.0, help='Seconds between planned poses')
+    parser.add_argument('--max-pose-gap', type=float, default=0.5,
+                        help='Largest time difference [s] between a read and its pose')
+    args = parser.parse_args()
+    unattended = bool(args.poses or args.pose_socket or args.pose_track)
+    recorded = None
+    if args.pose_track:
+        try:
+            recorded = load_pose_track(args.pose_track)
+        except (OSError, ValueError) as e:
+            parser.error(f'--pose-track: {e} (planned poses without timestamps go to --poses)')
+
     try:
-        ser = serial.Serial('COM3', baudrate=tsl_baudrate, bytesize=tsl_bytesize, 
-                          parity=tsl_parity, stopbits=tsl_stopbits, timeout=tsl_timeout)
+        ser = open_reader()
     except Exception as e:
         print(f"Error opening serial port: {e}")
         exit(1)
+    if args.capture:
+        ser = RecordingSerial(ser, CaptureWriter(args.capture))
+        print(f"Recording raw serial traffic to {args.capture}")
+    telemetry = None
+    if args.telemetry:
+        telemetry = ReaderTelemetry(args.telemetry, interval=args.telemetry_interval)
+        ser = TelemetrySerial(ser, telemetry)
+        print(f"Writing reader telemetry to {args.telemetry}")
+
+    # Initialize antenna ports and their power settings
+    if args.ports:
+        port_powers = parse_port_powers(args.ports, default_power=3000)
+        dwell_rounds = args.dwell
+    else:
+        port_powers = get_port_powers()
+        dwell_rounds = get_valid_dwell()
 
-    # Initialize antenna and power settings
-    antenna = get_valid_antenna()
-    power = get_valid_power()
-    
     while True:
         try:
-            init(antenna, power)
+            scheduler = AntennaScheduler(ser, port_powers, dwell_rounds=dwell_rounds or 1,
+                                         adaptive=dwell_rounds is None, telemetry=telemetry)
+            for antenna in port_powers:
+                scheduler.select_port(antenna)
             break
         except Exception as e:
             print(f"Error initializing antenna: {e}")
-            antenna = get_valid_antenna()
-            power = get_valid_power()
-
-    # DataFrame to store the results
-    df = pd.DataFrame(columns=['Tag ID', 'RSSI', 'Antenna', 
-                             'Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]', 
-                             'Antenna Rot Z [deg]', 'Distance [m]',
-                             'Tag X [m]', 'Tag Y [m]'])  # Added Tag X and Y columns
+            if args.ports:
+                ser.close()
+                exit(1)
+            port_powers = get_port_powers()
 
-    signal.signal(signal.SIGINT, signal_handler)
+    # Measurement rows of the Excel output, turned into a DataFrame when the results are saved
+    columns = ['Tag ID', 'RSSI', 'Phase', 'Antenna',
+               'Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]',
+               'Antenna Rot Z [deg]', 'Distance [m]',
+               'Tag X [m]', 'Tag Y [m]', 'Timestamp', 'Rounds', 'Dwell [s]']  # Added Tag X and Y columns
+    rows = []
+    read_count = 0
+    last_row = None
 
-    # Dictionary to store tag locations
-    tag_locations = {}
+    measurement_writer = None
+    if args.binary:
+        measurement_writer = MeasurementWriter(f"rfid_data_{datetime.now().strftime('%d%m%y_%H%M%S')}.rfid")
+        print(f"Streaming reads to {measurement_writer.path}")
 
-    while True:
-        # Get antenna position and rotation
-        antenna_x = get_valid_float("Please enter the Antenna X position [m]: ")
-        antenna_y = get_valid_float("Please enter the Antenna Y position [m]: ")
-        antenna_z = get_valid_float("Please enter the Antenna Z position [m]: ")
-        antenna_rot_z = get_valid_float("Please enter the Antenna Z rotation [deg]: ")
+    dwell_controller = None
+    if args.adaptive_dwell:
+        dwell_controller = DwellController(band_fraction=args.band_fraction, max_time=args.max_dwell)
 
-        # Calculate distance from origin
-        distance = calculate_distance(antenna_x, antenna_y, antenna_z)
+    signal.signal(signal.SIGINT, signal_handler)
 
-        try:
-            # Perform inventory
-            tag_data = send_command(f'$ba -go'.encode())
-            tag_lines = tag_data.split('\n')
-            tags = extract_tag_details(tag_lines)
-
-            # Add measurements to DataFrame
-            for tag in tags:
-                tag_id = tag['Tag ID']
-                
-                # If this is a new tag, get its location
-                if tag_id not in tag_locations:
-                    print(f"\nNew Tag ID detected: {tag_id}")
-                    tag_x = get_valid_float(f"Please enter the Tag X position [m] for Tag {tag_id}: ")
-                    tag_y = get_valid_float(f"Please enter the Tag Y position [m] for Tag {tag_id}: ")
-                    tag_locations[tag_id] = (tag_x, tag_y)
-                
-                # Get tag location from dictionary
-                tag_x, tag_y = tag_locations[tag_id]
-                
-                tag_data = {
-                    'Tag ID': tag_id,
-                    'RSSI': tag['RSSI'],
-                    'Antenna': tag['Antenna'],
-                    'Antenna X [m]': antenna_x,
-                    'Antenna Y [m]': antenna_y,
-                    'Antenna Z [m]': antenna_z,
-                    'Antenna Rot Z [deg]': antenna_rot_z,
-                    'Distance [m]': distance,
-                    'Tag X [m]': tag_x,
-                    'Tag Y [m]': tag_y
-                }
-                df = df._append(tag_data, ignore_index=True)
-
-            print("\nCurrent measurements:")
-            print(pd.DataFrame([tag_data]))
-            print(f"\nTotal measurements recorded: {len(df)}")
-            print(f"Current distance from origin: {distance:.2f} meters")
-        
-        except Exception as e:
-            print(f"Error during measurement: {e}")
-            print("Continuing to next measurement...")
-            continue
+    # Dictionary to store tag locations, preloaded from the ground truth file if given
+    tag_locations = load_tag_locations(args.tags) if args.tags else {}
 
-        # Ask user to proceed to the next measurement
-        input("Press Enter to continue to the next measurement or Ctrl+C to stop.")
\ No newline at end of file
+    if args.poses:
+        run_planned(load_poses(args.poses), args.settle)
+        save_results()
+    elif args.pose_track:
+        # Replayed poses keep their relative timing, starting now
+        offset = time.time() - min(pose.timestamp for pose in recorded)
+        track = PoseTrack(pose._replace(timestamp=pose.timestamp + offset) for pose in recorded)
+        run_tracked(track, args.max_pose_gap, end_time=track.timestamps[-1] + args.max_pose_gap)
+        save_results()
+    elif args.pose_socket:
+        source = SocketPoseSource(args.pose_socket).start()
+        print(f"Listening for poses on {args.pose_socket}. Press Ctrl+C to stop.")
+        run_tracked(source.track, args.max_pose_gap)
+    else:
+        run_interactive()
@@ -0,0 +1,190 @@
+import argparse
+import struct
+import sys
+import time
+from tsl_reader import extract_tag_details, read_response
+
+# File header: magic and format version
+CAPTURE_MAGIC = b'TSLCAP\x00\x01'
+# Record header: timestamp [ns since epoch], direction, payload length
+RECORD_HEADER = struct.Struct('<qBI')
+HOST_TO_READER = 0
+READER_TO_HOST = 1
+
+class CaptureWriter:
+    """Append-only binary capture of the raw bytes exchanged with a reader."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(CAPTURE_MAGIC)
+        self.records = 0
+
+    def write(self, direction, payload, timestamp=None):
+        """Record `payload` sent in `direction` (HOST_TO_READER or READER_TO_HOST)."""
+        if timestamp is None:
+            timestamp = time.time_ns()
+        self.file.write(RECORD_HEADER.pack(timestamp, direction, len(payload)))
+        self.file.write(payload)
+        self.records += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RecordingSerial:
+    """
+    Wrapper around an open serial connection that records every write and read.
+
+    It can be passed anywhere a `serial.Serial` is expected; all other
+    attributes are forwarded to the wrapped connection.
+    """
+
+    def __init__(self, ser, writer):
+        self.ser = ser
+        self.writer = writer
+
+    def write(self, data):
+        self.writer.write(HOST_TO_READER, bytes(data))
+        return self.ser.write(data)
+
+    def read(self, size=1):
+        data = self.ser.read(size)
+        self.writer.write(READER_TO_HOST, data)
+        return data
+
+    def close(self):
+        self.ser.close()
+        self.writer.close()
+
+    def __getattr__(self, name):
+        return getattr(self.ser, name)
+
+def read_capture(path):
+    """Yield (timestamp [ns], direction, payload) for every record in a capture file."""
+    with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a TSL capture file")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break  # End of file, or a record cut short when the logger was killed
+            timestamp, direction, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                break
+            yield timestamp, direction, payload
+
+class ReplaySerial:
+    """
+    Stand-in for `serial.Serial` that answers reads with the responses of a capture.
+
+    Writes are accepted and ignored, so a logger or `inventory` can be run
+    against a capture exactly as it ran against the reader. Every recorded
+    chunk becomes available at its original time; reads return at most
+    `size` bytes of it, like a serial port.
+    """
+
+    def __init__(self, path, speed=None):
+        self.responses = [(timestamp, payload) for timestamp, direction, payload in read_capture(path)
+                          if direction == READER_TO_HOST]
+        self.speed = speed
+        self.index = 0
+        self.offset = 0
+        self.start = None
+
+    @property
+    def in_waiting(self):
+        """Bytes left of the current recorded chunk."""
+        if self.index >= len(self.responses):
+            return 0
+        return len(self.responses[self.index][1]) - self.offset
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, size=1):
+        if self.index >= len(self.responses):
+            return b''
+        timestamp, payload = self.responses[self.index]
+        if self.speed and self.offset == 0:
+            if self.start is None:
+                self.start = (time.time(), timestamp)
+            wait = (timestamp - self.start[1]) / 1e9 / self.speed - (time.time() - self.start[0])
+            if wait > 0:
+                time.sleep(wait)
+        data = payload[self.offset:self.offset + size]
+        self.offset += len(data)
+        if self.offset >= len(payload):
+            self.index += 1
+            self.offset = 0
+        return data
+
+    def close(self):
+        pass
+
+def replay(path, speed=None, parser=extract_tag_details):
+    """
+    Feed the reader responses of a capture through `parser`.
+
+    Args:
+    path (str): Capture file written by `CaptureWriter`.
+    speed (float): Replay speed relative to the original timing, or None for as fast as possible.
+    parser (callable): Response parser taking a list of lines.
+
+    Returns:
+    dict: Response, read and error counts and the parse throughput.
+    """
+    ser = ReplaySerial(path, speed)
+    responses = reads = errors = 0
+    parse_time = 0.0
+    start = time.perf_counter()
+    while ser.index < len(ser.responses):
+        try:
+            response = read_response(ser)
+        except Exception:
+            # The capture ends within a response (the logger was stopped)
+            errors += 1
+            break
+        responses += 1
+        parse_start = time.perf_counter()
+        try:
+            reads += len(parser(response.decode('utf-8', errors='replace').split('\n')))
+        except Exception:
+            errors += 1
+        parse_time += time.perf_counter() - parse_start
+    elapsed = time.perf_counter() - start
+    return {
+        'responses': responses,
+        'reads': reads,
+        'errors': errors,
+        'elapsed [s]': elapsed,
+        'parse time [s]': parse_time,
+        'reads/s': reads / parse_time if parse_time > 0 else float('nan')
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a raw reader capture through the response parser.')
+    parser.add_argument('capture', help='Capture file recorded with --capture')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='Replay speed relative to the original timing (default: as fast as possible)')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of replays')
+    args = parser.parse_args()
+
+    try:
+        for _ in range(args.repeat):
+            stats = replay(args.capture, args.speed)
+            print(', '.join(f'{key}: {value:.4g}' if isinstance(value, float) else f'{key}: {value}'
+                            for key, value in stats.items()))
+    except (OSError, ValueError) as e:
+        print(f"Error reading capture: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import serial
+import serial.tools.list_ports
+import time
+
+# Serial port configuration for an RFID reader
+tsl_name = 'TSL RAIN RFID MODULE'
+tsl_baudrate = 921600
+tsl_bytesize = 8
+tsl_parity = 'N'
+tsl_stopbits = 1
+tsl_timeout = 2
+
+# Largest response accepted for a single command; a response still without its terminating line is truncated
+RESPONSE_SIZE = 1 << 20
+# A response ends with its error code (or OK/ER) line
+TERMINATORS = (b'EC:', b'OK:', b'ER:')
+
+def find_port(portname):
+    """Scan for a COM port that includes the given port name and return its device name."""
+    ports = serial.tools.list_ports.comports()
+    for port in ports:
+        if portname in str(port.description):
+            print("Port found: " + port.device)
+            return port.device
+    raise Exception("Port not found. Check the connection.")
+
+def find_ports(portname):
+    """Scan for every COM port that includes the given port name and return their device names."""
+    devices = [port.device for port in serial.tools.list_ports.comports() if portname in str(port.description)]
+    if not devices:
+        raise Exception("Port not found. Check the connection.")
+    for device in devices:
+        print("Port found: " + device)
+    return devices
+
+def open_reader(port=None):
+    """Open the serial connection to a reader, looking it up by `tsl_name` when no port is given."""
+    if port is None:
+        port = find_port(tsl_name)
+    return serial.Serial(port, baudrate=tsl_baudrate, bytesize=tsl_bytesize,
+                         parity=tsl_parity, stopbits=tsl_stopbits, timeout=tsl_timeout)
+
+def calculate_checksum(command):
+    """Calculate Fletcher-16 checksum for a command."""
+    c0, c1 = 0, 0
+    for char in command:
+        c0 = (c0 + char) % 255
+        c1 = (c1 + c0) % 255
+    checksum = (c1 << 8) | c0
+    return checksum.to_bytes(2, byteorder='big')
+
+def response_complete(response):
+    """Whether a response ends with its terminating line (`EC:`, `OK:` or `ER:`)."""
+    if not response.endswith(b'\n'):
+        return False
+    last_line = response[response.rfind(b'\n', 0, len(response) - 1) + 1:]
+    return last_line.lstrip().startswith(TERMINATORS)
+
+def read_response(ser, max_size=RESPONSE_SIZE):
+    """
+    Read the response to a command, up to and including its terminating line.
+
+    Whatever has arrived is read at once (`in_waiting`), so a response is
+    returned as soon as it is complete instead of when the serial timeout
+    expires.
+
+    Raises:
+    Exception: If the reader stops sending (serial timeout) or `max_size` bytes arrive before the terminating line.
+    """
+    response = bytearray()
+    while not response_complete(response):
+        if len(response) >= max_size:
+            raise Exception(f"Truncated response: no terminating line within {max_size} bytes")
+        waiting = getattr(ser, 'in_waiting', 0) or 0
+        chunk = ser.read(max(1, min(waiting, max_size - len(response))))
+        if not chunk:
+            raise Exception(f"Incomplete response: timed out after {len(response)} bytes")
+        response += chunk
+    return bytes(response)
+
+def send_command(ser, command):
+    """Send a command with an appended checksum to the RFID device and read its response."""
+    command_with_checksum = command + calculate_checksum(command)
+    ser.write(command_with_checksum + b'\x0A')  # End command with line feed
+    return read_response(ser).decode('utf-8')
+
+def init(ser, antenna_number, power, delay=1):
+    """
+    Set the antenna number and power level on the RFID reader.
+
+    Args:
+    ser (serial.Serial): Open connection to the reader.
+    antenna_number (int): The antenna port to set (1-4).
+    power (int): The power level to set (0-3000).
+    delay (float): Seconds to wait for the reader to process the command.
+
+    Raises:
+    Exception: If setting the antenna fails.
+    """
+    inventory_command = f'$ir -bnx0 -sex0 -tax0 -slx0 -dtx1 -anx{antenna_number} -dbx{hex(power)[2:]} -trxFFFF'
+    print(inventory_command)
+    lines = send_command(ser, inventory_command.encode()).split('\n')
+    time.sleep(delay)  # Delay for command processing
+    for line in lines:
+        if line.startswith('EC:'):
+            error_code = line.split(': ', 1)[1].strip()
+            if error_code != '0':
+                raise Exception(f"Antenna setting to {antenna_number} failed. EC: {error_code}")
+            else:
+                print(f"Antenna set to {antenna_number}")
+
+def extract_tag_details(lines):
+    """
+    Extract tag details from response lines.
+
+    RSSI is returned in dBm (the reader reports hundredths of a dBm) and the
+    phase as the raw hexadecimal string, or 'Unknown' when the reader did not
+    report it.
+    """
+    tags = []
+    current_antenna = 'Unknown'
+    for line in lines:
+        line = line.strip()
+        if line.startswith('BH:'):
+            bh_details = line.split(': ', 1)[1].split(',')
+            bank_header = {part.split('=')[0].strip(): part.split('=')[1].strip() for part in bh_details if '=' in part}
+            current_antenna = bank_header.get('A', 'Unknown')
+        elif line.startswith('TR:'):
+            tag_details = line.split(' | ')
+            tag_info = {detail.split(': ', 1)[0].strip(): detail.split(': ', 1)[1].strip() for detail in tag_details if ': ' in detail}
+            # Convert RSSI to float and divide by 100
+            rssi = float(tag_info.get('RI', '0')) / 100
+            tags.append({
+                'Tag ID': tag_info.get('EP', 'Unknown'),
+                'RSSI': rssi,
+                'Phase': tag_info.get('PH', 'Unknown'),
+                'Antenna': current_antenna
+            })
+        elif line.startswith('EC:'):
+            error_code = line.split(': ', 1)[1]
+            if error_code == str(10):
+                raise Exception(f"Disconnected, poorly-connected or mismatched impedance of the antenna")
+            elif error_code != str(0):
+                raise Exception(f"EC: {error_code}")
+    return tags
+
+def inventory(ser):
+    """Run a single inventory round and return the tags that were read."""
+    tag_data = send_command(ser, '$ba -go'.encode())
+    return extract_tag_details(tag_data.split('\n'))
@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+# Band half-widths come from the error model stage's noise model artifact
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4-error-model'))
+from noise_model import load_noise_model
+
+# -------------------
+# Constants
+# -------------------
+ATLAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pattern_atlas.npz')
+ATLAS_VERSION = 1
+RSSI_STEP = 0.25  # Level spacing of the atlas [dB]
+RSSI_RANGE = (-100.0, -20.0)  # First and last atlas level [dBm]
+ANGLE_STEP = 1.0  # Azimuth spacing of the contours [deg]
+DISTANCE_RANGE = (-0.95, 5.0)  # rssi_distance is monotonic here; fsolve roots outside are not stored [m]
+NEWTON_ITERATIONS = 6
+
+# One antenna pattern: RSSI = distance polynomial (coefficients from d**0 up) + azimuth polynomial
+# (coefficients from phi**0 up). With normalize_peak the azimuth loss is taken relative to its maximum,
+# as in the visualization scripts; without it the azimuth polynomial is the loss, as in localization.
+# band is True for band tables with the half-width of get_rms_rssi, from the noise model artifact of the error
+# model stage (loaded when a band is first built), or None for no band tables.
+PatternModel = namedtuple('PatternModel', ['distance', 'angle', 'max_angle', 'normalize_peak', 'band'])
+
+DISTANCE_COEFFICIENTS = (-30.625214, -66.049565, 47.932897, 6.934334, -23.319914, 9.552617, -1.222853)
+LOCALIZATION_MODEL = PatternModel(DISTANCE_COEFFICIENTS, (0.0, 0.038186, -0.003704), 90, False, True)
+VISUALIZATION_MODEL = PatternModel(DISTANCE_COEFFICIENTS, (-58.322821, 0.038186, -0.003704), 90, True, None)
+# antenna-pattern-unique-rssi.py and antenna-uncertainty-alpha.py use a slightly different distance fit
+UNIQUE_RSSI_MODEL = PatternModel((-30.625158, -66.050159, 47.934702, 6.931994, -23.318448, 9.552179, -1.222803),
+                                 (-58.322821, 0.038186, -0.003704), 90, True, None)
+
+def model_hash(model):
+    """Short hash identifying the model (and atlas layout) in the atlas file."""
+    layout = {'version': ATLAS_VERSION, 'step': RSSI_STEP, 'range': RSSI_RANGE, 'angle_step': ANGLE_STEP}
+    fields = model._asdict()
+    if model.band:
+        # The band tables follow the noise model: a new artifact gets an atlas entry of its own
+        noise_model = load_noise_model()
+        fields['band'] = (noise_model.form, noise_model.params, tuple(noise_model.margins.items()))
+    text = json.dumps({'model': fields, 'layout': layout}, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+def polynomial(coefficients, x):
+    """Polynomial with coefficients from x**0 up, evaluated with Horner's scheme."""
+    result = np.zeros_like(np.asarray(x, dtype=float))
+    for coefficient in reversed(coefficients):
+        result = result * x + coefficient
+    return result
+
+def polynomial_deriv(coefficients, x):
+    """Derivative of `polynomial`."""
+    return polynomial([i * c for i, c in enumerate(coefficients)][1:], x)
+
+def rssi_distance(d, model=LOCALIZATION_MODEL):
+    """Calculate RSSI based on distance using the model's 6th order polynomial fit."""
+    return polynomial(model.distance, d)
+
+def rssi_angle(phi, model=LOCALIZATION_MODEL):
+    """Calculate RSSI based on angle using the model's azimuth polynomial."""
+    return polynomial(model.angle, phi)
+
+def solve_distances(model, rssi):
+    """
+    Distances at which rssi_distance equals `rssi`, for any array of RSSI values at once.
+
+    The roots are bracketed by interpolating a dense sample of the
+    monotonic distance polynomial and polished with Newton steps; they match
+    fsolve. RSSI values without a root in DISTANCE_RANGE give NaN.
+    """
+    rssi = np.asarray(rssi, dtype=float)
+    samples = np.linspace(*DISTANCE_RANGE, 2001)
+    values = polynomial(model.distance, samples)
+    # The polynomial falls with distance; np.interp needs increasing sample points
+    d = np.interp(rssi, values[::-1], samples[::-1], left=np.nan, right=np.nan)
+    for _ in range(NEWTON_ITERATIONS):
+        d = d - (polynomial(model.distance, d) - rssi) / polynomial_deriv(model.distance, d)
+    return d
+
+def azimuth_loss(model, angles):
+    """Signal loss [dB] at each azimuth, added to the received RSSI before solving for the distance."""
+    rssi_phi = polynomial(model.angle, angles)
+    return np.max(rssi_phi) - rssi_phi if model.normalize_peak else -rssi_phi
+
+def band_half_width(model, rssi):
+    """Band half-width (get_rms_rssi) [dB], from the noise model artifact."""
+    return load_noise_model().half_width(rssi)
+
+def contour_distances(model, levels, angles):
+    """
+    Contour distances of every RSSI level at every azimuth in one vectorized pass, as a (levels, angles) array.
+
+    The azimuth loss is broadcast over the levels and the whole matrix is
+    solved at once by `solve_distances`.
+    """
+    levels = np.atleast_1d(np.asarray(levels, dtype=float))
+    return solve_distances(model, levels[:, None] + azimuth_loss(model, np.asarray(angles, dtype=float))[None, :])
+
+def contour_points(distances, angles):
+    """(levels, angles, 2) array of the antenna-frame x, y of contour distances (antenna facing +Y)."""
+    angles_rad = np.radians(np.asarray(angles, dtype=float))
+    return np.stack((distances * np.sin(angles_rad), distances * np.cos(angles_rad)), axis=-1)
+
+def contour_family(model, levels, angles):
+    """
+    All contours of a model as one (levels, angles, 2) array of antenna-frame points, without an atlas.
+
+    Takes milliseconds for a full family, so model variants (e.g. other
+    coefficients in a PatternModel) can be swept interactively.
+    """
+    return contour_points(contour_distances(model, levels, angles), angles)
+
+# -------------------
+# Atlas
+# -------------------
+class PatternAtlas:
+    """
+    Antenna-local contours of one pattern model on a dense RSSI grid.
+
+    distance[i, j] is the distance of the contour of level levels[i] at
+    azimuth angles[j]; slope[i, j] its derivative with respect to the RSSI,
+    so contours between levels are cubic Hermite interpolations. With a band
+    model the upper (near) and lower (far) band edges of every level are
+    stored as well. Contours are polylines (d*sin(phi), d*cos(phi)) in the
+    antenna frame, facing +Y (`polylines`).
+    """
+
+    def __init__(self, model, levels, angles, distance, slope, band_upper=None, band_lower=None):
+        self.model = model
+        self.levels = levels
+        self.angles = angles
+        self.distance = distance
+        self.slope = slope
+        self.band_upper = band_upper
+        self.band_lower = band_lower
+
+    @classmethod
+    def build(cls, model):
+        """Solve every (level, azimuth) contour point of the model."""
+        levels = np.arange(RSSI_RANGE[0], RSSI_RANGE[1] + RSSI_STEP / 2, RSSI_STEP)
+        angles = np.arange(-model.max_angle, model.max_angle + ANGLE_STEP / 2, ANGLE_STEP)
+        distance = contour_distances(model, levels, angles)
+        slope = 1.0 / polynomial_deriv(model.distance, distance)
+        band_upper = band_lower = None
+        if model.band:
+            width = band_half_width(model, levels)
+            band_upper = contour_distances(model, levels + width, angles)
+            band_lower = contour_distances(model, levels - width, angles)
+        return cls(model, levels, angles, distance, slope, band_upper, band_lower)
+
+    def arrays(self):
+        """Arrays to store, by name."""
+        arrays = {'levels': self.levels, 'angles': self.angles, 'distance': self.distance, 'slope': self.slope}
+        if self.band_upper is not None:
+            arrays.update(band_upper=self.band_upper, band_lower=self.band_lower)
+        return arrays
+
+    def contours(self, levels, angles=None):
+        """
+        Contour distances of many RSSI levels at once, as a (levels, angles) array.
+
+        Levels are interpolated with cubic Hermite splines, all in one
+        vectorized pass. Levels outside the atlas, and azimuths between its
+        grid points, are solved directly instead (batched as well).
+        """
+        levels = np.atleast_1d(np.asarray(levels, dtype=float))
+        if angles is not None and not self._on_grid(angles):
+            return contour_distances(self.model, levels, angles)
+        inside = (levels >= self.levels[0]) & (levels <= self.levels[-1])
+        position = np.clip((levels[inside] - self.levels[0]) / RSSI_STEP, 0, len(self.levels) - 1 - 1e-9)
+        low = position.astype(int)
+        t = (position - low)[:, None]
+        h00 = 2 * t**3 - 3 * t**2 + 1
+        h10 = t**3 - 2 * t**2 + t
+        h01 = -2 * t**3 + 3 * t**2
+        h11 = t**3 - t**2
+        distance = np.empty((len(levels), len(self.angles)))
+        distance[inside] = (h00 * self.distance[low] + h10 * RSSI_STEP * self.slope[low] +
+                            h01 * self.distance[low + 1] + h11 * RSSI_STEP * self.slope[low + 1])
+        if not inside.all():
+            distance[~inside] = contour_distances(self.model, levels[~inside], self.angles)
+        return distance if angles is None else distance[:, self._angle_index(angles)]
+
+    def contour(self, rssi, angles=None):
+        """Contour distances of one RSSI value at `angles` (default: the atlas azimuths)."""
+        return self.contours([rssi], angles)[0]
+
+    def varying_contours(self, levels, angles=None):
+        """
+        Contour distances of curves whose level changes along the azimuths, as a (curves, angles) array.
+
+        levels[i, j] is the level of curve i at azimuth angles[j] (e.g. a
+        band edge whose width depends on the position). Every element is
+        interpolated at its own level as in `contours`; levels outside the
+        atlas, and azimuths between its grid points, are solved instead.
+        """
+        levels = np.atleast_2d(np.asarray(levels, dtype=float))
+        if angles is not None and not self._on_grid(angles):
+            return solve_distances(self.model, levels + azimuth_loss(self.model, np.asarray(angles, dtype=float)))
+        columns = np.arange(len(self.angles)) if angles is None else self._angle_index(angles)
+        inside = (levels >= self.levels[0]) & (levels <= self.levels[-1])
+        position = np.clip((levels - self.levels[0]) / RSSI_STEP, 0, len(self.levels) - 1 - 1e-9)
+        low = position.astype(int)
+        t = position - low
+        h00 = 2 * t**3 - 3 * t**2 + 1
+        h10 = t**3 - 2 * t**2 + t
+        h01 = -2 * t**3 + 3 * t**2
+        h11 = t**3 - t**2
+        distance = (h00 * self.distance[low, columns] + h10 * RSSI_STEP * self.slope[low, columns] +
+                    h01 * self.distance[low + 1, columns] + h11 * RSSI_STEP * self.slope[low + 1, columns])
+        if not inside.all():
+            loss = np.broadcast_to(azimuth_loss(self.model, self.angles[columns]), levels.shape)
+            distance[~inside] = solve_distances(self.model, levels[~inside] + loss[~inside])
+        return distance
+
+    def band(self, rssi):
+        """Upper (near) and lower (far) band edge distances of a level, solved if it is not an atlas level."""
+        index = (rssi - self.levels[0]) / RSSI_STEP
+        if self.band_upper is not None and index == int(index) and 0 <= index < len(self.levels):
+            return self.band_upper[int(index)], self.band_lower[int(index)]
+        width = band_half_width(self.model, rssi)
+        upper, lower = self.contours([rssi + width, rssi - width])
+        return upper, lower
+
+    def polylines(self, distances, angles=None):
+        """Antenna-frame contours of a (levels, angles) distance array, as one (levels, angles, 2) array of x, y."""
+        return contour_points(distances, self.angles if angles is None else angles)
+
+    def _angle_index(self, angles):
+        return np.round((np.asarray(angles, dtype=float) - self.angles[0]) / ANGLE_STEP).astype(int)
+
+    def _on_grid(self, angles):
+        index = self._angle_index(angles)
+        return (np.all(index >= 0) and np.all(index < len(self.angles)) and
+                np.allclose(self.angles[np.clip(index, 0, len(self.angles) - 1)], angles))
+
+def save_atlas(atlas, path=ATLAS_PATH):
+    """
+    Add or replace the model's arrays in the atlas file, keeping the other models.
+
+    The file is written to a temporary file of its own next to the atlas and
+    moved into place, so processes storing an atlas at the same time never
+    read or replace each other's half-written files. An unreadable atlas
+    file is replaced.
+    """
+    key = model_hash(atlas.model)
+    arrays = {}
+    try:
+        with np.load(path) as stored:
+            arrays = {name: stored[name] for name in stored.files if not name.startswith(key + '_')}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        pass
+    arrays.update({f'{key}_{name}': values for name, values in atlas.arrays().items()})
+    directory, name = os.path.split(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=name + '.', suffix='.tmp', delete=False) as f:
+        temp_path = f.name
+        try:
+            np.savez(f, **arrays)
+        except BaseException:
+            f.close()
+            os.remove(temp_path)
+            raise
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+
+@lru_cache(maxsize=None)
+def load_atlas(model=LOCALIZATION_MODEL, path=ATLAS_PATH):
+    """
+    Atlas of a model from the atlas file, built and stored first if the file has no entry for its hash.
+
+    Loaded once per process; call at startup so the contours are ready
+    before the first lookup.
+    """
+    key = model_hash(model)
+    try:
+        with np.load(path) as stored:
+            if f'{key}_distance' in stored.files:
+                arrays = {name[len(key) + 1:]: stored[name] for name in stored.files if name.startswith(key + '_')}
+                return PatternAtlas(model, **arrays)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        pass
+    atlas = PatternAtlas.build(model)
+    try:
+        save_atlas(atlas, path)
+    except OSError as e:
+        print(f"Could not store the pattern atlas: {e}")
+    return atlas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the antenna pattern atlas shared by visualization and localization.')
+    parser.add_argument('--path', default=ATLAS_PATH, help='Atlas file')
+    args = parser.parse_args()
+    for name, model in [('localization', LOCALIZATION_MODEL), ('visualization', VISUALIZATION_MODEL),
+                        ('unique RSSI', UNIQUE_RSSI_MODEL)]:
+        atlas = PatternAtlas.build(model)
+        save_atlas(atlas, args.path)
+        print(f"{name}: model {model_hash(model)}, {len(atlas.levels)} levels x {len(atlas.angles)} azimuths")
+    print(f"Atlas written to {args.path}")
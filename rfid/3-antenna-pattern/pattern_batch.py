@@ -0,0 +1,151 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# -------------------
+# Constants
+# -------------------
+FIGURES = {
+    # Figure name: (function in pattern_figures, parameters in call order)
+    'uncertainty': ('uncertainty_figure', ('rssi', 'alpha')),
+    'intersecting': ('intersecting_figure', ('angle',)),
+    'unique-rssi': ('unique_rssi_figure', ('rssi',)),
+}
+DEFAULT_OUT = 'pattern-figures'
+DEFAULT_DPI = 100
+
+def parse_values(text):
+    """
+    Values of a parameter: "a,b,c", "start:stop:step" (stop included) or a mix, e.g. "-70:-40:5,-42.5".
+
+    Lists from a config file are taken as they are.
+    """
+    if isinstance(text, (list, tuple)):
+        return [float(value) for value in text]
+    if isinstance(text, (int, float)):
+        return [float(text)]
+    values = []
+    for part in str(text).split(','):
+        if ':' in part:
+            start, stop, step = (float(value) for value in part.split(':'))
+            count = int(np.floor(round((stop - start) / step, 9))) + 1
+            values.extend(float(start + i * step) for i in range(max(count, 0)))
+        elif part.strip():
+            values.append(float(part))
+    return values
+
+def expand_jobs(figure, values):
+    """One job per combination of the parameter values of a figure: (figure, {parameter: value})."""
+    _, parameters = FIGURES[figure]
+    missing = [name for name in parameters if not values.get(name)]
+    if missing:
+        raise ValueError(f"Figure '{figure}' needs values for: {', '.join(missing)}")
+    lists = [parse_values(values[name]) for name in parameters]
+    return [(figure, dict(zip(parameters, combination))) for combination in itertools.product(*lists)]
+
+def job_name(figure, parameters):
+    """File name (without extension) of a job, e.g. uncertainty_rssi-50_alpha30."""
+    return '_'.join([figure] + [f'{name}{value:g}' for name, value in parameters.items()])
+
+def load_figure_atlases():
+    """Load the atlases of the figure models, building and storing them if the atlas file has none yet."""
+    from pattern_atlas import UNIQUE_RSSI_MODEL, VISUALIZATION_MODEL, load_atlas
+    load_atlas(VISUALIZATION_MODEL)
+    load_atlas(UNIQUE_RSSI_MODEL)
+
+def init_worker():
+    """Worker initializer: render off-screen and load the pattern atlas once per process."""
+    import matplotlib
+    matplotlib.use('Agg')
+    load_figure_atlases()
+
+def render_job(job, out_dir, dpi=DEFAULT_DPI, image_format='png'):
+    """Draw one figure and write its image and contour table (CSV, ';'-separated); returns the job's index row."""
+    import matplotlib.pyplot as plt
+    import pattern_figures
+    figure, parameters = job
+    function_name, order = FIGURES[figure]
+    fig, table = getattr(pattern_figures, function_name)(*(parameters[name] for name in order))
+    name = job_name(figure, parameters)
+    image_path = os.path.join(out_dir, f'{name}.{image_format}')
+    data_path = os.path.join(out_dir, f'{name}.csv')
+    fig.savefig(image_path, dpi=dpi)
+    plt.close(fig)
+    table.to_csv(data_path, sep=';', index=False)
+    return {'Figure': figure, **parameters, 'Image': os.path.basename(image_path), 'Data': os.path.basename(data_path)}
+
+def run_batch(jobs, out_dir=DEFAULT_OUT, workers=None, dpi=DEFAULT_DPI, image_format='png'):
+    """
+    Render all jobs in a process pool and write index.csv listing every job and its files.
+
+    Returns:
+    pd.DataFrame: The index.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    # Build the atlases once here, so the workers only load them
+    load_figure_atlases()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        rows = list(pool.map(render_job, jobs, itertools.repeat(out_dir), itertools.repeat(dpi),
+                             itertools.repeat(image_format), chunksize=chunksize))
+    parameters = [name for name in ('rssi', 'alpha', 'angle') if any(name in row for row in rows)]
+    index = pd.DataFrame(rows, columns=['Figure'] + parameters + ['Image', 'Data'])
+    index.to_csv(os.path.join(out_dir, 'index.csv'), sep=';', index=False)
+    return index
+
+def load_config(path):
+    """
+    Jobs from a JSON config file, e.g.
+        {"out": "report-figures", "dpi": 100,
+         "jobs": [{"figure": "uncertainty", "rssi": "-70:-40:2.5", "alpha": [30, 45, 60]},
+                  {"figure": "intersecting", "angle": "10:90:10"}]}
+
+    Returns:
+    tuple: (jobs, settings) with the optional 'out', 'workers', 'dpi' and 'format' of the file.
+    """
+    with open(path, 'r') as f:
+        config = json.load(f)
+    jobs = []
+    for entry in config.get('jobs', []):
+        values = {name: value for name, value in entry.items() if name != 'figure'}
+        jobs.extend(expand_jobs(entry['figure'], values))
+    settings = {name: config[name] for name in ('out', 'workers', 'dpi', 'format') if name in config}
+    return jobs, settings
+
+def main():
+    parser = argparse.ArgumentParser(description='Render antenna pattern figures and their contour data without user input.')
+    parser.add_argument('figure', nargs='?', choices=sorted(FIGURES), help='Figure to render for every combination of values')
+    parser.add_argument('--rssi', help='RSSI values [dBm], e.g. "-70:-40:2.5" or "-60,-50"')
+    parser.add_argument('--alpha', help='Alpha values [deg] of the uncertainty figure')
+    parser.add_argument('--angle', help='Angle ranges [deg] of the intersecting figure')
+    parser.add_argument('--config', help='JSON file with the jobs (see load_config); combined with the figure arguments')
+    parser.add_argument('--out', help=f'Output directory (default: {DEFAULT_OUT})')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--dpi', type=int, help=f'Image resolution (default: {DEFAULT_DPI})')
+    parser.add_argument('--format', help='Image format, e.g. png, svg or pdf (default: png)')
+    args = parser.parse_args()
+
+    try:
+        jobs, settings = load_config(args.config) if args.config else ([], {})
+        if args.figure:
+            jobs.extend(expand_jobs(args.figure, {'rssi': args.rssi, 'alpha': args.alpha, 'angle': args.angle}))
+    except ValueError as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error('Nothing to render: give a figure with its values or --config')
+    out_dir = args.out or settings.get('out', DEFAULT_OUT)
+    workers = args.workers or settings.get('workers')
+    dpi = args.dpi or settings.get('dpi', DEFAULT_DPI)
+    image_format = args.format or settings.get('format', 'png')
+
+    start = time.perf_counter()
+    index = run_batch(jobs, out_dir, workers, dpi, image_format)
+    print(f"{len(index)} figures written to {out_dir} in {time.perf_counter() - start:.1f} s (index.csv lists them)")
+
+if __name__ == "__main__":
+    main()
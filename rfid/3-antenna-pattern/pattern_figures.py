@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.patches import Polygon
+from pattern_atlas import UNIQUE_RSSI_MODEL, VISUALIZATION_MODEL, load_atlas
+from noise_model import load_noise_model
+
+# -------------------
+# Constants
+# -------------------
+INTERSECTING_RSSI = np.arange(-40, -71, -2.5)  # Levels of the intersecting pattern figure [dBm]
+FIGURE_MARGIN = 1.0  # Extra margin of the uncertainty figure on top of the localization band [dB]
+UNIQUE_ANGLES = np.linspace(-60, 60, 121)  # Azimuths of the single RSSI figure [deg]
+
+# Figures of the pattern scripts, without user input, so the interactive scripts and the batch CLI
+# (pattern_batch.py) draw the same figures. Every function returns the figure and its contours as a table.
+
+def uncertainty_rms(rssi_received):
+    """RMS-RSSI band half-width of the uncertainty figure: the localization band (noise model) plus FIGURE_MARGIN [dB]."""
+    return load_noise_model().half_width(rssi_received) + FIGURE_MARGIN
+
+def contour_table(names, levels, angles, contours):
+    """
+    Contours as a table with one row per point.
+
+    Args:
+    names (list): Name of every curve.
+    levels (list): RSSI of every curve [dBm].
+    angles (np.ndarray): Azimuths [deg], shared by all curves.
+    contours (np.ndarray): (curves, angles, 2) antenna-frame x, y.
+    """
+    return pd.DataFrame({
+        'Curve': np.repeat(names, len(angles)),
+        'RSSI [dBm]': np.repeat(levels, len(angles)),
+        'Angle [deg]': np.tile(angles, len(names)),
+        'Distance [m]': np.hypot(contours[:, :, 0], contours[:, :, 1]).ravel(),
+        'X [m]': contours[:, :, 0].ravel(),
+        'Y [m]': contours[:, :, 1].ravel()
+    })
+
+def unique_rssi_figure(rssi_received):
+    """Signal path of a single RSSI value over +-60 deg (antenna-pattern-unique-rssi.py)."""
+    atlas = load_atlas(UNIQUE_RSSI_MODEL)
+    angles = UNIQUE_ANGLES
+    contours = atlas.polylines(atlas.contours([rssi_received], angles), angles)
+    x, y = contours[0, :, 0], contours[0, :, 1]
+    fig = plt.figure(figsize=(10, 10))
+    plt.plot(x, y, 'b-', label='Signal Path')
+    plt.plot(0, 0, 'ro', label='Transmitter')
+    plt.grid(True)
+    plt.axis('equal')
+    plt.xlabel('X Distance (meters)')
+    plt.ylabel('Y Distance (meters)')
+    plt.title('Signal Path Visualization')
+    plt.legend()
+    return fig, contour_table(['Signal Path'], [rssi_received], angles, contours)
+
+def intersecting_figure(angle, rssi_values=INTERSECTING_RSSI):
+    """Curves of several RSSI values within +-`angle` deg (antenna-pattern-intersecting.py)."""
+    atlas = load_atlas(VISUALIZATION_MODEL)
+    angles = np.linspace(-angle, angle, int(angle * 2 + 1))
+    fig = plt.figure(figsize=(12, 12))
+
+    # Contours of all RSSI values at once, as (RSSI value, angle, x/y)
+    contours = atlas.polylines(atlas.contours(rssi_values, angles), angles)
+    for rssi_received, contour in zip(rssi_values, contours):
+        plt.plot(contour[:, 0], contour[:, 1], label=f'RSSI = {rssi_received} dBm')
+    max_x = np.max(np.abs(contours[:, :, 0]))
+    max_y = np.max(np.abs(contours[:, :, 1]))
+    plt.plot(0, 0, 'ko', label='Transmitter', markersize=10)
+
+    # ±angle lines (more subtle)
+    max_dist = max(max_x, max_y) * 1.1  # Add 10% margin
+    x_angle = np.array([-max_dist, max_dist])
+    y_angle = x_angle / np.tan(np.radians(angle))
+    y_minus_angle = -x_angle / np.tan(np.radians(angle))
+    plt.plot(x_angle, y_angle, '--', color='gray', alpha=0.5, label=f'{angle}° reference')
+    plt.plot(x_angle, y_minus_angle, '--', color='gray', alpha=0.5, label=f'-{angle}° reference')
+
+    plt.grid(True, which='both', linestyle='--', alpha=0.7)
+    plt.minorticks_on()
+    plt.grid(True, which='minor', linestyle=':', alpha=0.3)
+    plt.xlim(-3.5, 3.5)
+    plt.ylim(-1, 4)
+    plt.xlabel('X Distance (meters)')
+    plt.ylabel('Y Distance (meters)')
+    plt.title(f'Signal Path Visualization for Different RSSI Values (±{angle}° range)')
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+    names = [f'RSSI = {rssi_received} dBm' for rssi_received in rssi_values]
+    return fig, contour_table(names, rssi_values, angles, contours)
+
+def uncertainty_figure(rssi_received, alpha):
+    """Upper, lower and nominal curve of an RSSI value within +-`alpha` deg and the band between them (antenna-uncertainty-alpha.py)."""
+    atlas = load_atlas(UNIQUE_RSSI_MODEL)
+    rms_rssi = uncertainty_rms(rssi_received)
+    upper_rssi = rssi_received + rms_rssi
+    lower_rssi = rssi_received - rms_rssi
+    angles = np.linspace(-alpha, alpha, int(alpha * 2 + 1))
+    fig = plt.figure(figsize=(12, 12))
+
+    # Upper, lower and nominal contours in one lookup, as (curve, angle, x/y)
+    contours = atlas.polylines(atlas.contours([upper_rssi, lower_rssi, rssi_received], angles), angles)
+    (x_upper, y_upper), (x_lower, y_lower), (x_nominal, y_nominal) = np.moveaxis(contours, -1, 1)
+    plt.plot(x_upper, y_upper, '-', label=f'Upper (RSSI + RMS)')
+    plt.plot(x_lower, y_lower, '-', label=f'Lower (RSSI - RMS)')
+    plt.plot(x_nominal, y_nominal, '--', label=f'Nominal RSSI')
+    plt.plot(0, 0, 'ko', label='Transmitter', markersize=10)
+
+    # ±alpha lines
+    max_dist = max(max(abs(x_upper)), max(abs(y_upper))) * 1.1
+    x_alpha = np.array([-max_dist, max_dist])
+    y_alpha = x_alpha / np.tan(np.radians(alpha))
+    y_minus_alpha = -x_alpha / np.tan(np.radians(alpha))
+    plt.plot(x_alpha, y_alpha, '--', color='gray', alpha=0.5, label=f'{alpha}° reference')
+    plt.plot(x_alpha, y_minus_alpha, '--', color='gray', alpha=0.5, label=f'-{alpha}° reference')
+
+    # Intersection area between the upper and lower curve, hatched
+    polygon_points = np.column_stack((
+        np.concatenate([x_upper, x_lower[::-1]]),
+        np.concatenate([y_upper, y_lower[::-1]])
+    ))
+    polygon = Polygon(polygon_points, facecolor='lightblue', edgecolor='none',
+                      hatch='//////', alpha=0.3, label='Intersection Area')
+    plt.gca().add_patch(polygon)
+
+    plt.grid(True, which='both', linestyle='--', alpha=0.7)
+    plt.minorticks_on()
+    plt.grid(True, which='minor', linestyle=':', alpha=0.3)
+
+    # Axis limits from the curve bounds with 10% padding, including the origin
+    x_min = min(min(x_upper), min(x_lower), min(x_nominal))
+    x_max = max(max(x_upper), max(x_lower), max(x_nominal))
+    y_min = min(min(y_upper), min(y_lower), min(y_nominal))
+    y_max = max(max(y_upper), max(y_lower), max(y_nominal))
+    x_padding = (x_max - x_min) * 0.1
+    y_padding = (y_max - y_min) * 0.1
+    plt.xlim(min(x_min - x_padding, 0), max(x_max + x_padding, 0))
+    plt.ylim(min(y_min - y_padding, 0), max(y_max + y_padding, 0))
+
+    plt.xlabel('X Distance (meters)')
+    plt.ylabel('Y Distance (meters)')
+    plt.title(f'Signal Path Visualization with RSSI = {rssi_received} dBm (±{rms_rssi} dBm RMS)')
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+    return fig, contour_table(['Upper', 'Lower', 'Nominal'], [upper_rssi, lower_rssi, rssi_received], angles, contours)
@@ -0,0 +1,115 @@
+import argparse
+import time
+from functools import lru_cache
+import numpy as np
+from contourpy import LineType, contour_generator
+from pattern_atlas import (DISTANCE_RANGE, LOCALIZATION_MODEL, azimuth_loss, band_half_width, contour_distances,
+                           polynomial)
+
+# -------------------
+# Constants
+# -------------------
+RADIUS_STEP = 0.005  # Range spacing of the raster [m]
+RASTER_ANGLE_STEP = 1.0  # Azimuth spacing of the raster [deg]
+
+# -------------------
+# Raster
+# -------------------
+class PatternRaster:
+    """
+    Predicted RSSI field of one pattern model on a polar (range, azimuth) raster in the antenna frame.
+
+    field[i, j] is rssi_distance(radii[i]) - azimuth_loss(angles[j]), the
+    RSSI of a tag at that range and azimuth. Iso-RSSI contours are extracted
+    from the field with marching squares (contourpy), so no root is solved:
+    every level is a lookup in the same raster, and a level that crosses the
+    field more than once returns every branch instead of whichever root a
+    solver happens to converge to. The raster is polar so the contours end
+    exactly on the +-max_angle rays, as the solved contours do.
+    """
+
+    def __init__(self, model, radii, angles, field):
+        self.model = model
+        self.radii = radii
+        self.angles = angles
+        self.field = field
+        self.generator = contour_generator(x=angles, y=radii, z=field, line_type=LineType.Separate)
+
+    @classmethod
+    def build(cls, model, radius_step=RADIUS_STEP, angle_step=RASTER_ANGLE_STEP):
+        """Evaluate the field once on the raster, from the antenna out to the end of the monotonic distance range."""
+        radii = np.arange(0.0, DISTANCE_RANGE[1] + radius_step / 2, radius_step)
+        angles = np.arange(-model.max_angle, model.max_angle + angle_step / 2, angle_step)
+        field = polynomial(model.distance, radii)[:, None] - azimuth_loss(model, angles)[None, :]
+        return cls(model, radii, angles, field)
+
+    def rssi(self, x, y):
+        """Predicted RSSI at antenna-frame points (bilinear in the raster; NaN outside it)."""
+        r = np.hypot(x, y)
+        phi = np.degrees(np.arctan2(x, y))
+        i = (r - self.radii[0]) / (self.radii[1] - self.radii[0])
+        j = (phi - self.angles[0]) / (self.angles[1] - self.angles[0])
+        inside = (i >= 0) & (i <= len(self.radii) - 1) & (j >= 0) & (j <= len(self.angles) - 1)
+        i0 = np.clip(np.floor(i).astype(int), 0, len(self.radii) - 2)
+        j0 = np.clip(np.floor(j).astype(int), 0, len(self.angles) - 2)
+        ti, tj = i - i0, j - j0
+        value = (self.field[i0, j0] * (1 - ti) * (1 - tj) + self.field[i0 + 1, j0] * ti * (1 - tj) +
+                 self.field[i0, j0 + 1] * (1 - ti) * tj + self.field[i0 + 1, j0 + 1] * ti * tj)
+        return np.where(inside, value, np.nan)
+
+    def branches(self, rssi):
+        """Every contour line of a level, as (n, 2) arrays of (azimuth [deg], range [m])."""
+        return self.generator.lines(rssi)
+
+    def contour(self, rssi):
+        """
+        Antenna-frame contour of one level, as an (n, 2) array of x, y ordered by azimuth (empty if there is none).
+
+        Branches are oriented and joined by increasing azimuth; parts of the
+        level closer than the raster start (RSSI above the field at the
+        antenna) are left out, as non-positive solved distances are.
+        """
+        lines = [line if line[0, 0] <= line[-1, 0] else line[::-1] for line in self.branches(rssi)]
+        if not lines:
+            return np.zeros((0, 2))
+        polar = np.concatenate(sorted(lines, key=lambda line: line[0, 0]))
+        polar = polar[polar[:, 1] > self.radii[0]]
+        angles_rad = np.radians(polar[:, 0])
+        return np.column_stack((polar[:, 1] * np.sin(angles_rad), polar[:, 1] * np.cos(angles_rad)))
+
+    def band(self, rssi, width=None):
+        """
+        Upper (near), lower (far) and nominal contour of a level, each an (n, 2) antenna-frame array.
+
+        The half-width defaults to the band model of the pattern (get_rms_rssi).
+        """
+        if width is None:
+            width = band_half_width(self.model, rssi)
+        return self.contour(rssi + width), self.contour(rssi - width), self.contour(rssi)
+
+@lru_cache(maxsize=None)
+def load_raster(model=LOCALIZATION_MODEL):
+    """Raster of a model, built once per process (about 30 ms) and shared by every level."""
+    return PatternRaster.build(model)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the marching-squares contours of the RSSI raster with the pattern atlas.')
+    parser.add_argument('--min-rssi', type=float, default=-90.0, help='Lowest level [dBm]')
+    parser.add_argument('--max-rssi', type=float, default=-35.0, help='Highest level [dBm]')
+    parser.add_argument('--step', type=float, default=0.5, help='Level spacing [dB]')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    raster = PatternRaster.build(LOCALIZATION_MODEL)
+    print(f"Raster: {len(raster.radii)} ranges x {len(raster.angles)} azimuths in {time.perf_counter() - start:.3f} s")
+    levels = np.arange(args.min_rssi, args.max_rssi + args.step / 2, args.step)
+    start = time.perf_counter()
+    contours = [raster.contour(level) for level in levels]
+    elapsed = time.perf_counter() - start
+    # Deviation from the solved contour along the azimuth of every raster point
+    deviations = []
+    for level, points in zip(levels, contours):
+        phi = np.degrees(np.arctan2(points[:, 0], points[:, 1]))
+        expected = contour_distances(LOCALIZATION_MODEL, [level], phi)[0]
+        deviations.append(np.nanmax(np.abs(np.hypot(points[:, 0], points[:, 1]) - expected), initial=0.0))
+    print(f"{len(levels)} contours in {elapsed * 1000:.1f} ms ({elapsed / len(levels) * 1000:.2f} ms per level)")
+    print(f"Largest deviation from the solved contours: {max(deviations) * 1000:.2f} mm")
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from noise_model import K_SCORE, load_noise_model
+from noise_statistics import DEFAULT_SOURCES, MIN_MEAN_RSSI, MIN_READS, find_files, scan_files, summarize
+
+# Residuals are taken against the pattern model of the antenna pattern stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-antenna-pattern'))
+from pattern_atlas import LOCALIZATION_MODEL, azimuth_loss, polynomial
+
+# -------------------
+# Constants
+# -------------------
+NOISE_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'noise-map.json')
+RANGE_STEP = 0.5  # Cell size of the map along the range [m]
+AZIMUTH_STEP = 30.0  # Cell size of the map along the azimuth [deg]
+MAX_RANGE = 3.5  # Calibrated range of the pattern model [m]
+MAX_AZIMUTH = 90.0  # Tags behind the antenna are not read [deg]
+PRIOR_POSES = 5  # Weight of the global noise model in every cell, in poses
+FACTOR_RANGE = (0.5, 2.0)  # Limits of the cell factors
+
+class NoiseMap:
+    """
+    Spatially varying band width in the antenna frame, on a polar (range, azimuth) grid.
+
+    Every cell holds two factors relative to the global noise model: `read`
+    scales the fitted spread (read noise at a pose) and `model` scales the
+    model margin (how far the mean RSSI at a pose is off the pattern model,
+    mostly multipath). The orientation margin is not spatial and stays.
+    Lookups index the uniform grid directly, for whole arrays at once; points
+    off the grid, and a map with all factors 1, give the noise model's bands.
+    """
+
+    def __init__(self, range_step, azimuth_step, read, model, poses):
+        self.range_step = range_step
+        self.azimuth_step = azimuth_step
+        self.read = np.asarray(read, dtype=float)
+        self.model = np.asarray(model, dtype=float)
+        self.poses = np.asarray(poses, dtype=int)
+
+    @classmethod
+    def uniform(cls, range_step=RANGE_STEP, azimuth_step=AZIMUTH_STEP):
+        """Map without spatial variation (all factors 1)."""
+        shape = (int(np.ceil(MAX_RANGE / range_step)), int(np.ceil(2 * MAX_AZIMUTH / azimuth_step)))
+        return cls(range_step, azimuth_step, np.ones(shape), np.ones(shape), np.zeros(shape))
+
+    def cells(self, distance, azimuth):
+        """Cell indices (range, azimuth) of antenna-frame points, and whether each point lies on the grid."""
+        azimuth = np.asarray(azimuth, dtype=float)
+        i = np.floor(np.asarray(distance, dtype=float) / self.range_step)
+        j = np.floor((azimuth + MAX_AZIMUTH) / self.azimuth_step)
+        # The +-MAX_AZIMUTH edges belong to the outermost cells
+        j = np.where(azimuth == MAX_AZIMUTH, self.read.shape[1] - 1, j)
+        inside = (i >= 0) & (i < self.read.shape[0]) & (j >= 0) & (j < self.read.shape[1])
+        return np.where(inside, i, 0).astype(int), np.where(inside, j, 0).astype(int), inside
+
+    def factors(self, distance, azimuth):
+        """Read and model factors at antenna-frame points, by range [m] and azimuth [deg] (arrays of any shape)."""
+        i, j, inside = self.cells(distance, azimuth)
+        return np.where(inside, self.read[i, j], 1.0), np.where(inside, self.model[i, j], 1.0)
+
+    def half_width(self, rssi, distance, azimuth, noise_model=None):
+        """Band half-width [dB] at antenna-frame points: scaled spread and model margin plus the other margins."""
+        noise_model = noise_model or load_noise_model()
+        read, model = self.factors(distance, azimuth)
+        model_margin = noise_model.margins.get('model', 0.0)
+        return noise_model.spread(rssi) * read + model_margin * model + (noise_model.margin - model_margin)
+
+    def to_dict(self):
+        return {
+            'range_step': self.range_step,
+            'azimuth_step': self.azimuth_step,
+            'read': np.round(self.read, 6).tolist(),
+            'model': np.round(self.model, 6).tolist(),
+            'poses': self.poses.tolist()
+        }
+
+def save_noise_map(noise_map, path=NOISE_MAP_PATH):
+    """Write the noise map artifact (JSON)."""
+    with open(path, 'w') as f:
+        json.dump(noise_map.to_dict(), f)
+
+@lru_cache(maxsize=None)
+def load_noise_map(path=NOISE_MAP_PATH):
+    """Noise map artifact of the error model stage; a uniform map if the file does not exist."""
+    if not os.path.exists(path):
+        return NoiseMap.uniform()
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return NoiseMap(data['range_step'], data['azimuth_step'], data['read'], data['model'], data['poses'])
+
+# -------------------
+# Learning
+# -------------------
+def tag_positions(files):
+    """Ground-truth tag positions {(file name, tag ID): (x, y)} of measurement files; files without them are skipped."""
+    positions = {}
+    for path in files:
+        source = os.path.basename(path)
+        extension = os.path.splitext(path)[1].lower()
+        try:
+            if extension == '.rfid':
+                from measurement_store import read_metadata
+                locations = read_metadata(path).get('tag_locations', {})
+                tags = pd.DataFrame([(tag_id, x, y) for tag_id, (x, y) in locations.items()],
+                                    columns=['Tag ID', 'Tag X [m]', 'Tag Y [m]'])
+            elif extension == '.csv':
+                tags = pd.read_csv(path, sep=None, engine='python', usecols=['Tag ID', 'Tag X [m]', 'Tag Y [m]'])
+            else:
+                tags = pd.read_excel(path, sheet_name='All Data', usecols=['Tag ID', 'Tag X [m]', 'Tag Y [m]'])
+        except (KeyError, ValueError, OSError):
+            continue
+        for row in tags.dropna().drop_duplicates('Tag ID').to_dict('records'):
+            positions[(source, str(row['Tag ID']))] = (float(row['Tag X [m]']), float(row['Tag Y [m]']))
+    return positions
+
+def pose_residuals(summary, positions, noise_model=None):
+    """
+    Per-pose summary (noise_statistics.summarize) in the antenna frame, for the poses whose tag position is known.
+
+    Adds the range and azimuth of the tag from the antenna, the residual of
+    the mean RSSI against the pattern model and the ratio of the read
+    variance to the variance predicted by the noise model. Poses behind the
+    antenna, beyond MAX_RANGE or at the sensitivity limit are left out.
+    """
+    noise_model = noise_model or load_noise_model()
+    keys = list(zip(summary['Source'], summary['Tag ID'].astype(str)))
+    tag_xy = np.array([positions.get(key, (np.nan, np.nan)) for key in keys], dtype=float).reshape(-1, 2)
+    dx = tag_xy[:, 0] - summary['Antenna X [m]'].to_numpy()
+    dy = tag_xy[:, 1] - summary['Antenna Y [m]'].to_numpy()
+    poses = summary.assign(**{
+        'Range [m]': np.hypot(dx, dy),
+        'Azimuth [deg]': (np.degrees(np.arctan2(dx, dy)) - summary['Antenna Rot Z [deg]'] + 180.0) % 360.0 - 180.0
+    })
+    poses = poses[(poses['Range [m]'] <= MAX_RANGE) & (poses['Azimuth [deg]'].abs() <= MAX_AZIMUTH) &
+                  (poses['mean'] > MIN_MEAN_RSSI)].copy()
+    expected = (polynomial(LOCALIZATION_MODEL.distance, poses['Range [m]'].to_numpy()) -
+                azimuth_loss(LOCALIZATION_MODEL, poses['Azimuth [deg]'].to_numpy()))
+    predicted_std = noise_model.spread(poses['mean'].to_numpy()) / K_SCORE
+    poses['Residual [dB]'] = poses['mean'] - expected
+    poses['Variance Ratio'] = (poses['std'] / predicted_std) ** 2
+    return poses
+
+def learn_noise_map(poses, range_step=RANGE_STEP, azimuth_step=AZIMUTH_STEP, prior=PRIOR_POSES):
+    """
+    Noise map from the per-pose residuals (pose_residuals).
+
+    Per cell, the mean read variance ratio and the mean squared residual
+    (relative to its mean over all poses) are shrunk towards 1 with the
+    weight of `prior` poses, so sparsely sampled cells stay close to the
+    global model; the factors are their square roots, limited to FACTOR_RANGE.
+    """
+    noise_map = NoiseMap.uniform(range_step, azimuth_step)
+    i, j, inside = noise_map.cells(poses['Range [m]'].to_numpy(), poses['Azimuth [deg]'].to_numpy())
+    i, j = i[inside], j[inside]
+    read_ratio = poses['Variance Ratio'].to_numpy()[inside]
+    residual = poses['Residual [dB]'].to_numpy()[inside]
+    model_ratio = residual ** 2 / np.mean(residual ** 2)
+    shape = noise_map.read.shape
+    counts = np.zeros(shape)
+    read_sum = np.zeros(shape)
+    model_sum = np.zeros(shape)
+    np.add.at(counts, (i, j), 1)
+    np.add.at(read_sum, (i, j), read_ratio)
+    np.add.at(model_sum, (i, j), model_ratio)
+    noise_map.read = np.clip(np.sqrt((read_sum + prior) / (counts + prior)), *FACTOR_RANGE)
+    noise_map.model = np.clip(np.sqrt((model_sum + prior) / (counts + prior)), *FACTOR_RANGE)
+    noise_map.poses = counts.astype(int)
+    return noise_map
+
+def print_grid(noise_map, values, name):
+    """One grid of the map as a table: ranges as rows, azimuth cells as columns."""
+    columns = [f'{-MAX_AZIMUTH + j * noise_map.azimuth_step:+.0f}' for j in range(values.shape[1])]
+    index = [f'{i * noise_map.range_step:.1f}-{(i + 1) * noise_map.range_step:.1f} m' for i in range(values.shape[0])]
+    print(f"\n{name} (rows: range, columns: azimuth cell start [deg])")
+    print(pd.DataFrame(values, index=index, columns=columns).round(2).to_string())
+
+def main():
+    parser = argparse.ArgumentParser(description='Learn the antenna-frame noise map used for localization bands.')
+    parser.add_argument('sources', nargs='*', default=DEFAULT_SOURCES,
+                        help='Files, directories or glob patterns (default: data/ and ../experiment-data/)')
+    parser.add_argument('--workers', type=int, help='Worker processes of the scan (default: one per CPU)')
+    parser.add_argument('--range-step', type=float, default=RANGE_STEP, help='Cell size along the range [m]')
+    parser.add_argument('--azimuth-step', type=float, default=AZIMUTH_STEP, help='Cell size along the azimuth [deg]')
+    parser.add_argument('--prior', type=float, default=PRIOR_POSES, help='Weight of the global model per cell [poses]')
+    parser.add_argument('--out', default=NOISE_MAP_PATH, help='Artifact file')
+    args = parser.parse_args()
+
+    files = find_files(args.sources)
+    if not files:
+        print("No measurement files found!")
+        sys.exit(1)
+    start = time.perf_counter()
+    stats, reads = scan_files(files, workers=args.workers)
+    if stats is None:
+        print("No reads found!")
+        sys.exit(1)
+    poses = pose_residuals(summarize(stats, MIN_READS), tag_positions(files))
+    if poses.empty:
+        print("No poses with a known tag position in front of the antenna!")
+        sys.exit(1)
+    noise_map = learn_noise_map(poses, args.range_step, args.azimuth_step, args.prior)
+    print(f"{reads} reads in {len(files)} files -> {len(poses)} poses with a known tag position "
+          f"({time.perf_counter() - start:.1f} s)")
+    print(f"Residual against the pattern model: mean {poses['Residual [dB]'].mean():.2f} dB, "
+          f"RMS {np.sqrt(np.mean(poses['Residual [dB]'] ** 2)):.2f} dB; "
+          f"read variance ratio to the noise model: mean {poses['Variance Ratio'].mean():.2f}")
+    print_grid(noise_map, noise_map.poses, 'Poses')
+    print_grid(noise_map, noise_map.read, 'Read factor')
+    print_grid(noise_map, noise_map.model, 'Model factor')
+    save_noise_map(noise_map, args.out)
+    print(f"\nNoise map written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from std_models import FIT_FUNCTIONS, K_SCORE, fit_std_model
+
+# -------------------
+# Constants
+# -------------------
+NOISE_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'noise-model.json')
+
+# Calibrated spread (std * K_SCORE vs mean RSSI) and the fixed margins used by localization so far
+DEFAULT_FORM = 'Exponential'
+DEFAULT_PARAMS = (0.0000330307, -0.154, 0.9145)
+DEFAULT_MARGINS = {'model': 1.5, 'orientation': 2.0}  # [dB], not reduced by averaging reads
+
+# Functional forms of the std vs mean fit, by label (the candidates of std_models.py)
+FORMS = {label: function for label, function, _ in FIT_FUNCTIONS}
+
+class NoiseModel:
+    """
+    RSSI noise model: band half-width = spread(RSSI) + fixed margins.
+
+    The spread (K_SCORE times the std of the reads at a pose) is the fitted
+    functional form, evaluated exactly for whole arrays at once.
+    """
+
+    def __init__(self, form, params, margins):
+        if form not in FORMS:
+            raise ValueError(f"Unknown noise model form '{form}' (expected one of: {', '.join(FORMS)})")
+        self.form = form
+        self.params = tuple(params)
+        self.margins = dict(margins)
+        self.margin = sum(self.margins.values())
+
+    @classmethod
+    def build(cls, form=DEFAULT_FORM, params=DEFAULT_PARAMS, margins=None):
+        """Noise model of a fitted form, with the default margins unless given."""
+        return cls(form, params, DEFAULT_MARGINS if margins is None else margins)
+
+    def spread(self, rssi):
+        """Fitted spread (K_SCORE * std) at RSSI values [dB]."""
+        value = FORMS[self.form](np.asarray(rssi, dtype=float), *self.params)
+        return value if value.ndim else float(value)
+
+    def std(self, rssi):
+        """Standard deviation of a single read at RSSI values (the spread divided by K_SCORE) [dB]."""
+        return self.spread(rssi) / K_SCORE
+
+    def half_width(self, rssi):
+        """Band half-width at RSSI values: spread plus the fixed margins [dB]."""
+        # Margins are added one by one, in the order of get_rms_rssi's formula
+        value = self.spread(rssi)
+        for margin in self.margins.values():
+            value = value + margin
+        return value
+
+    def to_dict(self):
+        return {
+            'form': self.form,
+            'params': list(self.params),
+            'k_score': K_SCORE,
+            'margins': self.margins
+        }
+
+def save_noise_model(model, path=NOISE_MODEL_PATH):
+    """Write the noise model artifact (JSON)."""
+    with open(path, 'w') as f:
+        json.dump(model.to_dict(), f)
+
+@lru_cache(maxsize=None)
+def load_noise_model(path=NOISE_MODEL_PATH):
+    """Noise model artifact of the error model stage; the calibrated default if the file does not exist."""
+    if not os.path.exists(path):
+        return NoiseModel.build()
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return NoiseModel(data['form'], data['params'], data['margins'])
+
+def fit_summary(path, min_mean_rssi=-80):
+    """
+    Fit the spread (std * K_SCORE vs mean) on a per-pose summary table (uncertainty-band.py or
+    noise_statistics.py output, with 'mean' and 'std' columns); returns (form, params, rms).
+    """
+    summary = pd.read_excel(path) if path.lower().endswith('.xlsx') else pd.read_csv(path)
+    summary = summary[(summary['mean'] > min_mean_rssi) & summary['std'].notna()]
+    best = fit_std_model(summary['mean'].to_numpy(), summary['std'].to_numpy() * K_SCORE)
+    if best is None:
+        raise ValueError(f"No model could be fitted to {path}")
+    label, _, params, _, rms = best
+    return label, tuple(float(p) for p in params), rms
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write the noise model artifact used by localization.')
+    parser.add_argument('--summary', help='Fit the spread on this per-pose summary (.xlsx or .csv) instead of '
+                                          'writing the calibrated default')
+    parser.add_argument('--out', default=NOISE_MODEL_PATH, help='Artifact file')
+    args = parser.parse_args()
+    if args.summary:
+        form, params, rms = fit_summary(args.summary)
+        print(f"Best fit: {form} {params} (RMS {rms:.3f} dB)")
+    else:
+        form, params = DEFAULT_FORM, DEFAULT_PARAMS
+    model = NoiseModel.build(form, params)
+    save_noise_model(model, args.out)
+    print(f"Noise model ({form}, margins {model.margins}) written to {args.out}")
@@ -0,0 +1,261 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from std_models import K_SCORE, fit_std_model, model_equation
+
+# Binary measurement files are read with the data extraction stage's reader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '2-data-extraction'))
+
+# -------------------
+# Constants
+# -------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = [os.path.join(BASE_DIR, 'data'), os.path.join(BASE_DIR, '..', 'experiment-data')]
+CHUNK_SIZE = 100000  # Reads per chunk
+KEY_COLUMNS = ['Source', 'Tag ID', 'Antenna', 'Antenna X [m]', 'Antenna Y [m]', 'Antenna Rot Z [deg]']
+STAT_COLUMNS = ['count', 'mean', 'M2', 'min', 'max']
+MIN_READS = 5  # Poses with fewer reads give no usable std
+MIN_MEAN_RSSI = -80  # Poses at the sensitivity limit are left out of the fit, as in uncertainty-band.py
+
+# -------------------
+# Streaming Statistics
+# -------------------
+def chunk_statistics(df):
+    """Count, mean, M2 (sum of squared deviations from the mean), min and max of the RSSI of every pose in a chunk."""
+    grouped = df.groupby(KEY_COLUMNS, sort=False)['RSSI']
+    stats = grouped.agg(['count', 'mean', 'min', 'max'])
+    stats['M2'] = grouped.var(ddof=0) * stats['count']
+    return stats[STAT_COLUMNS]
+
+def merge_statistics(a, b):
+    """
+    Combine the per-pose statistics of two sets of reads (Chan et al.'s parallel variance).
+
+    With delta = mean_b - mean_a and n = n_a + n_b:
+        mean = mean_a + delta * n_b / n
+        M2 = M2_a + M2_b + delta**2 * n_a * n_b / n
+    Poses found in only one of the sets are taken over as they are.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    a, b = a.align(b, join='outer')
+    fill = {'count': 0, 'mean': 0.0, 'M2': 0.0, 'min': np.inf, 'max': -np.inf}
+    a = a.fillna(fill)
+    b = b.fillna(fill)
+    n = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+    merged = pd.DataFrame({
+        'count': n,
+        'mean': a['mean'] + delta * b['count'] / n,
+        'M2': a['M2'] + b['M2'] + delta ** 2 * a['count'] * b['count'] / n,
+        'min': np.minimum(a['min'], b['min']),
+        'max': np.maximum(a['max'], b['max'])
+    })
+    return merged[STAT_COLUMNS]
+
+def excel_chunks(path, chunk_size=CHUNK_SIZE):
+    """Reads of a logger workbook ('All Data' sheet) in chunks, streamed row by row instead of loading the sheet."""
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook['All Data'].iter_rows(values_only=True)
+        header = list(next(rows))
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+def binary_chunks(path, start=0, stop=None, chunk_size=CHUNK_SIZE):
+    """Reads start:stop of a binary measurement file in chunks of the memory-mapped records."""
+    from measurement_store import open_measurements, rssi_dbm
+    records, epcs, _ = open_measurements(path)
+    epcs = np.array(epcs, dtype=object)
+    stop = len(records) if stop is None else stop
+    for begin in range(start, stop, chunk_size):
+        chunk = records[begin:min(begin + chunk_size, stop)]
+        yield pd.DataFrame({
+            'Tag ID': epcs[chunk['tag']],
+            'RSSI': rssi_dbm(chunk),
+            'Antenna': chunk['antenna'],
+            'Antenna X [m]': chunk['x'],
+            'Antenna Y [m]': chunk['y'],
+            'Antenna Rot Z [deg]': chunk['rot_z']
+        })
+
+def read_chunks(path, start=0, stop=None, chunk_size=CHUNK_SIZE):
+    """Chunks of reads of any measurement file (.xlsx, .csv or binary .rfid)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.rfid':
+        return binary_chunks(path, start, stop, chunk_size)
+    if extension == '.csv':
+        return pd.read_csv(path, sep=None, engine='python', chunksize=chunk_size)
+    return excel_chunks(path, chunk_size)
+
+def pose_keys(chunk, source):
+    """
+    Chunk with the pose key columns in one form for every file type: workbooks store some numbers as
+    text, and binary files store the pose as float32 (rounded as in measurement_store.to_frame).
+    """
+    return pd.DataFrame({
+        'Source': source,
+        'Tag ID': chunk['Tag ID'].astype(str).to_numpy(),
+        'Antenna': pd.to_numeric(chunk['Antenna']).to_numpy(),
+        'Antenna X [m]': pd.to_numeric(chunk['Antenna X [m]']).astype(float).round(6).to_numpy(),
+        'Antenna Y [m]': pd.to_numeric(chunk['Antenna Y [m]']).astype(float).round(6).to_numpy(),
+        'Antenna Rot Z [deg]': pd.to_numeric(chunk['Antenna Rot Z [deg]']).astype(float).round(4).to_numpy(),
+        'RSSI': pd.to_numeric(chunk['RSSI']).astype(float).to_numpy()
+    })
+
+def scan_job(job):
+    """
+    Worker process entry point: statistics of one file (or one record range of a binary file), chunk by chunk.
+
+    Returns:
+    tuple: (stats, reads, error); files that are not logger files (no 'All Data' sheet or pose columns) give
+    (None, 0, reason).
+    """
+    path, start, stop, chunk_size = job
+    source = os.path.basename(path)
+    stats = None
+    reads = 0
+    try:
+        for chunk in read_chunks(path, start, stop, chunk_size):
+            chunk = pose_keys(chunk, source)
+            reads += len(chunk)
+            stats = merge_statistics(stats, chunk_statistics(chunk))
+    except (KeyError, ValueError) as e:
+        return None, 0, str(e)
+    return stats, reads, None
+
+def find_files(sources):
+    """Measurement files (.xlsx, .csv, .rfid) in the given files, directories and glob patterns."""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = [os.path.join(source, name) for name in os.listdir(source)]
+        else:
+            matches = glob.glob(source, recursive=True)
+        files.extend(path for path in matches
+                     if os.path.splitext(path)[1].lower() in ('.xlsx', '.csv', '.rfid') and os.path.isfile(path))
+    return sorted(set(files))
+
+def plan_jobs(files, chunk_size=CHUNK_SIZE, workers=1):
+    """
+    Scan jobs (path, start, stop, chunk_size): one per file, and binary files split into record ranges
+    of whole chunks so a single large file is scanned by all workers.
+    """
+    from measurement_store import record_count
+    jobs = []
+    for path in files:
+        if path.lower().endswith('.rfid'):
+            count = record_count(path)
+            chunks = max(1, -(-count // chunk_size))
+            step = -(-chunks // workers) * chunk_size
+            jobs.extend((path, start, min(start + step, count), chunk_size) for start in range(0, max(count, 1), step))
+        else:
+            jobs.append((path, 0, None, chunk_size))
+    return jobs
+
+def scan_files(files, chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Per-pose RSSI statistics of all files, computed out of core in a process pool and merged as the results come in.
+
+    Returns:
+    stats (pd.DataFrame): count, mean, M2, min and max per pose (indexed by KEY_COLUMNS).
+    reads (int): Reads scanned.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = plan_jobs(files, chunk_size, workers)
+    stats = None
+    reads = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (path, _, _, _), (job_stats, job_reads, error) in zip(jobs, pool.map(scan_job, jobs)):
+            if error is not None:
+                print(f"Skipping {path}: {error}")
+                continue
+            stats = merge_statistics(stats, job_stats)
+            reads += job_reads
+    return stats, reads
+
+def summarize(stats, min_reads=MIN_READS):
+    """Summary table with the mean, sample std, min, max and count of every pose with at least `min_reads` reads."""
+    summary = stats[stats['count'] >= min_reads].reset_index()
+    summary['std'] = np.sqrt(summary['M2'] / (summary['count'] - 1))
+    summary['count'] = summary['count'].astype(int)
+    return summary[KEY_COLUMNS + ['mean', 'std', 'min', 'max', 'count']]
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit the RSSI std vs mean model on all measurement files, out of core.')
+    parser.add_argument('sources', nargs='*', default=DEFAULT_SOURCES,
+                        help='Files, directories or glob patterns (default: data/ and ../experiment-data/)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Reads per chunk')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--min-reads', type=int, default=MIN_READS, help='Reads a pose needs to enter the fit')
+    parser.add_argument('--out', default='rfid_rssi_summary_all.csv', help='Per-pose summary (CSV)')
+    parser.add_argument('--plot', action='store_true', help='Plot std vs mean with the fitted model')
+    args = parser.parse_args()
+
+    files = find_files(args.sources)
+    if not files:
+        print("No measurement files found!")
+        sys.exit(1)
+    start = time.perf_counter()
+    stats, reads = scan_files(files, args.chunk_size, args.workers)
+    if stats is None:
+        print("No reads found!")
+        sys.exit(1)
+    summary = summarize(stats, args.min_reads)
+    print(f"{reads} reads in {len(files)} files -> {len(summary)} poses with at least {args.min_reads} reads "
+          f"({time.perf_counter() - start:.1f} s)")
+    summary.to_csv(args.out, index=False)
+    print(f"Summary statistics saved to {args.out}")
+
+    filtered = summary[summary['mean'] > MIN_MEAN_RSSI]
+    x = filtered['mean'].to_numpy()
+    y = filtered['std'].to_numpy()
+    for name, scale in (('std', 1.0), (f'std*{K_SCORE}', K_SCORE)):
+        best = fit_std_model(x, y * scale)
+        if best is None:
+            print(f"\nNo fit succeeded for {name}")
+            continue
+        label, func, params, _, rms = best
+        print(f"\nBest fit equation: {model_equation(label, params, name)}")
+        print(f"RMS error: {rms:.3f}")
+        print("Coefficients:")
+        for i, param in enumerate(params):
+            print(f"  param[{i}]: {param:.10f}")
+        print(f"{'RSSI':>6} {'Estimated ' + name:>20}")
+        for rssi_value in range(-40, -81, -5):
+            print(f"{rssi_value:>6} {func(rssi_value, *params):>20.4f}")
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+        best = fit_std_model(x, y)
+        plt.figure(figsize=(8, 6))
+        plt.scatter(x, y, s=8, label=f'Poses ({len(x)})', color='blue')
+        if best is not None:
+            x_smooth = np.linspace(np.min(x), np.max(x), 200)
+            plt.plot(x_smooth, best[1](x_smooth, *best[2]), color='red', label=f'Best Fit: {best[0]}')
+        plt.xlabel('Mean RSSI')
+        plt.ylabel('Std of RSSI')
+        plt.title('Std vs Mean of RSSI at Each Pose, All Sessions')
+        plt.gca().invert_xaxis()
+        plt.legend()
+        plt.tight_layout()
+        plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+from scipy.optimize import curve_fit
+
+# -------------------
+# Constants
+# -------------------
+K_SCORE = 4.5  # Coverage factor of the band: spread = K_SCORE * std
+
+# -------------------
+# Std vs Mean Models
+# -------------------
+def linear(x, a, b):
+    return a * x + b
+
+def quadratic(x, a, b, c):
+    return a * x**2 + b * x + c
+
+def exponential(x, a, b, c):
+    return a * np.exp(b * x) + c
+
+def power_law(x, a, b):
+    return a * np.power(x, b)
+
+# Candidate models with their initial guesses
+FIT_FUNCTIONS = [
+    ("Linear", linear, [1, 0]),
+    ("Quadratic", quadratic, [1, 1, 0]),
+    ("Exponential", exponential, [1, -0.1, 1]),
+    ("Power Law", power_law, [1, 1])
+]
+
+def fit_std_model(x, y):
+    """
+    Fit every candidate model to std (y) vs mean RSSI (x) and keep the one with the lowest RMS error.
+
+    Returns:
+    tuple: (label, function, params, fitted y, rms), or None when no fit succeeded.
+    """
+    best = None
+    for label, func, p0 in FIT_FUNCTIONS:
+        try:
+            # The power law is undefined for negative RSSI with fractional exponents; such fits fail or lose
+            with np.errstate(invalid='ignore'):
+                params, _ = curve_fit(func, x, y, p0=p0, maxfev=10000)
+        except Exception:
+            continue
+        y_fit = func(x, *params)
+        rms = np.sqrt(np.mean((y - y_fit) ** 2))
+        if best is None or rms < best[4]:
+            best = (label, func, params, y_fit, rms)
+    return best
+
+def model_equation(label, params, name='std'):
+    """Equation of a fitted model as text."""
+    if label == "Linear":
+        return f"{name} = {params[0]:.3f} * RSSI + {params[1]:.3f}"
+    if label == "Quadratic":
+        return f"{name} = {params[0]:.3f} * RSSI² + {params[1]:.3f} * RSSI + {params[2]:.3f}"
+    if label == "Exponential":
+        return f"{name} = {params[0]:.3f} * e^({params[1]:.3f} * RSSI) + {params[2]:.3f}"
+    if label == "Power Law":
+        return f"{name} = {params[0]:.3f} * RSSI^{params[1]:.3f}"
+    return "Best fit equation"
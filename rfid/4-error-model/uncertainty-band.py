@@ -1,7 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.optimize import curve_fit
+from std_models import K_SCORE, fit_std_model, model_equation
 
 # Load the Excel file
 input_file = 'rfid_data_220425_125443.xlsx'
@@ -36,79 +36,18 @@ plt.legend()
 plt.tight_layout()
 
 # --- Curve fitting section ---
-from scipy.optimize import curve_fit
-
-# Define possible fitting functions
-
-def linear(x, a, b):
-    return a * x + b
-
-def quadratic(x, a, b, c):
-    return a * x**2 + b * x + c
-
-def exponential(x, a, b, c):
-    return a * np.exp(b * x) + c
-
-def power_law(x, a, b):
-    return a * np.power(x, b)
-
-fit_functions = [
-    ("Linear", linear),
-    ("Quadratic", quadratic),
-    ("Exponential", exponential),
-    ("Power Law", power_law)
-]
-
-best_rms = np.inf
-best_fit = None
-best_params = None
-best_label = None
-best_func = None
-
-for label, func in fit_functions:
-    try:
-        # Initial guess for parameters
-        if label == "Linear":
-            p0 = [1, 0]
-        elif label == "Quadratic":
-            p0 = [1, 1, 0]
-        elif label == "Exponential":
-            p0 = [1, -0.1, 1]
-        elif label == "Power Law":
-            p0 = [1, 1]
-        else:
-            p0 = None
-        params, _ = curve_fit(func, x, y, p0=p0, maxfev=10000)
-        y_fit = func(x, *params)
-        rms = np.sqrt(np.mean((y - y_fit) ** 2))
-        if rms < best_rms:
-            best_rms = rms
-            best_fit = y_fit
-            best_params = params
-            best_label = label
-            best_func = func
-    except Exception as e:
-        continue
+best = fit_std_model(x, y)
 
 # Plot the best fit
-if best_fit is not None:
+if best is not None:
+    best_label, best_func, best_params, best_fit, best_rms = best
     # Generate smooth x values for the curve
     x_smooth = np.linspace(np.min(x), np.max(x), 200)
     y_smooth = best_func(x_smooth, *best_params)
     plt.plot(x_smooth, y_smooth, color='red', label=f'Best Fit: {best_label}')
     plt.legend()
     # Print the equation and RMS in the terminal
-    if best_label == "Linear":
-        eqn = f"std = {best_params[0]:.3f} * RSSI + {best_params[1]:.3f}"
-    elif best_label == "Quadratic":
-        eqn = f"std = {best_params[0]:.3f} * RSSI² + {best_params[1]:.3f} * RSSI + {best_params[2]:.3f}"
-    elif best_label == "Exponential":
-        eqn = f"std = {best_params[0]:.3f} * e^({best_params[1]:.3f} * RSSI) + {best_params[2]:.3f}"
-    elif best_label == "Power Law":
-        eqn = f"std = {best_params[0]:.3f} * RSSI^{best_params[1]:.3f}"
-    else:
-        eqn = "Best fit equation"
-    print(f"Best fit equation: {eqn}")
+    print(f"Best fit equation: {model_equation(best_label, best_params)}")
     print(f"RMS error: {best_rms:.3f}")
     print("Coefficients:")
     for i, param in enumerate(best_params):
@@ -126,8 +65,6 @@ else:
 plt.show()
 
 # --- Second plot: std * 4.5 (K-score) vs mean ---
-K_SCORE = 4.5
-
 y_scaled = y * K_SCORE
 
 plt.figure(figsize=(8,6))
@@ -140,55 +77,17 @@ plt.legend()
 plt.tight_layout()
 
 # Fit the same models to the scaled data
-y_best_fit = None
-params_scaled = None
-label_scaled = None
-func_scaled = None
-best_rms_scaled = np.inf
-
-for label, func in fit_functions:
-    try:
-        # Initial guess for parameters
-        if label == "Linear":
-            p0 = [1, 0]
-        elif label == "Quadratic":
-            p0 = [1, 1, 0]
-        elif label == "Exponential":
-            p0 = [1, -0.1, 1]
-        elif label == "Power Law":
-            p0 = [1, 1]
-        else:
-            p0 = None
-        params, _ = curve_fit(func, x, y_scaled, p0=p0, maxfev=10000)
-        y_fit = func(x, *params)
-        rms = np.sqrt(np.mean((y_scaled - y_fit) ** 2))
-        if rms < best_rms_scaled:
-            best_rms_scaled = rms
-            y_best_fit = y_fit
-            params_scaled = params
-            label_scaled = label
-            func_scaled = func
-    except Exception as e:
-        continue
+best_scaled = fit_std_model(x, y_scaled)
 
 # Plot the best fit for scaled data
-if y_best_fit is not None:
+if best_scaled is not None:
+    label_scaled, func_scaled, params_scaled, y_best_fit, best_rms_scaled = best_scaled
     x_smooth = np.linspace(np.min(x), np.max(x), 200)
     y_smooth = func_scaled(x_smooth, *params_scaled)
     plt.plot(x_smooth, y_smooth, color='red', label=f'Best Fit: {label_scaled}')
     plt.legend()
     # Print the equation and RMS in the terminal
-    if label_scaled == "Linear":
-        eqn = f"std*4.5 = {params_scaled[0]:.3f} * RSSI + {params_scaled[1]:.3f}"
-    elif label_scaled == "Quadratic":
-        eqn = f"std*4.5 = {params_scaled[0]:.3f} * RSSI² + {params_scaled[1]:.3f} * RSSI + {params_scaled[2]:.3f}"
-    elif label_scaled == "Exponential":
-        eqn = f"std*4.5 = {params_scaled[0]:.3f} * e^({params_scaled[1]:.3f} * RSSI) + {params_scaled[2]:.3f}"
-    elif label_scaled == "Power Law":
-        eqn = f"std*4.5 = {params_scaled[0]:.3f} * RSSI^{params_scaled[1]:.3f}"
-    else:
-        eqn = "Best fit equation"
-    print(f"\nBest fit equation for K-score scaled data: {eqn}")
+    print(f"\nBest fit equation for K-score scaled data: {model_equation(label_scaled, params_scaled, 'std*4.5')}")
     print(f"RMS error (scaled): {best_rms_scaled:.3f}")
     print("Coefficients (scaled):")
     for i, param in enumerate(params_scaled):
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from shapely.geometry import Polygon as ShapelyPolygon
+from localization_core import rssi_angle
+
+# -------------------
+# Constants
+# -------------------
+SWEEP_RADIUS = 0.15  # Antenna positions closer than this belong to one rotating stop [m]
+MIN_ROTATIONS = 3  # Distinct rotations needed for a bearing; two fit the pattern exactly and leave no check
+BEARING_MARGIN = 10.0  # Model error of the fitted bearing [deg], added to the statistical error
+BEARING_K = 3.0  # Coverage factor of the statistical bearing error
+WEDGE_RANGE = 4.0  # Radius of the bearing wedges [m], beyond the read range of the tags
+
+# rssi_angle(phi) = PATTERN_LINEAR * phi - PATTERN_QUADRATIC * phi**2
+PATTERN_LINEAR = (rssi_angle(1.0) - rssi_angle(-1.0)) / 2
+PATTERN_QUADRATIC = -(rssi_angle(1.0) + rssi_angle(-1.0)) / 2
+
+def wrap_degrees(angle):
+    """Wrap angles to [-180, 180)."""
+    return (np.asarray(angle, dtype=float) + 180.0) % 360.0 - 180.0
+
+def sweep_stops(df):
+    """
+    Rotating stop of every read: antenna positions within SWEEP_RADIUS of a position of the stop are one stop.
+
+    Stops are numbered in the order they were visited. The antenna of a
+    rotating robot is mounted off the rotation axis, so the rotations of one
+    stop are logged at slightly different positions.
+    """
+    positions = df[['Antenna X [m]', 'Antenna Y [m]']].to_numpy(dtype=float)
+    unique_positions, first, inverse = np.unique(positions, axis=0, return_index=True, return_inverse=True)
+    labels = np.full(len(unique_positions), -1)
+    stops = []
+    for index in np.argsort(first):
+        near = [stop for stop, members in enumerate(stops)
+                if np.min(np.hypot(*(unique_positions[members] - unique_positions[index]).T)) < SWEEP_RADIUS]
+        if near:
+            labels[index] = near[0]
+            stops[near[0]].append(index)
+        else:
+            labels[index] = len(stops)
+            stops.append([index])
+    return labels[inverse.ravel()]
+
+def fit_bearings(df):
+    """
+    Bearing of every tag from every rotating stop, by fitting the antenna pattern to the RSSI of the sweep.
+
+    With phi = bearing - rotation the pattern model RSSI = c + rssi_angle(phi)
+    becomes linear in the unknowns after moving the known terms to the left:
+        RSSI + A*r + B*r**2 = c0 + 2*B*bearing * r
+    (r rotation, A/B the linear/quadratic pattern coefficients). The
+    straight-line fit of all (tag, stop) groups is solved at once from
+    grouped sums. Rotations are taken relative to the first rotation of the
+    group, so sweeps across +-180 deg are handled.
+
+    Args:
+    df (pd.DataFrame): Reads of one or more tags ('Tag ID', 'RSSI', antenna pose columns).
+
+    Returns:
+    pd.DataFrame: One row per (tag, stop) with at least MIN_ROTATIONS rotations: 'Tag ID', 'Stop',
+    'Antenna X [m]', 'Antenna Y [m]' (mean position of the stop), 'Bearing [deg]', 'Bearing Error [deg]'
+    (standard error of the fit), 'Rotations', 'Reads' and 'Residual [dB]'.
+    """
+    reads = pd.DataFrame({
+        'Tag ID': df['Tag ID'].to_numpy() if 'Tag ID' in df else '',
+        'Stop': sweep_stops(df),
+        'Antenna X [m]': df['Antenna X [m]'].to_numpy(dtype=float),
+        'Antenna Y [m]': df['Antenna Y [m]'].to_numpy(dtype=float),
+        'Rotation': df['Antenna Rot Z [deg]'].to_numpy(dtype=float),
+        'RSSI': df['RSSI'].to_numpy(dtype=float)
+    })
+    groups = reads.groupby(['Tag ID', 'Stop'], sort=False)
+    reference = groups['Rotation'].transform('first')
+    r = wrap_degrees(reads['Rotation'] - reference)
+    z = reads['RSSI'] + PATTERN_LINEAR * r + PATTERN_QUADRATIC * r ** 2
+    reads = reads.assign(r=r, z=z, rr=r * r, rz=r * z, zz=z * z)
+    sums = reads.groupby(['Tag ID', 'Stop'], sort=False).agg(
+        n=('r', 'size'), rotations=('Rotation', 'nunique'), reference=('Rotation', 'first'),
+        x=('Antenna X [m]', 'mean'), y=('Antenna Y [m]', 'mean'),
+        r=('r', 'sum'), z=('z', 'sum'), rr=('rr', 'sum'), rz=('rz', 'sum'), zz=('zz', 'sum'))
+    sums = sums[sums['rotations'] >= MIN_ROTATIONS]
+    n = sums['n']
+    s_rr = sums['rr'] - sums['r'] ** 2 / n
+    s_rz = sums['rz'] - sums['r'] * sums['z'] / n
+    s_zz = sums['zz'] - sums['z'] ** 2 / n
+    slope = s_rz / s_rr
+    residual = np.clip(s_zz - slope * s_rz, 0.0, None)
+    dof = np.maximum(n - 2, 1)
+    slope_error = np.sqrt(residual / dof / s_rr)
+    return pd.DataFrame({
+        'Tag ID': sums.index.get_level_values('Tag ID'),
+        'Stop': sums.index.get_level_values('Stop'),
+        'Antenna X [m]': sums['x'].to_numpy(),
+        'Antenna Y [m]': sums['y'].to_numpy(),
+        'Bearing [deg]': wrap_degrees(sums['reference'] + slope / (2 * PATTERN_QUADRATIC)),
+        'Bearing Error [deg]': (slope_error / (2 * PATTERN_QUADRATIC)).to_numpy(),
+        'Rotations': sums['rotations'].to_numpy(),
+        'Reads': n.to_numpy(),
+        'Residual [dB]': np.sqrt(residual / dof).to_numpy()
+    })
+
+def bearing_wedge(ant_x, ant_y, bearing, half_width, radius=WEDGE_RANGE):
+    """Shapely sector from the antenna position around `bearing` (deg, 0 = +Y, clockwise as the antenna rotation)."""
+    angles = np.radians(np.linspace(bearing - half_width, bearing + half_width, 31))
+    x = np.concatenate([[ant_x], ant_x + radius * np.sin(angles)])
+    y = np.concatenate([[ant_y], ant_y + radius * np.cos(angles)])
+    return ShapelyPolygon(np.column_stack((x, y)))
+
+def bearing_wedges(bearings):
+    """Wedge polygon for every row of `fit_bearings`, BEARING_MARGIN plus BEARING_K standard errors wide on each side."""
+    half_widths = BEARING_MARGIN + BEARING_K * bearings['Bearing Error [deg]'].to_numpy()
+    return [bearing_wedge(x, y, bearing, half_width) for x, y, bearing, half_width in
+            zip(bearings['Antenna X [m]'], bearings['Antenna Y [m]'], bearings['Bearing [deg]'], half_widths)]
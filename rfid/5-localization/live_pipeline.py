@@ -0,0 +1,443 @@
+import argparse
+import json
+import math
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from localization_core import localize
+from pattern_atlas import load_atlas
+
+# Acquisition, pose and aggregation helpers live in the data extraction stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '2-data-extraction'))
+from pose_aggregator import RunningStats
+from pose_sources import Pose, load_tag_locations
+
+# Marks the end of the read stream on the pipeline queues
+END = None
+
+class ReplaySource:
+    """
+    Replays a logger file (Excel 'All Data' sheet or binary .rfid) as a live read stream.
+
+    Reads are emitted in file order, `interval` seconds apart, or with their
+    recorded timing divided by `speed` when the file has timestamps. Every
+    read is stamped with the time it is emitted, like a read from the reader.
+    """
+
+    def __init__(self, path, interval=0.01, speed=None):
+        if path.endswith('.rfid'):
+            from measurement_store import open_measurements, to_frame
+            self.df = to_frame(*open_measurements(path))
+        else:
+            self.df = pd.read_excel(path, sheet_name='All Data')
+        self.interval = interval
+        self.speed = speed
+        self.running = True
+
+    def reads(self):
+        recorded = self.df['Timestamp'].to_numpy(dtype=float) if 'Timestamp' in self.df else None
+        for i, row in enumerate(self.df.to_dict('records')):
+            if not self.running:
+                return
+            if self.speed and recorded is not None and i > 0:
+                time.sleep(max(0.0, (recorded[i] - recorded[i - 1]) / self.speed))
+            else:
+                time.sleep(self.interval)
+            pose = Pose(None, row['Antenna X [m]'], row['Antenna Y [m]'], row['Antenna Z [m]'], row['Antenna Rot Z [deg]'])
+            yield {'Tag ID': str(row['Tag ID']), 'RSSI': row['RSSI'], 'Antenna': row['Antenna'],
+                   'Pose': pose, 'Timestamp': time.time()}
+
+    def stop(self):
+        self.running = False
+
+class ReaderSource:
+    """
+    Live reads from a TSL reader, joined to robot poses received on a socket.
+
+    Inventory runs continuously over the configured antenna ports and every
+    read is joined to the pose nearest to it in time, as in the tag logger's
+    tracked mode.
+    """
+
+    def __init__(self, port_powers, pose_url, max_gap=0.5):
+        from tsl_reader import open_reader
+        from antenna_scheduler import AntennaScheduler
+        from pose_sources import SocketPoseSource
+        self.ser = open_reader()
+        self.scheduler = AntennaScheduler(self.ser, port_powers, adaptive=True)
+        self.pose_source = SocketPoseSource(pose_url).start()
+        self.max_gap = max_gap
+        self.running = True
+        self.dropped = 0
+
+    def reads(self):
+        track = self.pose_source.track
+        current_pose = None
+        while self.running:
+            latest = track.latest()
+            if latest is not current_pose:
+                self.scheduler.new_pose()
+                current_pose = latest
+            try:
+                tags = self.scheduler.run_cycle()
+            except Exception as e:
+                print(f"Error during measurement: {e}")
+                continue
+            for tag in tags:
+                pose = track.nearest(tag['Timestamp'], self.max_gap)
+                if pose is None:
+                    self.dropped += 1
+                    continue
+                tag['Pose'] = pose._replace(timestamp=None)
+                yield tag
+
+    def stop(self):
+        self.running = False
+        self.pose_source.stop()
+        self.ser.close()
+
+def localize_job(tag_id, measurements, read_counts=None):
+    """Worker process entry point: localize one tag and return a picklable result."""
+    start = time.perf_counter()
+    intersection, centroid = localize(measurements, read_counts)
+    return {
+        'Tag ID': tag_id,
+        'centroid': centroid,
+        'area': intersection.area if intersection is not None else 0.0,
+        'intersection': intersection,
+        'locations': len(measurements),
+        'compute time': time.perf_counter() - start
+    }
+
+class JsonLinesSink:
+    """Appends every estimate as one JSON object per line."""
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def update(self, estimate):
+        self.file.write(json.dumps(estimate) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SocketSink:
+    """Sends every estimate as a JSON line to 'udp://host:port' or 'tcp://host:port'."""
+
+    def __init__(self, url):
+        scheme, address = url.split('://', 1)
+        host, port = address.rsplit(':', 1)
+        if scheme not in ('udp', 'tcp'):
+            raise ValueError(f"Unsupported sink socket scheme: {scheme}")
+        self.address = (host, int(port))
+        if scheme == 'udp':
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect(self.address)
+        else:
+            self.sock = socket.create_connection(self.address)
+
+    def update(self, estimate):
+        try:
+            self.sock.sendall((json.dumps(estimate) + '\n').encode('utf-8'))
+        except OSError as e:
+            print(f"Error sending estimate: {e}")
+
+    def close(self):
+        self.sock.close()
+
+class MapSink:
+    """Live matplotlib map of the estimated tag positions and their intersection areas."""
+
+    def __init__(self, tag_locations=None, limits=(-0.5, 4)):
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        plt.ion()
+        self.fig, self.ax = plt.subplots(figsize=(10, 10))
+        self.limits = limits
+        self.tag_locations = tag_locations or {}
+        self.estimates = {}
+
+    def update(self, estimate, intersection=None):
+        self.estimates[estimate['Tag ID']] = (estimate, intersection)
+        ax = self.ax
+        ax.clear()
+        colors = self.plt.cm.rainbow(np.linspace(0, 1, max(1, len(self.estimates))))
+        for color, (tag_id, (tag_estimate, tag_intersection)) in zip(colors, self.estimates.items()):
+            if tag_intersection is not None and not tag_intersection.is_empty:
+                polygons = tag_intersection.geoms if hasattr(tag_intersection, 'geoms') else [tag_intersection]
+                for polygon in polygons:
+                    if polygon.geom_type == 'Polygon':
+                        x, y = polygon.exterior.xy
+                        ax.fill(x, y, alpha=0.2, color=color)
+            if tag_estimate['X [m]'] is not None:
+                ax.plot(tag_estimate['X [m]'], tag_estimate['Y [m]'], 'o', color=color, markersize=10)
+                ax.text(tag_estimate['X [m]'], tag_estimate['Y [m]'], f"Est. {tag_id}\n({tag_estimate['Locations']} locations)",
+                        fontsize=8, ha='left', va='bottom', color=color)
+            if tag_id in self.tag_locations:
+                tag_x, tag_y = self.tag_locations[tag_id]
+                ax.plot(tag_x, tag_y, 'k+', markersize=12, markeredgewidth=2)
+        ax.plot(0, 0, 'r+', markersize=10)
+        ax.set_xlim(*self.limits)
+        ax.set_ylim(*self.limits)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.set_xlabel('X Distance (meters)')
+        ax.set_ylabel('Y Distance (meters)')
+        ax.set_title(f'Live Tag Estimates ({len(self.estimates)} tags)')
+        self.plt.pause(0.001)
+
+    def close(self):
+        self.plt.ioff()
+        self.plt.show()
+
+def latency_summary(latencies):
+    """Count, mean, median, 95th percentile and maximum of a list of latencies in seconds."""
+    if not latencies:
+        return "no estimates"
+    values = np.array(latencies)
+    return (f"{len(values)} estimates, mean {values.mean() * 1000:.0f} ms, median {np.median(values) * 1000:.0f} ms, "
+            f"p95 {np.percentile(values, 95) * 1000:.0f} ms, max {values.max() * 1000:.0f} ms")
+
+class LivePipeline:
+    """
+    Acquisition -> per-pose aggregation -> localization -> sinks, in one process.
+
+    The stages are connected by bounded queues, so a slow stage holds back
+    the one before it instead of letting memory grow. Reads are aggregated
+    per (tag, pose); when the antenna moves to a new pose the finished pose
+    becomes one (mean RSSI, x, y, rotation) measurement per tag, as in
+    `pose_measurements`, and every tag that got a new measurement is
+    localized again in a worker process. While a tag is being localized,
+    newer requests for it are coalesced into one.
+
+    Two latencies are reported per estimate: from the last read of the pose
+    that triggered it (includes the time until the pose is known to be
+    finished) and from the moment the pose was closed (aggregation,
+    queueing and localization only).
+    """
+
+    def __init__(self, source, sinks, workers=2, queue_size=1000, tag_locations=None, max_locations=None,
+                 read_evidence=False):
+        """
+        Args:
+        source: Object with a `reads()` generator and `stop()`, e.g. ReplaySource or ReaderSource.
+        sinks (list): Objects with `update(estimate)` and `close()`.
+        workers (int): Localization worker processes.
+        queue_size (int): Capacity of the read and job queues.
+        tag_locations (dict): Tag ID -> (x, y) ground truth, adds the estimate error when known.
+        max_locations (int): Localize each tag from at most this many most recent locations (None: all).
+        read_evidence (bool): Tighten each band for the number of reads of the tag at that pose.
+        """
+        self.source = source
+        self.sinks = sinks
+        self.workers = workers
+        self.read_queue = queue.Queue(maxsize=queue_size)
+        self.job_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue()
+        self.tag_locations = tag_locations or {}
+        self.max_locations = max_locations
+        self.read_evidence = read_evidence
+        self.measurements = {}
+        # Reentrant: a job that is already finished runs its done callback while the lock is held
+        self.lock = threading.RLock()
+        self.in_flight = set()
+        self.pending = {}
+        self.outstanding = 0
+        self.jobs_done = threading.Event()
+        self.finished_dispatching = False
+        self.read_latencies = []
+        self.processing_latencies = []
+        self.reads = 0
+        self.backpressure = 0
+
+    def _acquire(self):
+        try:
+            for read in self.source.reads():
+                self.reads += 1
+                try:
+                    self.read_queue.put_nowait(read)
+                except queue.Full:
+                    self.backpressure += 1
+                    self.read_queue.put(read)
+        finally:
+            self.read_queue.put(END)
+
+    def _aggregate(self):
+        pose = None
+        stats = {}
+        last_read = {}
+        while True:
+            read = self.read_queue.get()
+            if read is END or (pose is not None and read['Pose'] != pose):
+                closed = time.time()
+                for tag_id, tag_stats in stats.items():
+                    history = self.measurements.setdefault(tag_id, [])
+                    history.append(((tag_stats.mean, pose.x, pose.y, pose.rot_z), tag_stats.count))
+                    if len(history) >= 2:
+                        recent = history[-self.max_locations:] if self.max_locations else history
+                        measurements = [measurement for measurement, _ in recent]
+                        read_counts = [count for _, count in recent] if self.read_evidence else None
+                        self.job_queue.put((tag_id, measurements, read_counts, last_read[tag_id], closed))
+                stats = {}
+                last_read = {}
+            if read is END:
+                self.job_queue.put(END)
+                return
+            pose = read['Pose']
+            tag_stats = stats.get(read['Tag ID'])
+            if tag_stats is None:
+                tag_stats = stats[read['Tag ID']] = RunningStats()
+            tag_stats.add(read['RSSI'])
+            last_read[read['Tag ID']] = read['Timestamp']
+
+    def _dispatch(self, pool):
+        while True:
+            job = self.job_queue.get()
+            if job is END:
+                with self.lock:
+                    self.finished_dispatching = True
+                    if self.outstanding == 0:
+                        self.jobs_done.set()
+                return
+            with self.lock:
+                if job[0] in self.in_flight:
+                    # Only the newest request per tag matters; older ones are superseded
+                    self.pending[job[0]] = job
+                    continue
+                self._submit(pool, job)
+
+    def _submit(self, pool, job):
+        """Submit a localization job; call with the lock held."""
+        tag_id, measurements, read_counts, read_time, closed = job
+        self.in_flight.add(tag_id)
+        self.outstanding += 1
+        future = pool.submit(localize_job, tag_id, measurements, read_counts)
+        future.add_done_callback(lambda f, tag_id=tag_id: self._done(pool, f, tag_id, read_time, closed))
+
+    def _done(self, pool, future, tag_id, read_time, closed):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error during localization: {e}")
+            result = None
+        now = time.time()
+        if result is not None:
+            self.result_queue.put((result, now - read_time, now - closed))
+        with self.lock:
+            self.outstanding -= 1
+            # A failed job still frees its tag, so a pending request for it is localized next
+            self.in_flight.discard(tag_id)
+            if tag_id in self.pending:
+                self._submit(pool, self.pending.pop(tag_id))
+            if self.outstanding == 0 and self.finished_dispatching:
+                self.jobs_done.set()
+
+    def _publish(self, result, read_latency, processing_latency):
+        self.read_latencies.append(read_latency)
+        self.processing_latencies.append(processing_latency)
+        centroid = result['centroid']
+        estimate = {
+            'Tag ID': result['Tag ID'],
+            'X [m]': centroid[0] if centroid else None,
+            'Y [m]': centroid[1] if centroid else None,
+            'Area [m2]': result['area'],
+            'Locations': result['locations'],
+            'Read Latency [s]': read_latency,
+            'Processing Latency [s]': processing_latency,
+            'Compute Time [s]': result['compute time'],
+            'Timestamp': time.time()
+        }
+        if centroid and result['Tag ID'] in self.tag_locations:
+            tag_x, tag_y = self.tag_locations[result['Tag ID']]
+            estimate['Error [m]'] = math.hypot(centroid[0] - tag_x, centroid[1] - tag_y)
+        for sink in self.sinks:
+            if isinstance(sink, MapSink):
+                sink.update(estimate, result['intersection'])
+            else:
+                sink.update(estimate)
+        location = f"({centroid[0]:.2f}, {centroid[1]:.2f})" if centroid else "no intersection"
+        error = f", error {estimate['Error [m]']:.2f} m" if 'Error [m]' in estimate else ''
+        print(f"Tag {result['Tag ID']}: {location} from {result['locations']} locations{error}, "
+              f"latency {read_latency * 1000:.0f} ms ({processing_latency * 1000:.0f} ms after pose close)")
+
+    def run(self):
+        """Run until the source is exhausted or Ctrl+C; sinks are driven from the calling thread."""
+        # Build the pattern atlas once here, so the workers only load it
+        load_atlas()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=load_atlas) as pool:
+            threads = [threading.Thread(target=self._acquire, daemon=True),
+                       threading.Thread(target=self._aggregate, daemon=True),
+                       threading.Thread(target=self._dispatch, args=(pool,), daemon=True)]
+            for thread in threads:
+                thread.start()
+            try:
+                while not (self.jobs_done.is_set() and self.result_queue.empty()):
+                    try:
+                        self._publish(*self.result_queue.get(timeout=0.1))
+                    except queue.Empty:
+                        continue
+            except KeyboardInterrupt:
+                print("\nPipeline stopped by user.")
+                self.source.stop()
+                pool.shutdown(wait=False, cancel_futures=True)
+        for sink in self.sinks:
+            sink.close()
+        print(f"\n{self.reads} reads, {len(self.measurements)} tags, "
+              f"read queue full {self.backpressure} times")
+        print(f"Read to estimate: {latency_summary(self.read_latencies)}")
+        print(f"Pose close to estimate: {latency_summary(self.processing_latencies)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Live RFID tag localization pipeline.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', help='Replay a logger file (.xlsx or .rfid) as a live read stream')
+    source.add_argument('--pose-socket', help='Read from the TSL reader, with robot poses from e.g. udp://0.0.0.0:5005')
+    parser.add_argument('--interval', type=float, default=0.01, help='Seconds between replayed reads')
+    parser.add_argument('--speed', type=float, help='Replay at the recorded timing, this many times faster')
+    parser.add_argument('--ports', default='1:3000', help='Antenna ports and powers for the reader, e.g. "1:2500,2:2700"')
+    parser.add_argument('--max-pose-gap', type=float, default=0.5,
+                        help='Largest time difference [s] between a read and its pose')
+    parser.add_argument('--out', help='Append the estimates to this JSON-lines file')
+    parser.add_argument('--udp', help='Send the estimates as JSON lines to udp://host:port (or tcp://)')
+    parser.add_argument('--map', action='store_true', help='Show a live map of the estimates')
+    parser.add_argument('--tags', help='CSV/JSON-lines file with the Tag ID, X and Y of every tag')
+    parser.add_argument('--workers', type=int, default=2, help='Localization worker processes')
+    parser.add_argument('--queue-size', type=int, default=1000, help='Capacity of the pipeline queues')
+    parser.add_argument('--read-evidence', action='store_true',
+                        help='Tighten each band for the number of reads of the tag at that pose')
+    parser.add_argument('--max-locations', type=int, help='Localize from at most this many most recent locations')
+    args = parser.parse_args()
+
+    if args.replay:
+        read_source = ReplaySource(args.replay, interval=args.interval, speed=args.speed)
+        tag_locations = {str(tag_id): (group['Tag X [m]'].iloc[0], group['Tag Y [m]'].iloc[0])
+                         for tag_id, group in read_source.df.groupby('Tag ID')
+                         if not group['Tag X [m]'].isna().all()}
+    else:
+        from antenna_scheduler import parse_port_powers
+        read_source = ReaderSource(parse_port_powers(args.ports, default_power=3000), args.pose_socket,
+                                   max_gap=args.max_pose_gap)
+        tag_locations = {}
+    if args.tags:
+        tag_locations.update(load_tag_locations(args.tags))
+
+    sinks = []
+    if args.out:
+        sinks.append(JsonLinesSink(args.out))
+    if args.udp:
+        sinks.append(SocketSink(args.udp))
+    if args.map:
+        sinks.append(MapSink(tag_locations))
+
+    LivePipeline(read_source, sinks, workers=args.workers, queue_size=args.queue_size,
+                 tag_locations=tag_locations, max_locations=args.max_locations,
+                 read_evidence=args.read_evidence).run()
+
+if __name__ == "__main__":
+    main()
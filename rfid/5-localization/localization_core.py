@@ -0,0 +1,531 @@
+import os
+import sys
+import time
+from math import comb
+import numpy as np
+import pandas as pd
+import shapely
+from itertools import combinations
+from scipy.stats import norm
+from shapely.geometry import Polygon as ShapelyPolygon
+
+# Contours come from the antenna pattern stage's precomputed atlas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '3-antenna-pattern'))
+from pattern_atlas import LOCALIZATION_MODEL, load_atlas, rssi_angle, rssi_distance
+from pattern_raster import load_raster
+
+# Band widths come from the error model stage's noise model artifact
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4-error-model'))
+from noise_map import load_noise_map
+from noise_model import load_noise_model
+
+# -------------------
+# Constants
+# -------------------
+ALPHA = 90  # Angle in degrees
+NOISE_MODEL = load_noise_model()
+RMS_MARGIN = NOISE_MODEL.margin  # Fixed model margins of get_rms_rssi, not reduced by averaging [dB]
+MAX_EFFECTIVE_READS = 4  # Reads of one location beyond which averaging no longer narrows the band (they share the multipath)
+CONSENSUS_SAMPLE = 2  # Locations per candidate subset of the consensus search
+CONSENSUS_ITERATIONS = 300  # Candidate subsets per tag at most
+CONSENSUS_TIME = 0.5  # Time budget of the consensus search per tag [s]
+COARSE_CELL = 0.05  # Cell size of the coarse depth raster of the coarse-to-fine search [m]
+SIMPLIFY_TOLERANCE = 0.001  # Clipped bands are simplified to this tolerance before the exact search [m]
+DEPTH_SLACK = 1  # Cells this many bands shallower than the deepest one still belong to the search window
+POSE_COLUMNS = ['Antenna X [m]', 'Antenna Y [m]', 'Antenna Rot Z [deg]']  # Columns that identify a pose of the logger
+
+# -------------------
+# Utility Functions
+# -------------------
+def get_rms_rssi(rssi):
+    """
+    Band half-width [dB] for RSSI values (scalar or array): the fitted spread plus RMS_MARGIN.
+
+    Evaluated from the noise model of the error model stage (by default
+    0.0000330307 * exp(-0.154 * RSSI) + 0.9145, plus 1.5 + 2 dB of margins).
+    """
+    return NOISE_MODEL.half_width(rssi)
+
+def get_rms_rssi_reads(rssi, reads):
+    """
+    Band half-width for the mean RSSI of `reads` reads.
+
+    The fitted spread of get_rms_rssi shrinks with the square root of the
+    number of reads averaged; the fixed margins cover model error and do
+    not. Consecutive reads are correlated, so at most MAX_EFFECTIVE_READS
+    count.
+    """
+    spread = get_rms_rssi(rssi) - RMS_MARGIN
+    return spread / np.sqrt(np.clip(reads, 1, MAX_EFFECTIVE_READS)) + RMS_MARGIN
+
+def get_rms_rssi_map(rssi, distance, azimuth, reads=None):
+    """
+    Band half-width [dB] of an RSSI value at antenna-frame points (range [m], azimuth [deg]), from the noise map.
+
+    The noise map of the error model stage scales the fitted spread and the
+    model margin of get_rms_rssi per (range, azimuth) cell: narrower where
+    the reads were clean, wider where they were noisy or off the pattern
+    model. With `reads` the spread is tightened as in get_rms_rssi_reads.
+    """
+    read_factor, model_factor = load_noise_map().factors(distance, azimuth)
+    spread = NOISE_MODEL.spread(rssi) * read_factor
+    if reads is not None:
+        spread = spread / np.sqrt(np.clip(reads, 1, MAX_EFFECTIVE_READS))
+    model_margin = NOISE_MODEL.margins['model']
+    return spread + model_margin * model_factor + RMS_MARGIN - model_margin
+
+def censored_mean_rssi(rssi_mean, read_ratio):
+    """
+    Correct the mean RSSI of a tag that was not read in every inventory round.
+
+    Reads weaker than the reader sensitivity are lost, so the mean of the
+    reads that did arrive is too high. With a Gaussian read spread and the
+    fraction `read_ratio` of rounds in which the tag was read, the threshold
+    lies at z = ppf(1 - read_ratio) and the mean of the surviving reads
+    overestimates the true mean by sigma * pdf(z) / read_ratio.
+    """
+    read_ratio = np.clip(read_ratio, 0.05, 1.0)
+    if read_ratio >= 1.0:
+        return rssi_mean
+    sigma = NOISE_MODEL.std(rssi_mean)
+    z = norm.ppf(1.0 - read_ratio)
+    return float(rssi_mean - sigma * norm.pdf(z) / read_ratio)
+
+def rotate_points(x, y, angle_deg):
+    """Rotate points (x, y) by angle_deg around the origin."""
+    angle_rad = np.radians(-angle_deg)
+    x_rot = x * np.cos(angle_rad) - y * np.sin(angle_rad)
+    y_rot = x * np.sin(angle_rad) + y * np.cos(angle_rad)
+    return x_rot, y_rot
+
+def translate_points(x, y, ant_x, ant_y):
+    """Translate points (x, y) to antenna location (ant_x, ant_y)."""
+    return x + ant_x, y + ant_y
+
+def place_curve(distances, ant_x, ant_y, angle_deg, angles_rad):
+    """Contour distances along the azimuths as points around an antenna location (non-positive distances dropped)."""
+    to_keep = distances > 0
+    angles_rad_limited = angles_rad[to_keep]
+    distances_limited = distances[to_keep]
+    x = distances_limited * np.sin(angles_rad_limited)
+    y = distances_limited * np.cos(angles_rad_limited)
+    x_rot, y_rot = rotate_points(x, y, angle_deg)
+    return translate_points(x_rot, y_rot, ant_x, ant_y)
+
+def signal_curve(rssi_val, ant_x, ant_y, angle_deg, angles, angles_rad):
+    """
+    Calculate the curve of constant RSSI around an antenna location.
+
+    The distances along the azimuths are looked up in the pattern atlas
+    (interpolated between its levels) instead of being solved point by point.
+    """
+    distances = load_atlas(LOCALIZATION_MODEL).contour(rssi_val, angles)
+    return place_curve(distances, ant_x, ant_y, angle_deg, angles_rad)
+
+def place_points(points, ant_x, ant_y, angle_deg):
+    """Antenna-frame (n, 2) contour points rotated and moved to an antenna location."""
+    x_rot, y_rot = rotate_points(points[:, 0], points[:, 1], angle_deg)
+    return translate_points(x_rot, y_rot, ant_x, ant_y)
+
+def sensitivity_band(rssi_received, ant_x, ant_y, beta, reads=None, raster=False, noise_map=False):
+    """
+    Upper, lower and nominal RSSI curves of one antenna location (x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal).
+
+    The three contours are looked up in the pattern atlas in one pass; with
+    `raster` they are extracted from the RSSI field raster by marching squares instead.
+    With `reads` the band is tightened for the number of reads averaged (get_rms_rssi_reads).
+    With `noise_map` the band width varies along the band: at every azimuth it
+    is taken from the noise map cell of the nominal contour (get_rms_rssi_map).
+    """
+    angles = np.linspace(-ALPHA, ALPHA, int(ALPHA * 2 + 1))
+    angles_rad = np.radians(angles)
+    if noise_map:
+        atlas = load_atlas(LOCALIZATION_MODEL)
+        nominal = atlas.contour(rssi_received, angles)
+        rms_rssi = get_rms_rssi_map(rssi_received, nominal, angles, reads)
+        upper, lower = atlas.varying_contours([rssi_received + rms_rssi, rssi_received - rms_rssi], angles)
+        x_upper, y_upper = place_curve(upper, ant_x, ant_y, beta, angles_rad)
+        x_lower, y_lower = place_curve(lower, ant_x, ant_y, beta, angles_rad)
+        x_nominal, y_nominal = place_curve(nominal, ant_x, ant_y, beta, angles_rad)
+        return x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal
+    rms_rssi = get_rms_rssi(rssi_received) if reads is None else get_rms_rssi_reads(rssi_received, reads)
+    if raster:
+        upper, lower, nominal = load_raster(LOCALIZATION_MODEL).band(rssi_received, rms_rssi)
+        x_upper, y_upper = place_points(upper, ant_x, ant_y, beta)
+        x_lower, y_lower = place_points(lower, ant_x, ant_y, beta)
+        x_nominal, y_nominal = place_points(nominal, ant_x, ant_y, beta)
+        return x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal
+    levels = [rssi_received + rms_rssi, rssi_received - rms_rssi, rssi_received]
+    curves = load_atlas(LOCALIZATION_MODEL).contours(levels, angles)
+    x_upper, y_upper = place_curve(curves[0], ant_x, ant_y, beta, angles_rad)
+    x_lower, y_lower = place_curve(curves[1], ant_x, ant_y, beta, angles_rad)
+    x_nominal, y_nominal = place_curve(curves[2], ant_x, ant_y, beta, angles_rad)
+    return x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal
+
+def make_polygon_points(x_upper, y_upper, x_lower, y_lower):
+    """Helper to create polygon points for intersection/hatching."""
+    return np.column_stack((
+        np.concatenate([x_upper, x_lower[::-1]]),
+        np.concatenate([y_upper, y_lower[::-1]])
+    ))
+
+def band_polygon(curves):
+    """Shapely polygon of the area between the upper and lower curve of a sensitivity band."""
+    x_upper, y_upper, x_lower, y_lower, _, _ = curves
+    return ShapelyPolygon(make_polygon_points(x_upper, y_upper, x_lower, y_lower))
+
+def location_features(df):
+    """
+    Per antenna location of a tag: mean RSSI, pose of the strongest read and read statistics.
+
+    Locations are told apart by their distance from the origin. 'Read Count'
+    is always available; 'Read Ratio' (fraction of inventory rounds in which
+    the tag was read) and 'Read Rate [1/s]' need the 'Rounds', 'Timestamp'
+    and 'Dwell [s]' columns the tag logger writes, and are NaN otherwise.
+    Several poses (e.g. rotations) can share a distance; their rounds and
+    dwell times are added up, as each pose was measured in a dwell of its own.
+    """
+    has_rounds = 'Rounds' in df and 'Timestamp' in df and df['Rounds'].notna().any()
+    has_dwell = 'Dwell [s]' in df and df['Dwell [s]'].notna().any()
+    rows = []
+    for distance in df['Distance [m]'].unique():
+        distance_data = df[df['Distance [m]'] == distance]
+        max_rssi_row = distance_data.loc[distance_data['RSSI'].idxmax()]
+        read_count = len(distance_data)
+        read_ratio = np.nan
+        if has_rounds:
+            per_port_and_pose = distance_data.groupby(['Antenna'] + POSE_COLUMNS)
+            rounds = per_port_and_pose['Rounds'].first().sum()
+            # All reads of one inventory round share its timestamp
+            rounds_read = per_port_and_pose['Timestamp'].nunique().sum()
+            read_ratio = rounds_read / rounds if rounds > 0 else np.nan
+        dwell = distance_data.groupby(POSE_COLUMNS)['Dwell [s]'].first().sum() if has_dwell else np.nan
+        rows.append({
+            'Distance [m]': distance,
+            'RSSI': distance_data['RSSI'].mean(),
+            'Antenna X [m]': max_rssi_row['Antenna X [m]'],
+            'Antenna Y [m]': max_rssi_row['Antenna Y [m]'],
+            'Antenna Rot Z [deg]': max_rssi_row['Antenna Rot Z [deg]'],
+            'Read Count': read_count,
+            'Read Ratio': read_ratio,
+            'Read Rate [1/s]': read_count / dwell if dwell and dwell > 0 else np.nan
+        })
+    return pd.DataFrame(rows)
+
+def pose_measurements(df, read_evidence=False):
+    """
+    One (rssi, ant_x, ant_y, beta) measurement per antenna location of a tag.
+
+    The RSSI is the mean over the location and the pose is taken from its
+    strongest read. With `read_evidence` the mean RSSI is corrected for
+    missed reads where the read ratio is known (censored_mean_rssi) and the
+    read counts are returned as well, for the band tightening in `localize`.
+    """
+    features = location_features(df)
+    measurements = []
+    for row in features.to_dict('records'):
+        rssi = row['RSSI']
+        if read_evidence and not np.isnan(row['Read Ratio']):
+            rssi = censored_mean_rssi(rssi, row['Read Ratio'])
+        measurements.append((rssi, row['Antenna X [m]'], row['Antenna Y [m]'], row['Antenna Rot Z [deg]']))
+    if read_evidence:
+        return measurements, features['Read Count'].tolist()
+    return measurements
+
+def find_most_common_intersection(shapely_polygons):
+    """Find the most common intersection area among polygons."""
+    if len(shapely_polygons) < 2:
+        return None
+    intersection_regions = []
+    for num_polygons in range(len(shapely_polygons), 1, -1):
+        for poly_indices in combinations(range(len(shapely_polygons)), num_polygons):
+            current_polygons = [shapely_polygons[i] for i in poly_indices]
+            current_intersection = current_polygons[0]
+            for poly in current_polygons[1:]:
+                if current_intersection.is_empty:
+                    break
+                current_intersection = current_intersection.intersection(poly)
+            if not current_intersection.is_empty:
+                intersection_regions.append({
+                    'area': current_intersection,
+                    'count': num_polygons,
+                    'indices': poly_indices
+                })
+        if intersection_regions:
+            break
+    if not intersection_regions:
+        return None
+    most_common = max(intersection_regions, key=lambda x: x['count'])
+    core_area = most_common['area']
+    max_intersection_area = 0
+    best_area_index = most_common['indices'][0]
+    for i in most_common['indices']:
+        intersection = shapely_polygons[i].intersection(core_area)
+        if not intersection.is_empty:
+            area = intersection.area
+            if area > max_intersection_area:
+                max_intersection_area = area
+                best_area_index = i
+    current_intersection = shapely_polygons[best_area_index]
+    used_indices = {best_area_index}
+    remaining_polygons = [(i, poly) for i, poly in enumerate(shapely_polygons) if i not in used_indices]
+    while remaining_polygons and not current_intersection.is_empty:
+        best_next = None
+        best_area = 0
+        best_index = -1
+        for i, poly in remaining_polygons:
+            intersection = poly.intersection(current_intersection)
+            if not intersection.is_empty and intersection.area > best_area:
+                best_area = intersection.area
+                best_next = poly
+                best_index = i
+        if best_next is None:
+            break
+        current_intersection = current_intersection.intersection(best_next)
+        used_indices.add(best_index)
+        remaining_polygons = [(i, poly) for i, poly in remaining_polygons if i not in used_indices]
+    return current_intersection
+
+def bounding_box_overlaps(polygons):
+    """(n, n) matrix of the polygons whose bounding boxes overlap; polygons whose boxes do not cannot intersect."""
+    min_x, min_y, max_x, max_y = shapely.bounds(polygons).T
+    return ((min_x[:, None] <= max_x[None, :]) & (min_x[None, :] <= max_x[:, None]) &
+            (min_y[:, None] <= max_y[None, :]) & (min_y[None, :] <= max_y[:, None]))
+
+def sample_subset(overlaps, size, rng):
+    """Random subset of `size` polygons whose bounding boxes all overlap each other (None if the draw gets stuck)."""
+    candidates = np.ones(len(overlaps), dtype=bool)
+    subset = []
+    for _ in range(size):
+        choices = np.flatnonzero(candidates)
+        if len(choices) == 0:
+            return None
+        index = rng.choice(choices)
+        subset.append(index)
+        candidates &= overlaps[index]
+        candidates[subset] = False
+    return tuple(sorted(subset))
+
+def grow_consensus(polygons, bounds, inliers):
+    """
+    Intersection of a consensus set, grown by the other polygons that still intersect it (largest overlap first).
+
+    Returns:
+    region: The intersection.
+    count (int): Polygons in the grown set.
+    """
+    region = shapely.intersection_all(polygons[inliers])
+    remaining = set(np.flatnonzero(~inliers))
+    count = int(inliers.sum())
+    while remaining:
+        min_x, min_y, max_x, max_y = region.bounds
+        candidates = [i for i in remaining if bounds[i, 0] <= max_x and min_x <= bounds[i, 2] and
+                      bounds[i, 1] <= max_y and min_y <= bounds[i, 3]]
+        if not candidates:
+            break
+        overlaps_region = shapely.intersection(polygons[candidates], region)
+        areas = shapely.area(overlaps_region)
+        if areas.max() <= 0:
+            break
+        best = int(np.argmax(areas))
+        region = overlaps_region[best]
+        remaining.discard(candidates[best])
+        count += 1
+    return region, count
+
+def consensus_intersection(shapely_polygons, sample_size=CONSENSUS_SAMPLE, max_iterations=CONSENSUS_ITERATIONS,
+                           time_budget=CONSENSUS_TIME, seed=0):
+    """
+    Intersection of the largest consistent set of polygons, robust to outlier bands (RANSAC-style).
+
+    Small subsets of `sample_size` locations are drawn (all of them when
+    there are no more than `max_iterations`); the intersection of a subset is
+    a candidate region and is scored by how many polygons contain a point of
+    it. Subsets are only drawn among polygons whose bounding boxes overlap
+    (precomputed matrix), and scoring tests the point against the boxes before
+    the polygons, so the search stays fast with many locations. It stops after
+    `max_iterations` subsets or `time_budget` seconds. The polygons containing
+    the best candidate form a consensus set, which the other polygons join
+    as long as they still intersect its region (grow_consensus); of equally
+    good sets the one with the smallest region wins. A bad band (reflection,
+    occlusion) that contradicts the consensus is left out instead of pulling
+    the estimate into a wrong subset.
+
+    Returns:
+    The intersection, or None when there are fewer than two polygons or no two of them intersect.
+    """
+    if len(shapely_polygons) < 2:
+        return None
+    polygons = np.empty(len(shapely_polygons), dtype=object)
+    polygons[:] = shapely_polygons
+    shapely.prepare(polygons)
+    bounds = shapely.bounds(polygons)
+    overlaps = bounding_box_overlaps(polygons)
+    if comb(len(polygons), sample_size) <= max_iterations:
+        subsets = combinations(range(len(polygons)), sample_size)
+    else:
+        rng = np.random.default_rng(seed)
+        subsets = (sample_subset(overlaps, sample_size, rng) for _ in range(max_iterations))
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    tried = set()
+    best_score = 0
+    best_sets = {}
+    for subset in subsets:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if subset is None or subset in tried or not overlaps[np.ix_(subset, subset)].all():
+            continue
+        tried.add(subset)
+        region = shapely.intersection_all(polygons[list(subset)])
+        if region.is_empty:
+            continue
+        point = region.representative_point()
+        in_box = ((bounds[:, 0] <= point.x) & (point.x <= bounds[:, 2]) &
+                  (bounds[:, 1] <= point.y) & (point.y <= bounds[:, 3]))
+        inliers = np.zeros(len(polygons), dtype=bool)
+        inliers[in_box] = shapely.contains_xy(polygons[in_box], point.x, point.y)
+        inliers[list(subset)] = True
+        score = int(inliers.sum())
+        if score > best_score:
+            best_score = score
+            best_sets = {}
+        if score == best_score:
+            best_sets[inliers.tobytes()] = inliers
+    if not best_sets:
+        return None
+    grown = [grow_consensus(polygons, bounds, inliers) for inliers in best_sets.values()]
+    region, _ = min(grown, key=lambda result: (-result[1], result[0].area))
+    return region
+
+def depth_raster(polygons, cell=COARSE_CELL, depth_slack=DEPTH_SLACK):
+    """
+    Coarse raster of which polygons cover the centre of every cell, over their bounding boxes.
+
+    A bounding-box vote bounds the depth of every cell from above, so the
+    polygons are only tested at the cells whose bound reaches the deepest
+    cell found minus `depth_slack`; the other cells stay uncovered.
+
+    Returns:
+    xs, ys (np.ndarray): Cell centres.
+    cover (np.ndarray): (polygons, len(ys), len(xs)) whether a polygon covers a cell centre.
+    """
+    bounds = shapely.bounds(polygons)
+    xs = np.arange(bounds[:, 0].min() + cell / 2, bounds[:, 2].max(), cell)
+    ys = np.arange(bounds[:, 1].min() + cell / 2, bounds[:, 3].max(), cell)
+    boxes = [(slice(np.searchsorted(ys, min_y), np.searchsorted(ys, max_y, side='right')),
+              slice(np.searchsorted(xs, min_x), np.searchsorted(xs, max_x, side='right')))
+             for min_x, min_y, max_x, max_y in bounds]
+    upper = np.zeros((len(ys), len(xs)), dtype=int)
+    for rows, columns in boxes:
+        upper[rows, columns] += 1
+    cover = np.zeros((len(polygons), len(ys), len(xs)), dtype=bool)
+    tested = np.zeros(upper.shape, dtype=bool)
+    threshold = max(upper.max(initial=0) - depth_slack, 2)
+    while True:
+        pending = (upper >= threshold) & ~tested
+        for polygon, (rows, columns), covered in zip(polygons, boxes, cover):
+            row, column = np.nonzero(pending[rows, columns])
+            row += rows.start
+            column += columns.start
+            covered[row, column] = shapely.contains_xy(polygon, xs[column], ys[row])
+        tested |= pending
+        # Untested cells are shallower than the threshold; lower it until that is below the deepest cell too
+        deepest = cover.sum(axis=0).max(initial=0)
+        if threshold <= max(deepest - depth_slack, 2):
+            return xs, ys, cover
+        threshold = max(deepest - depth_slack, 2)
+
+def coarse_to_fine_intersection(shapely_polygons, cell=COARSE_CELL, tolerance=SIMPLIFY_TOLERANCE,
+                                depth_slack=DEPTH_SLACK):
+    """
+    Most common intersection of polygons, searched exactly only in a small window found on a coarse raster.
+
+    The polygons are rasterised at `cell` resolution (depth_raster). The
+    window is the bounding box of the cells at most `depth_slack` polygons
+    shallower than the deepest one, plus one cell on every side, and the
+    exact stage only sees the polygons clipped to it and simplified to
+    `tolerance`. Instead of trying subsets of polygons, it starts from the
+    distinct sets of polygons covering those cells: each set is intersected
+    in one call, then extended with the other polygons that still overlap
+    it, largest overlap first (as find_most_common_intersection does), so a
+    deeper region thinner than a cell next to them is found as well. The
+    deepest region wins, the smaller one on a tie (as in
+    consensus_intersection). When no cell centre is covered twice the full
+    find_most_common_intersection runs instead.
+    """
+    if len(shapely_polygons) < 2:
+        return None
+    polygons = np.empty(len(shapely_polygons), dtype=object)
+    polygons[:] = shapely_polygons
+    shapely.prepare(polygons)
+    xs, ys, cover = depth_raster(polygons, cell, depth_slack)
+    depth = cover.sum(axis=0)
+    if depth.size == 0 or depth.max() < 2:
+        return find_most_common_intersection(shapely_polygons)
+    rows, columns = np.nonzero(depth >= max(depth.max() - depth_slack, 2))
+    window = shapely.box(xs[columns].min() - cell, ys[rows].min() - cell, xs[columns].max() + cell,
+                         ys[rows].max() + cell)
+    clipped = shapely.simplify(shapely.intersection(polygons, window), tolerance)
+
+    # Distinct covering sets of the deep cells, without those contained in another one
+    sets = np.unique(cover[:, rows, columns].T, axis=0)
+    subset = (sets[:, None, :] <= sets[None, :, :]).all(axis=2)
+    contained = subset & ~subset.T
+    best = None
+    for members in sets[~contained.any(axis=1)]:
+        region = shapely.intersection_all(clipped[members])
+        members = members.copy()
+        while not region.is_empty and not members.all():
+            candidates = np.flatnonzero(~members)
+            areas = shapely.area(shapely.intersection(clipped[candidates], region))
+            if areas.max() <= 0:
+                break
+            best_index = candidates[np.argmax(areas)]
+            members[best_index] = True
+            region = region.intersection(clipped[best_index])
+        if not region.is_empty and (best is None or (members.sum(), -region.area) > (best[0], -best[1].area)):
+            best = (members.sum(), region)
+    return best[1] if best is not None else find_most_common_intersection(shapely_polygons)
+
+def search_intersection(polygons, consensus=False, coarse=False):
+    """
+    Most common intersection of the polygons with the selected search.
+
+    Args:
+    polygons (list): Shapely polygons (sensitivity bands, bearing wedges).
+    consensus (bool): Use the consensus search (consensus_intersection), which leaves out outlier polygons.
+    coarse (bool): Search coarse to fine (coarse_to_fine_intersection).
+
+    Returns:
+    Polygon: The intersection, or None when there is none.
+    """
+    if consensus:
+        return consensus_intersection(polygons)
+    if coarse:
+        return coarse_to_fine_intersection(polygons)
+    return find_most_common_intersection(polygons)
+
+def localize(measurements, read_counts=None, raster=False, noise_map=False, consensus=False, coarse=False):
+    """
+    Estimate a tag position from its (rssi, ant_x, ant_y, beta) measurements.
+
+    With `read_counts` (reads per measurement) each band is tightened for the number of reads averaged.
+    With `raster` the bands come from the RSSI field raster (marching squares) instead of the atlas.
+    With `noise_map` the band widths vary with the position in the antenna frame (get_rms_rssi_map).
+    With `consensus` the bands are combined by the consensus search (consensus_intersection), which leaves out
+    outlier bands, instead of find_most_common_intersection.
+    With `coarse` the most common intersection is searched coarse to fine (coarse_to_fine_intersection).
+
+    Returns:
+    intersection: Most common intersection of the sensitivity bands (None when there is none).
+    centroid (tuple): (x, y) of the intersection, or None.
+    """
+    if read_counts is None:
+        read_counts = [None] * len(measurements)
+    polygons = [band_polygon(sensitivity_band(*measurement, reads=reads, raster=raster, noise_map=noise_map))
+                for measurement, reads in zip(measurements, read_counts)]
+    intersection = search_intersection(polygons, consensus=consensus, coarse=coarse)
+    if intersection is None or intersection.is_empty:
+        return intersection, None
+    centroid = intersection.centroid
+    return intersection, (centroid.x, centroid.y)
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import shapely
+from localization_core import (ALPHA, MAX_EFFECTIVE_READS, NOISE_MODEL, find_most_common_intersection,
+                               get_rms_rssi, get_rms_rssi_reads, rssi_angle, rssi_distance)
+from pattern_atlas import LOCALIZATION_MODEL, load_atlas
+
+# Measured layouts can come from binary measurement files of the data extraction stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '2-data-extraction'))
+
+# -------------------
+# Constants
+# -------------------
+SENSITIVITY = -80.0  # Weakest mean RSSI of a location that is still read [dBm] (as the reader simulator)
+MAX_RANGE = 3.5  # Tags farther from the antenna are not energised [m] (calibrated range)
+DEFAULT_TRIALS = 1000
+DEFAULT_READS = 6  # Reads averaged per location (median of the archived experiment files)
+DEFAULT_MODEL_STD = 3.0  # Per-location RSSI error beyond the read noise [dB] (archived files: median |residual| 2 dB)
+CHUNK_TRIALS = 50  # Trials of one tag localized by one pool job
+
+# Monte Carlo error propagation: for a layout of tags and antenna poses, noisy mean RSSI values are drawn from
+# the error model for every trial, tag and pose at once, the band contours of all of them are looked up in the
+# pattern atlas in one batch, and the intersection search (shapely, per trial) runs in a process pool.
+
+def expected_rssi(tags, poses):
+    """
+    Noise-free RSSI of every tag at every antenna pose, as a (tags, poses) array (NaN where the tag is not read).
+
+    Same forward model as the reader simulator: rssi_distance of the range
+    plus rssi_angle of the azimuth from the antenna heading; tags behind the
+    antenna, beyond MAX_RANGE or below SENSITIVITY are not read.
+    """
+    tags = np.asarray(tags, dtype=float).reshape(-1, 2)
+    poses = np.asarray(poses, dtype=float).reshape(-1, 3)
+    dx = tags[:, 0, None] - poses[None, :, 0]
+    dy = tags[:, 1, None] - poses[None, :, 1]
+    distance = np.hypot(dx, dy)
+    phi = (np.degrees(np.arctan2(dx, dy)) - poses[None, :, 2] + 180.0) % 360.0 - 180.0
+    rssi = rssi_distance(distance) + rssi_angle(phi)
+    in_range = (np.abs(phi) <= ALPHA) & (distance <= MAX_RANGE) & (rssi >= SENSITIVITY)
+    return np.where(in_range, rssi, np.nan)
+
+def simulate_rssi(tags, poses, trials, reads=DEFAULT_READS, model_std=DEFAULT_MODEL_STD, seed=None):
+    """
+    Noisy mean RSSI of every trial, tag and pose, as a (trials, tags, poses) array (NaN where not read).
+
+    The read noise is the std per read of the noise model, averaged over
+    `reads` reads of which at most MAX_EFFECTIVE_READS are independent.
+    `model_std` [dB] adds a Gaussian error per location that averaging does
+    not remove (multipath, pattern model). Locations whose noisy mean falls below SENSITIVITY are lost.
+    """
+    rng = np.random.default_rng(seed)
+    expected = expected_rssi(tags, poses)
+    read_std = NOISE_MODEL.std(np.nan_to_num(expected, nan=SENSITIVITY))
+    std = np.hypot(read_std / np.sqrt(np.clip(reads, 1, MAX_EFFECTIVE_READS)), model_std)
+    rssi = expected + rng.standard_normal((trials,) + expected.shape) * std
+    return np.where(rssi >= SENSITIVITY, rssi, np.nan)
+
+def band_polygons(rssi, poses, reads=None):
+    """
+    Sensitivity band polygons of many measurements at once (NaN RSSI values are skipped).
+
+    The upper and lower contour of every measurement are looked up
+    in the pattern atlas in one call and the polygons are built in one
+    shapely call, the same polygons as band_polygon(sensitivity_band(...)).
+    With `reads` the bands are tightened as in localize.
+
+    Returns:
+    polygons (np.ndarray): One polygon per valid measurement (None where fewer than three contour points are left).
+    index (np.ndarray): Position of each polygon in the flattened `rssi`.
+    """
+    rssi = np.asarray(rssi, dtype=float)
+    poses = np.broadcast_to(np.asarray(poses, dtype=float), rssi.shape + (3,))
+    index = np.flatnonzero(~np.isnan(rssi))
+    values = rssi.ravel()[index]
+    pose = poses.reshape(-1, 3)[index]
+    width = get_rms_rssi(values) if reads is None else get_rms_rssi_reads(values, reads)
+    angles = np.linspace(-ALPHA, ALPHA, int(ALPHA * 2 + 1))
+    angles_rad = np.radians(angles)
+    distances = load_atlas(LOCALIZATION_MODEL).contours(np.concatenate([values + width, values - width]), angles)
+    upper, lower = distances[:len(values)], distances[len(values):, ::-1]
+    ring = np.concatenate([upper, lower], axis=1)
+    ring_angles = np.concatenate([angles_rad, angles_rad[::-1]])
+    keep = ring > 0
+    # Antenna-frame points rotated clockwise by the heading (rotate_points) and moved to the antenna
+    bearing = ring_angles[None, :] + np.radians(pose[:, 2])[:, None]
+    x = ring * np.sin(bearing) + pose[:, 0, None]
+    y = ring * np.cos(bearing) + pose[:, 1, None]
+    counts = keep.sum(axis=1)
+    valid = counts >= 3
+    polygons = np.full(len(values), None, dtype=object)
+    if valid.any():
+        rows = keep & valid[:, None]
+        ring_index = np.repeat(np.arange(valid.sum()), counts[valid])
+        rings = shapely.linearrings(np.column_stack((x[rows], y[rows])), indices=ring_index)
+        polygons[valid] = shapely.polygons(rings)
+    return polygons, index
+
+def localize_trials(rssi, poses, reads=None):
+    """
+    Localize one tag in every trial of an (trials, poses) RSSI array; NaN values are locations it was not read at.
+
+    Returns:
+    np.ndarray: (trials, 3) estimated x, y and intersection area (NaN where no intersection was found).
+    """
+    rssi = np.asarray(rssi, dtype=float)
+    polygons, index = band_polygons(rssi, poses, reads)
+    trial = index // rssi.shape[1]
+    result = np.full((len(rssi), 3), np.nan)
+    bounds = np.searchsorted(trial, np.arange(len(rssi) + 1))
+    for i in range(len(rssi)):
+        trial_polygons = [polygon for polygon in polygons[bounds[i]:bounds[i + 1]] if polygon is not None]
+        intersection = find_most_common_intersection(trial_polygons)
+        if intersection is None or intersection.is_empty:
+            continue
+        centroid = intersection.centroid
+        result[i] = centroid.x, centroid.y, intersection.area
+    return result
+
+def localize_job(tag, rssi, poses, reads=None):
+    """Worker process entry point: localize one chunk of trials of one tag."""
+    return tag, localize_trials(rssi, poses, reads)
+
+def run_monte_carlo(tags, poses, trials=DEFAULT_TRIALS, reads=DEFAULT_READS, model_std=DEFAULT_MODEL_STD,
+                    read_evidence=False, workers=None, seed=None):
+    """
+    Monte Carlo estimate of the localization error of a survey layout.
+
+    Args:
+    tags (array): (n, 2) true tag positions [m].
+    poses (array): (m, 3) antenna poses x, y [m] and heading [deg].
+    trials (int): Noisy realizations per tag.
+    reads (int): Reads averaged per location.
+    model_std (float): Per-location error beyond the read noise [dB] (see simulate_rssi).
+    read_evidence (bool): Tighten the bands for the reads averaged, as `--read-evidence` does.
+    workers (int): Worker processes (default: one per CPU).
+
+    Returns:
+    pd.DataFrame: One row per tag and trial with the estimate, its error and intersection area (NaN when the
+    tag was not localized) and the number of locations it was read at.
+    """
+    tags = np.asarray(tags, dtype=float).reshape(-1, 2)
+    poses = np.asarray(poses, dtype=float).reshape(-1, 3)
+    rssi = simulate_rssi(tags, poses, trials, reads, model_std, seed)
+    band_reads = reads if read_evidence else None
+    estimates = np.full((trials, len(tags), 3), np.nan)
+    # Build the atlas once here, so the workers only load it
+    load_atlas()
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_atlas) as pool:
+        futures = {}
+        for tag in range(len(tags)):
+            for start in range(0, trials, CHUNK_TRIALS):
+                future = pool.submit(localize_job, tag, rssi[start:start + CHUNK_TRIALS, tag], poses, band_reads)
+                futures[future] = start
+        for future, start in futures.items():
+            tag, result = future.result()
+            estimates[start:start + len(result), tag] = result
+    located = np.count_nonzero(~np.isnan(rssi), axis=2)
+    error = np.hypot(estimates[:, :, 0] - tags[None, :, 0], estimates[:, :, 1] - tags[None, :, 1])
+    return pd.DataFrame({
+        'Tag': np.tile(np.arange(len(tags)), trials),
+        'Trial': np.repeat(np.arange(trials), len(tags)),
+        'Tag X [m]': np.tile(tags[:, 0], trials),
+        'Tag Y [m]': np.tile(tags[:, 1], trials),
+        'Locations': located.ravel(),
+        'X [m]': estimates[:, :, 0].ravel(),
+        'Y [m]': estimates[:, :, 1].ravel(),
+        'Error [m]': error.ravel(),
+        'Area [m2]': estimates[:, :, 2].ravel()
+    })
+
+def cep_summary(results):
+    """
+    Error distribution per tag: share of trials localized, CEP50/CEP95 and the mean error offset.
+
+    CEP50 and CEP95 are the radii around the true position that contain 50%
+    and 95% of the estimates; trials without an estimate count as misses of
+    infinite error, so a tag that is localized in fewer than 95% of the
+    trials has an infinite CEP95.
+    """
+    rows = []
+    for tag, group in results.groupby('Tag'):
+        error = group['Error [m]'].fillna(np.inf).to_numpy()
+        located = np.isfinite(error)
+        rows.append({
+            'Tag': tag,
+            'Tag X [m]': group['Tag X [m]'].iloc[0],
+            'Tag Y [m]': group['Tag Y [m]'].iloc[0],
+            'Locations': group['Locations'].median(),
+            'Localized [%]': 100.0 * located.mean(),
+            'CEP50 [m]': np.quantile(error, 0.5, method='higher'),
+            'CEP95 [m]': np.quantile(error, 0.95, method='higher'),
+            'Mean Error [m]': error[located].mean() if located.any() else np.nan,
+            'Bias X [m]': (group['X [m]'] - group['Tag X [m]']).mean(),
+            'Bias Y [m]': (group['Y [m]'] - group['Tag Y [m]']).mean(),
+            'Median Area [m2]': group['Area [m2]'].median()
+        })
+    return pd.DataFrame(rows)
+
+# -------------------
+# Layouts
+# -------------------
+def parse_points(text, size):
+    """Points from "x,y;x,y" (size 2) or "x,y,rot;..." (size 3)."""
+    points = [[float(value) for value in part.split(',')] for part in text.split(';') if part.strip()]
+    if any(len(point) != size for point in points):
+        raise ValueError(f"Expected {size} comma-separated values per point in '{text}'")
+    return np.array(points, dtype=float).reshape(-1, size)
+
+def straight_path(start, end, count, rot):
+    """`count` antenna poses evenly spaced from `start` to `end` (x, y), all with heading `rot` [deg]."""
+    xy = np.linspace(start, end, count)
+    return np.column_stack((xy, np.full(count, rot)))
+
+def load_layout(path):
+    """
+    Tags and poses of a layout file: JSON ({"tags": [[x, y], ...], "poses": [[x, y, rot], ...]}),
+    or the tag positions and antenna locations of a logger Excel file or binary measurement file (.rfid).
+    """
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            layout = json.load(f)
+        tags = np.array(layout['tags'], dtype=float).reshape(-1, 2)
+        return tags, np.array(layout['poses'], dtype=float).reshape(-1, 3)
+    if path.endswith('.rfid'):
+        from measurement_store import open_measurements, to_frame
+        records, epcs, tag_locations = open_measurements(path)
+        df = to_frame(records, epcs, tag_locations)
+    else:
+        df = pd.read_excel(path, sheet_name='All Data')
+    tags = df.groupby('Tag ID')[['Tag X [m]', 'Tag Y [m]']].first().dropna().to_numpy()
+    # One pose per antenna location, located by its distance from the origin as in location_features
+    poses = df.groupby('Distance [m]', sort=False)[['Antenna X [m]', 'Antenna Y [m]', 'Antenna Rot Z [deg]']].first()
+    return tags, poses.to_numpy()
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo localization accuracy (CEP50/CEP95 per tag) of a survey layout.')
+    parser.add_argument('--layout', help='Layout JSON file, or a logger/.rfid file whose tags and locations are used')
+    parser.add_argument('--tags', help='Tag positions "x,y;x,y" [m] (instead of or added to the layout)')
+    parser.add_argument('--poses', help='Antenna poses "x,y,rot;..." [m, deg] (instead of or added to the layout)')
+    parser.add_argument('--path', help='Straight antenna path "x0,y0,x1,y1" [m], with --count poses and heading --rot')
+    parser.add_argument('--count', type=int, default=12, help='Poses along --path')
+    parser.add_argument('--rot', type=float, default=0.0, help='Antenna heading along --path [deg]')
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS, help='Noisy realizations per tag')
+    parser.add_argument('--reads', type=int, default=DEFAULT_READS, help='Reads averaged per location')
+    parser.add_argument('--model-std', type=float, default=DEFAULT_MODEL_STD,
+                        help='Per-location RSSI error beyond the read noise of the error model [dB]')
+    parser.add_argument('--read-evidence', action='store_true', help='Tighten the bands for the reads averaged')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, help='Random seed')
+    parser.add_argument('--out', help='Write every trial to this CSV file (;-separated)')
+    args = parser.parse_args()
+
+    try:
+        tags, poses = load_layout(args.layout) if args.layout else (np.zeros((0, 2)), np.zeros((0, 3)))
+        if args.tags:
+            tags = np.vstack((tags, parse_points(args.tags, 2)))
+        if args.poses:
+            poses = np.vstack((poses, parse_points(args.poses, 3)))
+        if args.path:
+            x0, y0, x1, y1 = parse_points(args.path, 4)[0]
+            poses = np.vstack((poses, straight_path((x0, y0), (x1, y1), args.count, args.rot)))
+    except ValueError as e:
+        parser.error(str(e))
+    if not len(tags) or len(poses) < 2:
+        parser.error('Give at least one tag and two antenna poses (--layout, --tags, --poses, --path)')
+
+    print(f"{len(tags)} tags, {len(poses)} poses, {args.trials} trials, {args.reads} reads per location, "
+          f"model error {args.model_std} dB")
+    start = time.perf_counter()
+    results = run_monte_carlo(tags, poses, args.trials, args.reads, args.model_std, args.read_evidence,
+                              args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+    summary = cep_summary(results)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(summary.round(3).to_string(index=False))
+    print(f"{len(results)} localizations in {elapsed:.1f} s ({elapsed / len(results) * 1000:.2f} ms each)")
+    if args.out:
+        results.to_csv(args.out, sep=';', index=False)
+        print(f"Trials written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from localization_core import (ALPHA, NOISE_MODEL, RMS_MARGIN, get_rms_rssi, get_rms_rssi_reads, place_curve,
+                               rssi_angle)
+from pattern_atlas import LOCALIZATION_MODEL, solve_distances
+
+# -------------------
+# Constants
+# -------------------
+ALPHA_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '1-rssi-calibration', 'data',
+                          'RSSI-alpha-0.7-y=150.csv')
+ORIENTATION_MARGIN = NOISE_MODEL.margins['orientation']  # Part of RMS_MARGIN that covers the unknown tag orientation (alpha) [dB]
+MODEL_MARGIN = RMS_MARGIN - ORIENTATION_MARGIN  # Remaining model margin, kept in every mode [dB]
+RSSI_GRID = np.arange(-100.0, -20.0 + 0.125, 0.25)  # RSSI axis of the lookup grid [dBm]
+ALPHA_GRID = np.arange(-180.0, 180.0, 10.0)  # Tag orientation axis of the lookup grid [deg]
+
+# -------------------
+# Orientation Model
+# -------------------
+def fit_alpha_model(path=ALPHA_DATA):
+    """
+    Fit RSSI(alpha) = A*cos(omega*alpha + phase) + offset to the orientation calibration reads.
+
+    As in alpha-curve-fitting-normalized.py the frequency is searched on a
+    grid; for a fixed frequency the model is linear in A*cos(phase),
+    A*sin(phase) and the offset, so every grid point is one least-squares
+    solve.
+
+    Returns:
+    dict: 'amplitude', 'frequency' [rad/deg], 'phase' [rad], 'offset' and 'peak' [dBm] of the fit,
+    and 'rms' [dB], the RMS residual of the reads.
+    """
+    df = pd.read_csv(path, sep=';')
+    alpha = df['alpha'].to_numpy(dtype=float)
+    rssi = df['RSSI'].to_numpy(dtype=float)
+    base_frequency = 2 * np.pi / (alpha.max() - alpha.min())
+    best = None
+    for frequency in np.linspace(0.1 * base_frequency, 5 * base_frequency, 200):
+        design = np.column_stack((np.cos(frequency * alpha), -np.sin(frequency * alpha), np.ones_like(alpha)))
+        coefficients, _, _, _ = np.linalg.lstsq(design, rssi, rcond=None)
+        rms = np.sqrt(np.mean((design @ coefficients - rssi) ** 2))
+        if best is None or rms < best[0]:
+            best = (rms, frequency, coefficients)
+    rms, frequency, (c, s, offset) = best
+    amplitude = np.hypot(c, s)
+    return {
+        'amplitude': amplitude,
+        'frequency': frequency,
+        'phase': np.arctan2(s, c),
+        'offset': offset,
+        'peak': offset + amplitude,
+        'rms': rms
+    }
+
+def alpha_loss(alpha, model):
+    """RSSI change [dB] (<= 0) of a tag at orientation `alpha` [deg] relative to its best orientation."""
+    alpha = np.asarray(alpha, dtype=float)
+    return model['amplitude'] * np.cos(model['frequency'] * alpha + model['phase']) + model['offset'] - model['peak']
+
+# -------------------
+# Lookup Grid
+# -------------------
+def inverse_rssi_distance(rssi):
+    """Distance [m] for RSSI values with the pattern atlas solver; NaN where rssi_distance has no root."""
+    return solve_distances(LOCALIZATION_MODEL, rssi)
+
+class BandLookup:
+    """
+    Precomputed distance grid over (RSSI, phi, alpha) for orientation-aware sensitivity bands.
+
+    distance[i, j, k] is the distance at which a tag at azimuth angles[j] and
+    orientation ALPHA_GRID[k] is read with RSSI_GRID[i], i.e. the solution of
+    rssi_distance(d) = rssi - rssi_angle(phi) - alpha_loss(alpha).
+    Bands are read from the grid instead of solving for every curve point.
+    """
+
+    def __init__(self, alpha_model=None):
+        self.alpha_model = alpha_model if alpha_model is not None else fit_alpha_model()
+        self.angles = np.linspace(-ALPHA, ALPHA, int(ALPHA * 2 + 1))
+        self.angles_rad = np.radians(self.angles)
+        signal_loss = (rssi_angle(self.angles)[None, :, None]
+                       + alpha_loss(ALPHA_GRID, self.alpha_model)[None, None, :])
+        self.distance = inverse_rssi_distance(RSSI_GRID[:, None, None] - signal_loss).astype(np.float32)
+
+    def distances(self, rssi, alpha=None, edge=None):
+        """
+        Distance [m] per azimuth for one RSSI value, interpolated between the grid rows.
+
+        With `alpha` the nearest grid orientation is used. Without it the
+        orientations are marginalized: `edge` 'near' takes the nearest
+        distance over all orientations, 'far' the farthest and None the middle
+        of the two.
+        """
+        position = np.clip((rssi - RSSI_GRID[0]) / (RSSI_GRID[1] - RSSI_GRID[0]), 0, len(RSSI_GRID) - 1)
+        low = min(int(position), len(RSSI_GRID) - 2)
+        weight = position - low
+        rows = self.distance[low] * (1 - weight) + self.distance[low + 1] * weight
+        if alpha is not None:
+            index = int(np.round(((alpha + 180.0) % 360.0) / (ALPHA_GRID[1] - ALPHA_GRID[0]))) % len(ALPHA_GRID)
+            return rows[:, index]
+        # fmin/fmax skip the NaN (out of range) orientations
+        near = np.fmin.reduce(rows, axis=1)
+        far = np.fmax.reduce(rows, axis=1)
+        if edge == 'near':
+            return near
+        if edge == 'far':
+            return far
+        return (near + far) / 2
+
+    def half_width(self, rssi, alpha=None, reads=None):
+        """
+        Band half-width [dB]: the fitted RSSI spread, the margin that is not orientation and, with a known
+        orientation, the residual of the orientation model in place of ORIENTATION_MARGIN.
+        """
+        rms = get_rms_rssi(rssi) if reads is None else get_rms_rssi_reads(rssi, reads)
+        spread = rms - RMS_MARGIN
+        return spread + MODEL_MARGIN + (self.alpha_model['rms'] if alpha is not None else 0.0)
+
+    def curve(self, distances, ant_x, ant_y, beta):
+        """Points at `distances` along the azimuths of the band, rotated and moved to the antenna pose."""
+        return place_curve(distances, ant_x, ant_y, beta, self.angles_rad)
+
+    def band(self, rssi_received, ant_x, ant_y, beta, alpha=None, reads=None):
+        """
+        Orientation-aware band, in the form of sensitivity_band (x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal).
+
+        With a known tag orientation `alpha` [deg] the band is centred on the
+        RSSI corrected for that orientation. Otherwise the orientation is
+        marginalized: the band spans every orientation, from the nearest
+        distance of the upper RSSI to the farthest of the lower one.
+        """
+        width = self.half_width(rssi_received, alpha, reads)
+        near = self.distances(rssi_received + width, alpha, 'near')
+        far = self.distances(rssi_received - width, alpha, 'far')
+        nominal = self.distances(rssi_received, alpha)
+        x_upper, y_upper = self.curve(near, ant_x, ant_y, beta)
+        x_lower, y_lower = self.curve(far, ant_x, ant_y, beta)
+        x_nominal, y_nominal = self.curve(nominal, ant_x, ant_y, beta)
+        return x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal
+
+@lru_cache(maxsize=None)
+def band_lookup():
+    """Lookup grid of the calibrated orientation model, built once per process."""
+    return BandLookup()
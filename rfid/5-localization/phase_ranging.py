@@ -0,0 +1,155 @@
+import numpy as np
+import shapely
+
+# -------------------
+# Constants
+# -------------------
+WAVELENGTH = 0.346  # Carrier wavelength [m] (EU band, 866-868 MHz)
+PHASE_STEPS = 4096  # The reader reports phase as a 12-bit value
+RANGE_AMBIGUITY = WAVELENGTH / 2  # Backscatter phase wraps every half wavelength of range
+PHASE_TOLERANCE = 0.02  # Accepted range-difference mismatch [m] (phase noise and multipath)
+GRID_RESOLUTION = 0.005  # Grid step of the phase refinement [m]
+
+def phase_to_radians(phase):
+    """12-bit reader phase (decimal 0-4095) to radians."""
+    return np.asarray(phase, dtype=float) * (2 * np.pi / PHASE_STEPS)
+
+def location_phases(df):
+    """
+    Circular mean phase [rad] of a tag at each antenna location, in the order the locations were visited.
+
+    Locations are told apart by their distance from the origin, as in
+    `pose_measurements`. Locations without any phase are NaN.
+    """
+    distances = df['Distance [m]'].to_numpy()
+    locations, index = np.unique(distances, return_index=True)
+    order = np.argsort(index)  # Order of first appearance, i.e. along the robot path
+    location_index = np.searchsorted(locations, distances)
+    phase = phase_to_radians(df['Phase'].to_numpy(dtype=float))
+    valid = ~np.isnan(phase)
+    phasors = np.zeros(len(locations), dtype=complex)
+    np.add.at(phasors, location_index[valid], np.exp(1j * phase[valid]))
+    mean_phase = np.where(phasors != 0, np.angle(phasors) % (2 * np.pi), np.nan)
+    return mean_phase[order]
+
+def wrapped_range_differences(phases):
+    """
+    Range change between consecutive locations from their phase change, modulo the half-wavelength ambiguity.
+
+    The backscatter phase is 4*pi*d/lambda, so a phase difference dtheta is
+    a range difference of lambda*dtheta/(4*pi). The result lies in
+    (-lambda/4, lambda/4]; the true value is that plus a multiple of lambda/2.
+    """
+    dtheta = np.angle(np.exp(1j * np.diff(phases)))
+    return WAVELENGTH * dtheta / (4 * np.pi)
+
+def unwrap_path(phases):
+    """
+    Ranges along the robot path relative to the first location, from the unwrapped phase.
+
+    Only valid when the range to the tag changes by less than lambda/4 between
+    consecutive locations; otherwise use `range_differences` with reference ranges.
+    """
+    return WAVELENGTH * (np.unwrap(phases) - phases[0]) / (4 * np.pi)
+
+def range_differences(phases, reference_ranges):
+    """
+    Unambiguous range change between consecutive locations.
+
+    The multiple of lambda/2 is chosen so the phase range difference is closest
+    to the difference of `reference_ranges` (e.g. the distances from the
+    RSSI-only estimate to each antenna location).
+    """
+    wrapped = wrapped_range_differences(phases)
+    reference = np.diff(reference_ranges)
+    return wrapped + np.round((reference - wrapped) / RANGE_AMBIGUITY) * RANGE_AMBIGUITY
+
+def path_constraints(antenna_xy, phases):
+    """
+    Range-difference constraints (i, j, range_j - range_i, modular) from the phase along the robot path.
+
+    Where consecutive locations are less than lambda/4 apart the range to the
+    tag changes by less than lambda/4 as well (triangle inequality), so the
+    phase can be unwrapped safely: every location of such a run gets an
+    unambiguous constraint against the first location of the run, which gives
+    long baselines. Across larger steps only the range difference modulo
+    lambda/2 is known (modular=True).
+    """
+    antenna_xy = np.asarray(antenna_xy, dtype=float)
+    steps = np.hypot(*np.diff(antenna_xy, axis=0).T)
+    known = ~np.isnan(phases)
+    constraints = []
+    start = 0
+    for i in range(1, len(phases) + 1):
+        if i < len(phases) and known[i] and known[i - 1] and steps[i - 1] < WAVELENGTH / 4:
+            continue
+        # Run start..i-1 ends here
+        if known[start] and i - 1 > start:
+            ranges = unwrap_path(phases[start:i])
+            constraints.extend((start, j, ranges[j - start], False) for j in range(start + 1, i))
+        if i < len(phases) and known[i] and known[i - 1]:
+            constraints.append((i - 1, i, wrapped_range_differences(phases[i - 1:i + 1])[0], True))
+        start = i
+    return constraints
+
+def phase_consistency(x, y, antenna_xy, phases, tolerance=PHASE_TOLERANCE):
+    """
+    Number of phase constraints (`path_constraints`) each point satisfies.
+
+    A point satisfies a constraint when the range difference it implies to
+    the two antenna locations matches the measured one (modulo lambda/2 for
+    modular constraints). All points and constraints are evaluated at once.
+
+    Args:
+    x, y (np.ndarray): Point coordinates [m].
+    antenna_xy (np.ndarray): (n, 2) antenna locations in path order.
+    phases (np.ndarray): (n,) mean phase per location [rad], NaN when unknown.
+    tolerance (float): Accepted mismatch [m].
+    """
+    antenna_xy = np.asarray(antenna_xy, dtype=float)
+    constraints = path_constraints(antenna_xy, phases)
+    if not constraints:
+        return np.zeros(len(x), dtype=int)
+    i, j, measured, modular = (np.array(values) for values in zip(*constraints))
+    ranges = np.hypot(x[:, None] - antenna_xy[None, :, 0], y[:, None] - antenna_xy[None, :, 1])
+    mismatch = ranges[:, j] - ranges[:, i] - measured
+    # Modular constraints: distance to the nearest admissible value
+    wrapped = (mismatch + RANGE_AMBIGUITY / 2) % RANGE_AMBIGUITY - RANGE_AMBIGUITY / 2
+    mismatch = np.where(modular, wrapped, mismatch)
+    return np.count_nonzero(np.abs(mismatch) <= tolerance, axis=1)
+
+def refine_with_phase(region, antenna_xy, phases, tolerance=PHASE_TOLERANCE, resolution=GRID_RESOLUTION):
+    """
+    Shrink an RSSI intersection region with the phase constraints.
+
+    The region is rasterised and only the cells that satisfy the largest
+    number of constraints are kept.
+
+    Returns:
+    points (np.ndarray): (m, 2) centres of the kept cells (empty when nothing can be refined).
+    centroid (tuple): Mean of the kept cells, or None.
+    area (float): Area of the kept cells [m2].
+    satisfied (int): Constraints met by the kept cells.
+    """
+    empty = np.zeros((0, 2)), None, 0.0, 0
+    if region is None or region.is_empty or np.count_nonzero(~np.isnan(phases)) < 2:
+        return empty
+    min_x, min_y, max_x, max_y = region.bounds
+    xs = np.arange(min_x + resolution / 2, max_x, resolution)
+    ys = np.arange(min_y + resolution / 2, max_y, resolution)
+    if len(xs) == 0 or len(ys) == 0:
+        return empty
+    xx, yy = np.meshgrid(xs, ys)
+    xx, yy = xx.ravel(), yy.ravel()
+    inside = shapely.contains_xy(region, xx, yy)
+    xx, yy = xx[inside], yy[inside]
+    if len(xx) == 0:
+        return empty
+    score = phase_consistency(xx, yy, np.asarray(antenna_xy, dtype=float), phases, tolerance)
+    best = score.max()
+    if best == 0:
+        return empty
+    keep = score == best
+    points = np.column_stack((xx[keep], yy[keep]))
+    centroid = tuple(points.mean(axis=0))
+    return points, centroid, keep.sum() * resolution ** 2, int(best)
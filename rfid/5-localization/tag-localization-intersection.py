@@ -1,100 +1,80 @@
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
 from matplotlib.patches import Polygon
 from shapely.geometry import Polygon as ShapelyPolygon
-from shapely.ops import unary_union
 import pandas as pd
 import os
+import sys
 import glob
+from localization_core import (ALPHA, get_rms_rssi, get_rms_rssi_reads, signal_curve, make_polygon_points,
+                               pose_measurements, sensitivity_band, get_rms_rssi_map, search_intersection)
+from phase_ranging import location_phases, refine_with_phase
+from bearing_sweeps import bearing_wedges, fit_bearings
+from orientation_bands import band_lookup
+from pattern_atlas import load_atlas
+from pattern_raster import load_raster
+
+# Binary measurement files are read with the data extraction stage's reader
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '2-data-extraction'))
 
 # -------------------
 # Constants
 # -------------------
-ALPHA = 90  # Angle in degrees
 VECTOR_LENGTH = 0.2  # Arrow length for antenna orientation
 PLOT_LIMITS = (-0.5, 4)
 GRID_STEP = 0.5
 
-# -------------------
-# Utility Functions
-# -------------------
-def get_rms_rssi(rssi):
-    """
-    Calculate RMS based on the given RSSI value using the formula:
-    RMS = 0.0000330307 * exp(-0.154 * RSSI) + 0.9145 + 1.5 + 2
-    """
-    return 0.0000330307 * np.exp(-0.154 * rssi) + 0.9145 + 1.5 + 2
-
-def rssi_distance(d):
-    """Calculate RSSI based on distance using a 6th order polynomial fit."""
-    return (-30.625214*d**0 + -66.049565*d**1 + 47.932897*d**2 +
-            6.934334*d**3 + -23.319914*d**4 + 9.552617*d**5 + -1.222853*d**6)
-
-def rssi_distance_deriv(d):
-    """Derivative of the RSSI-distance polynomial."""
-    return (-66.049565*d**0 + 2*47.932897*d**1 + 3*6.934334*d**2 +
-            -4*23.319914*d**3 + 5*9.552617*d**4 + -6*1.222853*d**5)
-
-def rssi_angle(phi):
-    """Calculate RSSI based on angle."""
-    return 0.038186*phi - 0.003704 * phi**2
-
-def solve_distance(rssi, init=1.5):
-    """Solve for distance given RSSI using fsolve."""
-    def equation(d):
-        return rssi - rssi_distance(d)
-    def deriv(d):
-        return -rssi_distance_deriv(d)
-    sol = fsolve(equation, init, fprime=deriv)[0]
-    return sol
-
-def rotate_points(x, y, angle_deg):
-    """Rotate points (x, y) by angle_deg around the origin."""
-    angle_rad = np.radians(-angle_deg)
-    x_rot = x * np.cos(angle_rad) - y * np.sin(angle_rad)
-    y_rot = x * np.sin(angle_rad) + y * np.cos(angle_rad)
-    return x_rot, y_rot
-
-def translate_points(x, y, ant_x, ant_y):
-    """Translate points (x, y) to antenna location (ant_x, ant_y)."""
-    return x + ant_x, y + ant_y
-
 def plot_curve(rssi_val, ant_x, ant_y, angle_deg, angles, angles_rad, style='-', label=None, color=None):
     """Calculate and plot a single signal curve for an antenna location."""
-    r = solve_distance(rssi_val)
-    rssi_phi = np.array([rssi_angle(phi) for phi in angles])
-    signal_loss = -rssi_phi
-    rssi_a = rssi_val + signal_loss
-    distances = np.array([solve_distance(rssi) for rssi in rssi_a])
-    to_keep = distances > 0
-    angles_rad_limited = angles_rad[to_keep]
-    distances_limited = distances[to_keep]
-    x = distances_limited * np.sin(angles_rad_limited)
-    y = distances_limited * np.cos(angles_rad_limited)
-    x_rot, y_rot = rotate_points(x, y, angle_deg)
-    x_trans, y_trans = translate_points(x_rot, y_rot, ant_x, ant_y)
+    x_trans, y_trans = signal_curve(rssi_val, ant_x, ant_y, angle_deg, angles, angles_rad)
     plt.plot(x_trans, y_trans, style, label=label, color=color)
     return x_trans, y_trans
 
-def make_polygon_points(x_upper, y_upper, x_lower, y_lower):
-    """Helper to create polygon points for intersection/hatching."""
-    return np.column_stack((
-        np.concatenate([x_upper, x_lower[::-1]]),
-        np.concatenate([y_upper, y_lower[::-1]])
-    ))
+def create_single_plot(rssi_received, ant_x, ant_y, beta, location_num, all_antennas, tag_x, tag_y, tag_id, reads=None,
+                       orientation=False, tag_alpha=None, raster=False, noise_map=False):
+    """
+    Create a plot for a single antenna location and tag; with `reads` the band is tightened for the reads averaged.
 
-def create_single_plot(rssi_received, ant_x, ant_y, beta, location_num, all_antennas, tag_x, tag_y, tag_id):
-    """Create a plot for a single antenna location and tag."""
+    With `orientation` the band comes from the (RSSI, phi, alpha) lookup grid,
+    for the tag orientation `tag_alpha` [deg] or marginalized over all orientations.
+    With `raster` it is extracted from the RSSI field raster by marching squares.
+    With `noise_map` its width varies along the band (noise map of the error model).
+    """
     fig = plt.figure(figsize=(12, 12))
     angles = np.linspace(-ALPHA, ALPHA, int(ALPHA * 2 + 1))
     angles_rad = np.radians(angles)
-    rms_rssi = get_rms_rssi(rssi_received)
-    upper_rssi = rssi_received + rms_rssi
-    lower_rssi = rssi_received - rms_rssi
-    x_upper, y_upper = plot_curve(upper_rssi, ant_x, ant_y, beta, angles, angles_rad, '-', f'Upper bound')
-    x_lower, y_lower = plot_curve(lower_rssi, ant_x, ant_y, beta, angles, angles_rad, '-', f'Lower bound')
-    x_nominal, y_nominal = plot_curve(rssi_received, ant_x, ant_y, beta, angles, angles_rad, '--', f'Nominal')
+    if orientation:
+        lookup = band_lookup()
+        rms_rssi = lookup.half_width(rssi_received, tag_alpha, reads)
+        x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal = lookup.band(
+            rssi_received, ant_x, ant_y, beta, tag_alpha, reads)
+        plt.plot(x_upper, y_upper, '-', label='Upper bound')
+        plt.plot(x_lower, y_lower, '-', label='Lower bound')
+        plt.plot(x_nominal, y_nominal, '--', label='Nominal')
+    elif raster:
+        rms_rssi = get_rms_rssi(rssi_received) if reads is None else get_rms_rssi_reads(rssi_received, reads)
+        x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal = sensitivity_band(
+            rssi_received, ant_x, ant_y, beta, reads, raster=True)
+        plt.plot(x_upper, y_upper, '-', label='Upper bound')
+        plt.plot(x_lower, y_lower, '-', label='Lower bound')
+        plt.plot(x_nominal, y_nominal, '--', label='Nominal')
+    elif noise_map:
+        x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal = sensitivity_band(
+            rssi_received, ant_x, ant_y, beta, reads, noise_map=True)
+        # Median half-width along the band, for the title
+        nominal = load_atlas().contour(rssi_received, angles)
+        rms_rssi = round(float(np.median(get_rms_rssi_map(rssi_received, nominal, angles, reads))), 2)
+        plt.plot(x_upper, y_upper, '-', label='Upper bound')
+        plt.plot(x_lower, y_lower, '-', label='Lower bound')
+        plt.plot(x_nominal, y_nominal, '--', label='Nominal')
+    else:
+        rms_rssi = get_rms_rssi(rssi_received) if reads is None else get_rms_rssi_reads(rssi_received, reads)
+        upper_rssi = rssi_received + rms_rssi
+        lower_rssi = rssi_received - rms_rssi
+        x_upper, y_upper = plot_curve(upper_rssi, ant_x, ant_y, beta, angles, angles_rad, '-', f'Upper bound')
+        x_lower, y_lower = plot_curve(lower_rssi, ant_x, ant_y, beta, angles, angles_rad, '-', f'Lower bound')
+        x_nominal, y_nominal = plot_curve(rssi_received, ant_x, ant_y, beta, angles, angles_rad, '--', f'Nominal')
     color = plt.cm.rainbow(0) if len(all_antennas) == 0 else plt.cm.rainbow((location_num - 1) / len(all_antennas))
     plt.plot(ant_x, ant_y, 'o', color=color, label=f'Antenna {location_num}', markersize=8)
     plt.text(ant_x, ant_y, f'({ant_x:.2f}, {ant_y:.2f})', fontsize=8, ha='left', va='bottom')
@@ -155,77 +135,19 @@ def create_combined_plot(all_data, tag_x, tag_y, tag_id):
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
 
-def find_most_common_intersection(shapely_polygons):
-    """Find the most common intersection area among polygons."""
-    from itertools import combinations
-    if len(shapely_polygons) < 2:
-        return None
-    intersection_regions = []
-    for num_polygons in range(len(shapely_polygons), 1, -1):
-        for poly_indices in combinations(range(len(shapely_polygons)), num_polygons):
-            current_polygons = [shapely_polygons[i] for i in poly_indices]
-            current_intersection = current_polygons[0]
-            for poly in current_polygons[1:]:
-                if current_intersection.is_empty:
-                    break
-                current_intersection = current_intersection.intersection(poly)
-            if not current_intersection.is_empty:
-                intersection_regions.append({
-                    'area': current_intersection,
-                    'count': num_polygons,
-                    'indices': poly_indices
-                })
-        if intersection_regions:
-            break
-    if not intersection_regions:
-        return None
-    most_common = max(intersection_regions, key=lambda x: x['count'])
-    core_area = most_common['area']
-    max_intersection_area = 0
-    best_area_index = most_common['indices'][0]
-    for i in most_common['indices']:
-        intersection = shapely_polygons[i].intersection(core_area)
-        if not intersection.is_empty:
-            area = intersection.area
-            if area > max_intersection_area:
-                max_intersection_area = area
-                best_area_index = i
-    current_intersection = shapely_polygons[best_area_index]
-    used_indices = {best_area_index}
-    remaining_polygons = [(i, poly) for i, poly in enumerate(shapely_polygons) if i not in used_indices]
-    while remaining_polygons and not current_intersection.is_empty:
-        best_next = None
-        best_area = 0
-        best_index = -1
-        for i, poly in remaining_polygons:
-            intersection = poly.intersection(current_intersection)
-            if not intersection.is_empty and intersection.area > best_area:
-                best_area = intersection.area
-                best_next = poly
-                best_index = i
-        if best_next is None:
-            break
-        current_intersection = current_intersection.intersection(best_next)
-        used_indices.add(best_index)
-        remaining_polygons = [(i, poly) for i, poly in remaining_polygons if i not in used_indices]
-    return current_intersection
-
-def create_intersection_plot(all_data, tag_x, tag_y, tag_id):
-    """Create a plot showing the most common intersection area for a tag."""
+def create_intersection_plot(all_data, tag_x, tag_y, tag_id, common_intersection, wedges=()):
+    """Create a plot showing the intersection area chosen for a tag, with the bearing wedges of rotating stops if given."""
     plt.figure(figsize=(12, 12))
     colors = plt.cm.rainbow(np.linspace(0, 1, len(all_data)))
-    polygons = []
     for i, (rssi, ant_x, ant_y, beta, curves) in enumerate(all_data):
-        x_upper, y_upper, x_lower, y_lower, x_nominal, y_nominal = curves
-        polygon_points = make_polygon_points(x_upper, y_upper, x_lower, y_lower)
-        polygons.append(polygon_points)
         plt.plot(ant_x, ant_y, 'o', color=colors[i], label=f'Antenna {i+1}', markersize=8)
         plt.text(ant_x, ant_y, f'({ant_x:.2f}, {ant_y:.2f})', fontsize=8, ha='left', va='bottom')
         dx = VECTOR_LENGTH * np.sin(np.radians(beta))
         dy = VECTOR_LENGTH * np.cos(np.radians(beta))
         plt.arrow(ant_x, ant_y, dx, dy, head_width=0.04, head_length=0.08, fc='k', ec='k', width=0.015, length_includes_head=True)
-    shapely_polygons = [ShapelyPolygon(poly) for poly in polygons]
-    common_intersection = find_most_common_intersection(shapely_polygons)
+    for wedge in wedges:
+        x, y = wedge.exterior.xy
+        plt.plot(x, y, 'k--', alpha=0.5)
     if common_intersection is not None and not common_intersection.is_empty:
         if common_intersection.geom_type == 'MultiPolygon':
             for poly in common_intersection.geoms:
@@ -275,6 +197,9 @@ def create_all_tags_plot(tags_data):
                 x, y = intersection.exterior.xy
                 plt.fill(x, y, alpha=0.2, color=color)
                 plt.plot(x, y, '--', color=color, alpha=0.5, label=f'Tag {tag_id} Area')
+            if len(tag_info.get('phase_points', ())):
+                points = tag_info['phase_points']
+                plt.plot(points[:, 0], points[:, 1], ',', color=color, alpha=0.6)
             plt.plot(centroid_x, centroid_y, 'o', color=color, markersize=12, markeredgewidth=2)
             plt.text(centroid_x, centroid_y, f'Est. {tag_id}\n({centroid_x:.2f}, {centroid_y:.2f})', fontsize=10, ha='left', va='bottom', color=color)
     plt.plot(0, 0, 'r+', label='Origin (0,0)', markersize=10)
@@ -292,64 +217,151 @@ def create_all_tags_plot(tags_data):
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
 
-def process_tag_data(excel_file):
-    """Process tag data from an Excel file and generate plots for each tag."""
-    xl = pd.ExcelFile(excel_file)
-    all_tags_data = {}
+def load_tag_frames(data_file):
+    """
+    Yield (tag ID, reads) per tag from a logger Excel file or a binary measurement file (.rfid).
+
+    Binary files are memory-mapped and only the reads of one tag at a time
+    are turned into a DataFrame.
+    """
+    if data_file.endswith('.rfid'):
+        from measurement_store import open_measurements, to_frame
+        records, epcs, tag_locations = open_measurements(data_file)
+        tag_index = records['tag']
+        for index, tag_id in enumerate(epcs):
+            selection = records[tag_index == index]
+            if len(selection):
+                yield tag_id, to_frame(selection, epcs, tag_locations)
+        return
+    xl = pd.ExcelFile(data_file)
     for sheet_name in xl.sheet_names:
         if sheet_name == 'All Data':
             continue
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
-        unique_distances = df['Distance [m]'].unique()
-        num_locations = len(unique_distances)
-        if num_locations < 2:
+        yield sheet_name, pd.read_excel(data_file, sheet_name=sheet_name)
+
+def process_tag_data(excel_file, read_evidence=False, phase=False, bearing=False, orientation=False, tag_alpha=None,
+                     raster=False, noise_map=False, consensus=False, coarse=False):
+    """
+    Process tag data from an Excel or binary measurement file and generate plots for each tag.
+
+    With `read_evidence` the read count and read ratio of each location are
+    used as well: bands are tightened for the reads averaged and the mean
+    RSSI of rarely read tags is corrected for the reads that were missed.
+    With `phase` the intersection is narrowed down to the points that agree
+    with the phase changes along the robot path (files with a 'Phase' column).
+    With `bearing` the bearing of the tag from every rotating stop is fitted
+    and its wedge joins the sensitivity bands in the intersection search.
+    With `orientation` the bands account for the tag orientation (alpha
+    model): for `tag_alpha` [deg] when it is known, otherwise marginalized.
+    With `raster` the bands are extracted from the RSSI field raster by
+    marching squares instead of being looked up in the pattern atlas.
+    With `noise_map` the band widths vary with the position in the antenna
+    frame, as learned by the error model's noise map.
+    With `consensus` the bands are combined by the RANSAC-style consensus
+    search, which leaves out bands that disagree with the others.
+    With `coarse` the most common intersection is searched coarse to fine:
+    exactly only in the window of the deepest cells of a coarse raster.
+    """
+    all_tags_data = {}
+    for sheet_name, df in load_tag_frames(excel_file):
+        if read_evidence:
+            measurements, read_counts = pose_measurements(df, read_evidence=True)
+        else:
+            measurements = pose_measurements(df)
+            read_counts = [None] * len(measurements)
+        if len(measurements) < 2:
             continue
         all_data = []
         all_antennas = []
         tag_x = df['Tag X [m]'].iloc[0]
         tag_y = df['Tag Y [m]'].iloc[0]
-        for distance in unique_distances:
-            distance_data = df[df['Distance [m]'] == distance]
-            max_rssi_row = distance_data.loc[distance_data['RSSI'].idxmax()]
-            rssi_received = distance_data['RSSI'].mean()
-            beta = max_rssi_row['Antenna Rot Z [deg]']
-            ant_x = max_rssi_row['Antenna X [m]']
-            ant_y = max_rssi_row['Antenna Y [m]']
-            curves = create_single_plot(rssi_received, ant_x, ant_y, beta, len(all_data)+1, all_antennas, tag_x, tag_y, sheet_name)
+        for (rssi_received, ant_x, ant_y, beta), reads in zip(measurements, read_counts):
+            curves = create_single_plot(rssi_received, ant_x, ant_y, beta, len(all_data)+1, all_antennas, tag_x, tag_y, sheet_name, reads,
+                                        orientation, tag_alpha, raster, noise_map)
             all_data.append((rssi_received, ant_x, ant_y, beta, curves))
             all_antennas.append((rssi_received, ant_x, ant_y, beta, curves))
-        create_combined_plot(all_data, tag_x, tag_y, sheet_name)
-        create_intersection_plot(all_data, tag_x, tag_y, sheet_name)
+        wedges = []
+        if bearing:
+            bearings = fit_bearings(df)
+            for row in bearings.to_dict('records'):
+                print(f"Tag {sheet_name}: bearing {row['Bearing [deg]']:.1f} deg +- {row['Bearing Error [deg]']:.1f} "
+                      f"from ({row['Antenna X [m]']:.2f}, {row['Antenna Y [m]']:.2f}), {row['Rotations']} rotations")
+            wedges = bearing_wedges(bearings)
         shapely_polygons = []
-        angles = np.linspace(-ALPHA, ALPHA, int(ALPHA * 2 + 1))
         for _, _, _, _, curves in all_data:
             x_upper, y_upper, x_lower, y_lower, _, _ = curves
             polygon_points = make_polygon_points(x_upper, y_upper, x_lower, y_lower)
             shapely_polygons.append(ShapelyPolygon(polygon_points))
-        common_intersection = find_most_common_intersection(shapely_polygons)
+        common_intersection = search_intersection(shapely_polygons + wedges, consensus=consensus, coarse=coarse)
+        create_combined_plot(all_data, tag_x, tag_y, sheet_name)
+        create_intersection_plot(all_data, tag_x, tag_y, sheet_name, common_intersection, wedges)
         centroids = None
         if common_intersection is not None and not common_intersection.is_empty:
             centroid = common_intersection.centroid
             centroids = (centroid.x, centroid.y)
+        phase_points = np.zeros((0, 2))
+        if phase and centroids and 'Phase' in df and df['Phase'].notna().any():
+            antenna_xy = [(ant_x, ant_y) for _, ant_x, ant_y, _ in measurements]
+            phase_points, phase_centroid, phase_area, satisfied = refine_with_phase(
+                common_intersection, antenna_xy, location_phases(df))
+            if phase_centroid is not None:
+                print(f"Tag {sheet_name}: phase refinement {common_intersection.area:.3f} m2 -> {phase_area:.3f} m2 "
+                      f"({satisfied} phase constraints met)")
+                centroids = phase_centroid
         all_tags_data[sheet_name] = {
             'tag_x': tag_x,
             'tag_y': tag_y,
             'centroids': centroids,
-            'intersection_polygon': common_intersection
+            'intersection_polygon': common_intersection,
+            'phase_points': phase_points
         }
         plt.show()
     create_all_tags_plot(all_tags_data)
     plt.show()
 
 if __name__ == "__main__":
-    excel_files = glob.glob('rfid_data_110425_115143_Test1.xlsx')
+    parser = argparse.ArgumentParser(description='RSSI intersection tag localization.')
+    parser.add_argument('files', nargs='*', help='Logger files (.xlsx or .rfid); the most recent one is used')
+    parser.add_argument('--read-evidence', action='store_true',
+                        help='Use read counts and read ratios: tighter bands, corrected RSSI of rarely read tags')
+    parser.add_argument('--phase', action='store_true',
+                        help='Refine the intersection with the phase changes along the robot path')
+    parser.add_argument('--bearing', action='store_true',
+                        help='Fit the tag bearing from rotating stops and intersect its wedge with the bands')
+    parser.add_argument('--orientation', action='store_true',
+                        help='Orientation-aware bands from the alpha model, marginalized over the tag orientation')
+    parser.add_argument('--tag-alpha', type=float,
+                        help='Known tag orientation alpha [deg] for the orientation-aware bands (implies --orientation)')
+    parser.add_argument('--raster', action='store_true',
+                        help='Extract the bands from the RSSI field raster (marching squares) instead of the atlas')
+    parser.add_argument('--noise-map', action='store_true',
+                        help='Band widths from the noise map of the error model (vary with the position)')
+    parser.add_argument('--consensus', action='store_true',
+                        help='Combine the bands by a consensus search that leaves out outlier bands')
+    parser.add_argument('--coarse', action='store_true',
+                        help='Search the most common intersection coarse to fine (raster window, then exact)')
+    args = parser.parse_args()
+    if args.raster and (args.orientation or args.tag_alpha is not None):
+        parser.error('--raster cannot be combined with the orientation-aware bands')
+    if args.noise_map and (args.raster or args.orientation or args.tag_alpha is not None):
+        parser.error('--noise-map cannot be combined with --raster or the orientation-aware bands')
+    if args.coarse and args.consensus:
+        parser.error('--coarse cannot be combined with --consensus')
+    excel_files = args.files or glob.glob('rfid_data_110425_115143_Test1.xlsx')
     if not excel_files:
         print("No RFID data files found in the current directory!")
         exit(1)
     latest_file = max(excel_files, key=lambda x: os.path.getmtime(x))
     print(f"Using most recent data file: {latest_file}")
+    if args.raster:
+        load_raster()
+    else:
+        load_atlas()
     try:
-        process_tag_data(latest_file)
+        process_tag_data(latest_file, read_evidence=args.read_evidence, phase=args.phase, bearing=args.bearing,
+                         orientation=args.orientation or args.tag_alpha is not None, tag_alpha=args.tag_alpha,
+                         raster=args.raster, noise_map=args.noise_map, consensus=args.consensus,
+                         coarse=args.coarse)
     except KeyboardInterrupt:
         print("\nProcessing stopped by user.")
     except Exception as e:
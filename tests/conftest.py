@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The stages are script directories, not packages: put them on the path as their scripts do for each other
+RFID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rfid')
+EXPERIMENT_DATA = os.path.join(RFID_DIR, 'experiment-data')
+for stage in ('2-data-extraction', '3-antenna-pattern', '4-error-model', '5-localization'):
+    sys.path.insert(0, os.path.join(RFID_DIR, stage))
@@ -0,0 +1,94 @@
+import pytest
+from antenna_scheduler import AntennaScheduler, parse_port_powers
+
+def test_parse_port_powers():
+    assert parse_port_powers('1:2500,2:2700') == {1: 2500, 2: 2700}
+
+def test_parse_port_powers_default_power():
+    assert parse_port_powers('1:2500,3,4', default_power=2000) == {1: 2500, 3: 2000, 4: 2000}
+
+def test_parse_port_powers_ignores_blanks():
+    assert parse_port_powers(' 1:2500 , ,2:3000,') == {1: 2500, 2: 3000}
+
+def test_parse_port_powers_needs_a_power():
+    with pytest.raises(ValueError, match='port 3'):
+        parse_port_powers('1:2500,3')
+
+def test_parse_port_powers_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_port_powers('1:high')
+
+# Scheduler runs against the simulated reader of reader_simulator.py
+@pytest.fixture
+def reader():
+    from reader_simulator import ReaderSimulator
+    from tsl_reader import open_reader
+    # Tags 1 m ahead of ports 1 (heading 0 deg) and 2 (90 deg) only; ports 3 and 4 see nothing
+    tags = {'E2009A4050003AF000000001': (0.0, 1.0), 'E2009A4050003AF000000002': (0.2, 1.0),
+            'E2009A4050003AF000000003': (1.0, 0.0)}
+    simulator = ReaderSimulator(tags, read_rate=500.0, inventory_time=0.02, seed=1)
+    with simulator:
+        ser = open_reader(simulator.port)
+        try:
+            yield simulator, ser
+        finally:
+            ser.close()
+
+def ports_in_order(reads):
+    """Antenna ports of the reads, consecutive repeats merged."""
+    ports = []
+    for read in reads:
+        if not ports or ports[-1] != read['Antenna']:
+            ports.append(read['Antenna'])
+    return ports
+
+def test_round_robin_order(reader):
+    simulator, ser = reader
+    scheduler = AntennaScheduler(ser, {2: 2800, 1: 3000, 3: 3000}, switch_delay=0)
+    reads = scheduler.run_cycle() + scheduler.run_cycle()
+    # Ports are visited in the configured order, each cycle; port 3 has no tags in view
+    assert ports_in_order(reads) == [2, 1, 2, 1]
+    assert {read['Tag ID'] for read in reads if read['Antenna'] == 2} == {'E2009A4050003AF000000003'}
+    assert scheduler.round_counts == {2: 2, 1: 2, 3: 2}
+    assert simulator.antenna == 3 and simulator.power == 3000
+
+def test_fixed_dwell(reader):
+    _, ser = reader
+    scheduler = AntennaScheduler(ser, {1: 3000, 4: 3000}, dwell_rounds=3, switch_delay=0)
+    scheduler.run_cycle()
+    assert scheduler.round_counts == {1: 3, 4: 3}
+
+def test_adaptive_dwell_extends_while_new_tags_appear(reader):
+    _, ser = reader
+    scheduler = AntennaScheduler(ser, {1: 3000, 3: 3000}, adaptive=True, max_rounds=5, switch_delay=0)
+    scheduler.run_cycle()
+    # Port 1 finds its two tags in the first round, so it gets a second round, which finds nothing new;
+    # port 3 finds nothing and moves on after one round
+    assert scheduler.round_counts == {1: 2, 3: 1}
+    assert scheduler.new_tag_counts == {1: 2, 3: 0}
+    # At the same pose the tags are no longer new
+    scheduler.run_cycle()
+    assert scheduler.round_counts == {1: 3, 3: 2}
+    # At a new pose every tag counts as new again
+    scheduler.new_pose()
+    scheduler.run_cycle()
+    assert scheduler.round_counts == {1: 2, 3: 1}
+
+def test_adaptive_dwell_is_capped(reader):
+    _, ser = reader
+    scheduler = AntennaScheduler(ser, {1: 3000}, dwell_rounds=2, adaptive=True, max_rounds=2, switch_delay=0)
+    scheduler.run_cycle()
+    assert scheduler.round_counts == {1: 2}
+
+def test_new_pose_resets_round_counts(reader):
+    _, ser = reader
+    scheduler = AntennaScheduler(ser, {1: 3000, 2: 3000}, switch_delay=0)
+    scheduler.run_cycle()
+    scheduler.new_pose()
+    assert scheduler.round_counts == {1: 0, 2: 0}
+    assert scheduler.seen_tags == {1: set(), 2: set()}
+
+@pytest.mark.parametrize('port_powers', [{5: 3000}, {1: 3500}, {}])
+def test_invalid_port_powers(port_powers):
+    with pytest.raises(ValueError):
+        AntennaScheduler(None, port_powers)
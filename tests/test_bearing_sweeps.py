@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+from bearing_sweeps import (BEARING_MARGIN, MIN_ROTATIONS, bearing_wedges, fit_bearings, sweep_stops,
+                            wrap_degrees)
+from localization_core import rssi_angle
+
+def sweep_reads(tag_id, tag, stop, rotations, offset=-50.0, noise=0.0, seed=0):
+    """Reads of a rotating stop: RSSI = offset + rssi_angle(bearing - rotation), bearing 0 = +Y, clockwise."""
+    bearing = np.degrees(np.arctan2(tag[0] - stop[0], tag[1] - stop[1]))
+    rotations = np.asarray(rotations, dtype=float)
+    rssi = offset + rssi_angle(wrap_degrees(bearing - rotations))
+    rssi = rssi + np.random.default_rng(seed).normal(0.0, noise, len(rotations))
+    return pd.DataFrame({'Tag ID': tag_id, 'RSSI': rssi, 'Antenna X [m]': stop[0], 'Antenna Y [m]': stop[1],
+                         'Antenna Rot Z [deg]': wrap_degrees(rotations)}), bearing
+
+def test_wrap_degrees():
+    assert wrap_degrees([180.0, -180.0, 190.0, -190.0, 0.0]).tolist() == [-180.0, -180.0, -170.0, 170.0, 0.0]
+
+def test_sweep_stops_group_nearby_positions():
+    df = pd.DataFrame({'Antenna X [m]': [1.0, 0.0, 0.05, 1.1, 0.0, 3.0],
+                       'Antenna Y [m]': [0.0, 0.0, 0.05, 0.0, 0.0, 0.0]})
+    # Numbered in visiting order; an off-axis antenna position still belongs to its stop
+    assert sweep_stops(df).tolist() == [0, 1, 1, 0, 1, 2]
+
+def test_bearings_of_noiseless_sweeps():
+    rotations = np.arange(-60.0, 61.0, 15.0)
+    parts = [sweep_reads('A', (1.0, 2.0), (0.0, 0.0), rotations),
+             sweep_reads('B', (-1.5, 0.5), (0.0, 0.0), rotations - 60.0),
+             sweep_reads('A', (1.0, 2.0), (3.0, 0.0), rotations - 30.0, offset=-60.0)]
+    bearings = fit_bearings(pd.concat([df for df, _ in parts], ignore_index=True))
+    assert len(bearings) == 3
+    assert bearings['Tag ID'].tolist() == ['A', 'B', 'A']
+    assert bearings['Bearing [deg]'].to_numpy() == pytest.approx([bearing for _, bearing in parts], abs=1e-6)
+    assert bearings['Bearing Error [deg]'].to_numpy() == pytest.approx(0.0, abs=1e-6)
+    assert bearings['Rotations'].tolist() == [len(rotations)] * 3
+    assert bearings[['Antenna X [m]', 'Antenna Y [m]']].to_numpy().tolist() == [[0.0, 0.0], [0.0, 0.0], [3.0, 0.0]]
+
+def test_sweep_across_180_degrees():
+    df, bearing = sweep_reads('A', (0.3, -2.0), (0.0, 0.0), np.arange(140.0, 221.0, 10.0))
+    assert abs(bearing) > 170
+    fitted = fit_bearings(df)['Bearing [deg]'].iloc[0]
+    assert wrap_degrees(fitted - bearing) == pytest.approx(0.0, abs=1e-6)
+
+def test_noisy_sweep_error_covers_the_bearing():
+    rotations = np.repeat(np.arange(-80.0, 81.0, 10.0), 5)
+    df, bearing = sweep_reads('A', (1.0, 2.0), (0.0, 0.0), rotations, noise=2.0, seed=3)
+    row = fit_bearings(df).iloc[0]
+    assert row['Reads'] == len(rotations)
+    assert row['Residual [dB]'] == pytest.approx(2.0, rel=0.3)
+    assert 0 < row['Bearing Error [deg]'] < BEARING_MARGIN
+    assert abs(row['Bearing [deg]'] - bearing) < 3 * row['Bearing Error [deg]']
+
+def test_too_few_rotations_give_no_bearing():
+    df, _ = sweep_reads('A', (1.0, 2.0), (0.0, 0.0), np.repeat(np.arange(MIN_ROTATIONS - 1) * 20.0, 3))
+    assert fit_bearings(df).empty
+
+def test_wedges_contain_the_tag():
+    rotations = np.arange(-60.0, 61.0, 15.0)
+    tag = (1.0, 2.0)
+    df = pd.concat([sweep_reads('A', tag, stop, rotations + 20.0 * index, noise=1.0, seed=index)[0]
+                    for index, stop in enumerate([(0.0, 0.0), (2.5, 0.5)])], ignore_index=True)
+    wedges = bearing_wedges(fit_bearings(df))
+    assert len(wedges) == 2
+    assert all(wedge.contains(Point(tag)) for wedge in wedges)
+    # Two stops cross near the tag
+    intersection = wedges[0].intersection(wedges[1])
+    assert intersection.centroid.distance(Point(tag)) < 0.5
@@ -0,0 +1,65 @@
+import math
+import time
+import numpy as np
+import pytest
+from dwell_controller import DwellController, get_rms_rssi
+
+def add_reads(controller, tag_id, values, antenna=1):
+    for value in values:
+        controller.add(tag_id, antenna, float(value))
+
+def test_target_width_is_a_fraction_of_the_band():
+    controller = DwellController(band_fraction=0.1, min_time=0.0)
+    add_reads(controller, 'A', [-60.0, -60.0])
+    assert controller.target_width(('A', 1)) == pytest.approx(0.1 * 2 * get_rms_rssi(-60.0))
+
+def test_interval_width():
+    controller = DwellController(z_score=2.0, min_time=0.0)
+    add_reads(controller, 'A', [-61.0])
+    assert controller.interval_width(('A', 1)) == math.inf
+    add_reads(controller, 'A', [-59.0, -61.0, -59.0])
+    # std of (-61, -59, -61, -59) is 2 / sqrt(3)
+    assert controller.interval_width(('A', 1)) == pytest.approx(2 * 2.0 * (2 / math.sqrt(3)) / math.sqrt(4))
+
+def test_converges_once_every_tag_is_settled():
+    rng = np.random.default_rng(1)
+    controller = DwellController(min_reads=5, min_time=0.0, max_time=60.0)
+    assert not controller.converged()
+    add_reads(controller, 'A', [-60.0, -60.1, -59.9, -60.0])
+    # Settled, but fewer than min_reads reads
+    assert not controller.converged() and not controller.done()
+    add_reads(controller, 'A', [-60.05])
+    assert controller.converged()
+    # A second tag with a wide spread keeps the pose open until it has enough reads
+    add_reads(controller, 'B', rng.normal(-65.0, 3.0, 10), antenna=2)
+    assert not controller.converged()
+    add_reads(controller, 'B', rng.normal(-65.0, 3.0, 2000), antenna=2)
+    assert controller.converged() and controller.done()
+
+def test_min_time_holds_a_converged_pose():
+    controller = DwellController(min_reads=2, min_time=60.0)
+    add_reads(controller, 'A', [-60.0] * 10)
+    assert controller.converged()
+    assert not controller.done()
+
+def test_max_time_ends_an_unsettled_pose():
+    controller = DwellController(min_time=0.0, max_time=5.0)
+    add_reads(controller, 'A', [-50.0, -70.0, -55.0, -65.0, -60.0])
+    assert not controller.done()
+    controller.pose_start = time.time() - 5.0
+    assert not controller.converged()
+    assert controller.done()
+    assert controller.poses == 1 and controller.session_saved == 0.0
+
+def test_dwell_is_recorded_once_per_pose():
+    controller = DwellController(min_reads=2, min_time=0.0, max_time=30.0)
+    add_reads(controller, 'A', [-60.0] * 5)
+    assert controller.done() and controller.done()
+    assert controller.poses == 1
+    assert controller.session_saved == pytest.approx(30.0, abs=1.0)
+    controller.start_pose()
+    assert controller.stats == {} and not controller.done()
+    add_reads(controller, 'A', [-60.0] * 5)
+    assert controller.done()
+    assert controller.poses == 2
+    assert 'over 2 poses' in controller.session_report()
@@ -0,0 +1,80 @@
+import glob
+import math
+import os
+import pandas as pd
+import pytest
+from conftest import EXPERIMENT_DATA
+from shapely.geometry import box
+from localization_core import (band_polygon, coarse_to_fine_intersection, consensus_intersection,
+                               find_most_common_intersection, localize, pose_measurements, search_intersection,
+                               sensitivity_band)
+
+ARCHIVED_FILES = sorted(glob.glob(os.path.join(EXPERIMENT_DATA, '*.xlsx')))
+# Files where the searches settle on different regions (localization README): ties between two regions of equal
+# depth (Test4) and a deeper region than the default search's greedy step reaches (company)
+DIFFERENT_REGIONS = {
+    'coarse': ('-Test4.xlsx', '-company-2605.xlsx'),
+    'consensus': ('-Test4.xlsx', '-company-2605.xlsx'),
+}
+CENTROID_TOLERANCE = 0.0005  # Simplification error of the coarse-to-fine search [m]
+SEARCHES = {
+    'coarse': coarse_to_fine_intersection,
+    # Without the time budget the consensus search tries every pair and does not depend on the machine
+    'consensus': lambda polygons: consensus_intersection(polygons, time_budget=math.inf),
+}
+
+def tag_bands(path):
+    """Sensitivity band polygons of every tag in an archived logger file."""
+    bands = {}
+    for sheet_name in pd.ExcelFile(path).sheet_names:
+        if sheet_name == 'All Data':
+            continue
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        bands[sheet_name] = [band_polygon(sensitivity_band(*measurement)) for measurement in pose_measurements(df)]
+    return bands
+
+def depth(polygons, region):
+    """Number of polygons covering a point of the region."""
+    point = region.representative_point()
+    return sum(polygon.covers(point) for polygon in polygons)
+
+@pytest.fixture(scope='module', params=ARCHIVED_FILES, ids=os.path.basename)
+def archived_bands(request):
+    bands = tag_bands(request.param)
+    reference = {tag_id: find_most_common_intersection(polygons) for tag_id, polygons in bands.items()}
+    return os.path.basename(request.param), bands, reference
+
+@pytest.mark.parametrize('name', sorted(SEARCHES))
+def test_search_matches_find_most_common_intersection(archived_bands, name):
+    file_name, bands, reference = archived_bands
+    for tag_id, polygons in bands.items():
+        region = SEARCHES[name](polygons)
+        expected = reference[tag_id]
+        assert region is not None and not region.is_empty
+        if file_name.endswith(DIFFERENT_REGIONS[name]):
+            # Another region, but never one covered by fewer bands
+            assert depth(polygons, region) >= depth(polygons, expected)
+        else:
+            assert region.centroid.distance(expected.centroid) <= CENTROID_TOLERANCE
+            assert depth(polygons, region) == depth(polygons, expected)
+
+def test_consensus_leaves_out_an_outlier():
+    polygons = [box(0.0, 0.0, 1.0, 1.0), box(0.5, 0.5, 1.5, 1.5), box(0.2, 0.6, 0.9, 1.3), box(5.0, 5.0, 6.0, 6.0)]
+    region = search_intersection(polygons, consensus=True)
+    assert region.equals(find_most_common_intersection(polygons))
+    assert region.equals(box(0.5, 0.6, 0.9, 1.0))
+
+def test_coarse_search_finds_the_deepest_region():
+    polygons = [box(0.0, 0.0, 1.0, 1.0), box(0.5, 0.5, 1.5, 1.5), box(0.2, 0.6, 0.9, 1.3), box(5.0, 5.0, 6.0, 6.0)]
+    region = search_intersection(polygons, coarse=True)
+    assert region.symmetric_difference(box(0.5, 0.6, 0.9, 1.0)).area < 1e-6
+    assert coarse_to_fine_intersection(polygons[-1:]) is None
+
+def test_localize_uses_the_selected_search():
+    measurements = [(-60.0, 0.0, 0.0, 0.0), (-62.0, 1.0, 0.0, 0.0), (-61.0, 2.0, 0.0, 0.0)]
+    polygons = [band_polygon(sensitivity_band(*measurement)) for measurement in measurements]
+    for options in ({}, {'consensus': True}, {'coarse': True}):
+        intersection, centroid = localize(measurements, **options)
+        assert intersection.equals(search_intersection(polygons, **options))
+        assert centroid == pytest.approx((intersection.centroid.x, intersection.centroid.y))
+    assert search_intersection(polygons[:1]) is None
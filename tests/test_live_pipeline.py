@@ -0,0 +1,67 @@
+import json
+import os
+import pytest
+from conftest import EXPERIMENT_DATA
+from live_pipeline import JsonLinesSink, LivePipeline, ReplaySource, latency_summary
+from localization_core import localize
+
+EXPERIMENT_FILE = os.path.join(EXPERIMENT_DATA, 'rfid_data_140525_132422-Test6.xlsx')
+
+class CollectingSink:
+    def __init__(self):
+        self.estimates = []
+        self.closed = False
+
+    def update(self, estimate):
+        self.estimates.append(estimate)
+
+    def close(self):
+        self.closed = True
+
+def consecutive_pose_measurements(df):
+    """Mean RSSI per tag over every run of reads at one pose, in file order, as the pipeline aggregates them."""
+    pose = df[['Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]', 'Antenna Rot Z [deg]']]
+    block = (pose != pose.shift()).any(axis=1).cumsum()
+    measurements = {}
+    for (_, tag_id), group in df.groupby([block, df['Tag ID'].astype(str)], sort=True):
+        first = group.iloc[0]
+        measurements.setdefault(tag_id, []).append(
+            (group['RSSI'].mean(), first['Antenna X [m]'], first['Antenna Y [m]'], first['Antenna Rot Z [deg]']))
+    return measurements
+
+def test_replayed_file_gives_the_batch_estimates(tmp_path):
+    source = ReplaySource(EXPERIMENT_FILE, interval=0)
+    sink = CollectingSink()
+    out = str(tmp_path / 'estimates.jsonl')
+    tag_locations = {str(tag_id): (group['Tag X [m]'].iloc[0], group['Tag Y [m]'].iloc[0])
+                     for tag_id, group in source.df.groupby('Tag ID')}
+    pipeline = LivePipeline(source, [sink, JsonLinesSink(out)], workers=1, tag_locations=tag_locations)
+    pipeline.run()
+
+    assert sink.closed
+    assert pipeline.reads == len(source.df)
+    with open(out) as f:
+        assert [json.loads(line) for line in f] == sink.estimates
+    expected = consecutive_pose_measurements(source.df)
+    assert set(pipeline.measurements) == set(expected)
+    final = {estimate['Tag ID']: estimate for estimate in sink.estimates}
+    assert set(final) == {tag_id for tag_id, measurements in expected.items() if len(measurements) >= 2}
+    for tag_id, estimate in final.items():
+        # The newest request of a tag is never coalesced away: its last estimate uses every location
+        _, centroid = localize(expected[tag_id])
+        assert estimate['Locations'] == len(expected[tag_id])
+        assert (estimate['X [m]'], estimate['Y [m]']) == pytest.approx(centroid, abs=1e-9)
+        # Within the 0.05-0.1 m the batch script reaches on this file
+        assert estimate['Error [m]'] < 0.15
+    assert all(latency >= 0 for latency in pipeline.read_latencies + pipeline.processing_latencies)
+    assert all(read >= processing for read, processing in zip(pipeline.read_latencies, pipeline.processing_latencies))
+
+def test_max_locations_limits_the_history():
+    source = ReplaySource(EXPERIMENT_FILE, interval=0)
+    sink = CollectingSink()
+    LivePipeline(source, [sink], workers=1, max_locations=3).run()
+    assert sink.estimates and max(estimate['Locations'] for estimate in sink.estimates) == 3
+
+def test_latency_summary():
+    assert latency_summary([]) == 'no estimates'
+    assert latency_summary([0.01, 0.02, 0.03]).startswith('3 estimates, mean 20 ms, median 20 ms')
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from localization_core import (MAX_EFFECTIVE_READS, RMS_MARGIN, censored_mean_rssi, get_rms_rssi, get_rms_rssi_reads,
+                               location_features, pose_measurements)
+
+def logger_rows(x, y, rot_z, antenna, rounds, dwell, read_rounds, rssi, start=0.0):
+    """Rows of one logger dwell: one read per inventory round in `read_rounds` of the `rounds` on the port."""
+    return [{'Tag ID': 'A', 'RSSI': value, 'Antenna': antenna, 'Antenna X [m]': x, 'Antenna Y [m]': y,
+             'Antenna Z [m]': 0.0, 'Antenna Rot Z [deg]': rot_z, 'Distance [m]': round(np.hypot(x, y), 3),
+             'Timestamp': start + 0.1 * round_index, 'Rounds': rounds, 'Dwell [s]': dwell}
+            for round_index, value in zip(read_rounds, rssi)]
+
+def test_read_ratio_over_poses_sharing_a_distance():
+    # Two rotations at the same position: 10 rounds each, the tag read in 5 of them at each
+    df = pd.DataFrame(logger_rows(1.0, 0.0, 0.0, 1, 10, 2.0, range(5), [-60.0] * 5) +
+                      logger_rows(1.0, 0.0, 90.0, 1, 10, 2.0, range(5), [-56.0] * 5, start=10.0))
+    features = location_features(df)
+    assert len(features) == 1
+    row = features.iloc[0]
+    assert row['Read Count'] == 10
+    assert row['Read Ratio'] == pytest.approx(0.5)
+    assert row['Read Rate [1/s]'] == pytest.approx(10 / 4.0)
+    assert row['RSSI'] == pytest.approx(-58.0)
+    # The pose is that of the strongest read
+    assert row['Antenna Rot Z [deg]'] == 90.0
+
+def test_read_ratio_over_antenna_ports():
+    df = pd.DataFrame(logger_rows(0.0, 1.0, 0.0, 1, 8, 1.0, range(8), [-60.0] * 8) +
+                      logger_rows(0.0, 1.0, 0.0, 2, 8, 1.0, range(2), [-70.0] * 2, start=5.0))
+    row = location_features(df).iloc[0]
+    assert row['Read Ratio'] == pytest.approx(10 / 16)
+    # Both ports ran in the same dwell
+    assert row['Read Rate [1/s]'] == pytest.approx(10 / 1.0)
+
+def test_features_without_dwell_columns():
+    df = pd.DataFrame(logger_rows(1.0, 0.0, 0.0, 1, 10, 2.0, range(3), [-60.0] * 3)).drop(
+        columns=['Rounds', 'Dwell [s]', 'Timestamp'])
+    row = location_features(df).iloc[0]
+    assert row['Read Count'] == 3
+    assert np.isnan(row['Read Ratio']) and np.isnan(row['Read Rate [1/s]'])
+
+def test_pose_measurements_with_read_evidence():
+    df = pd.DataFrame(logger_rows(1.0, 0.0, 0.0, 1, 10, 2.0, range(5), [-60.0] * 5) +
+                      logger_rows(2.0, 0.0, 0.0, 1, 10, 2.0, range(10), [-65.0] * 10, start=10.0))
+    assert pose_measurements(df) == [(-60.0, 1.0, 0.0, 0.0), (-65.0, 2.0, 0.0, 0.0)]
+    measurements, read_counts = pose_measurements(df, read_evidence=True)
+    assert read_counts == [5, 10]
+    # Half the rounds missed: the mean of the reads that arrived is corrected downwards
+    assert measurements[0][0] == pytest.approx(censored_mean_rssi(-60.0, 0.5)) and measurements[0][0] < -60.0
+    assert measurements[1][0] == -65.0
+
+def test_censored_mean_rssi():
+    assert censored_mean_rssi(-60.0, 1.0) == -60.0
+    corrections = [-60.0 - censored_mean_rssi(-60.0, ratio) for ratio in (0.9, 0.5, 0.2)]
+    assert 0 < corrections[0] < corrections[1] < corrections[2]
+
+def test_band_tightening_with_reads():
+    rssi = np.array([-70.0, -50.0])
+    assert get_rms_rssi_reads(rssi, 1) == pytest.approx(get_rms_rssi(rssi))
+    spread = get_rms_rssi(rssi) - RMS_MARGIN
+    assert get_rms_rssi_reads(rssi, 4) == pytest.approx(spread / 2 + RMS_MARGIN)
+    # Reads beyond MAX_EFFECTIVE_READS share the multipath and do not narrow the band further
+    assert get_rms_rssi_reads(rssi, 100) == pytest.approx(get_rms_rssi_reads(rssi, MAX_EFFECTIVE_READS))
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import EXPERIMENT_DATA
+from measurement_store import (HEADER_SIZE, MAGIC, MEASUREMENT_DTYPE, PHASE_UNKNOWN, VERSION, MeasurementWriter,
+                               convert_excel, open_measurements, read_metadata, record_count, sidecar_path, to_frame)
+
+READS = [
+    # tag_id, rssi, antenna, pose, timestamp, phase, rounds, dwell
+    ('E2009A4050003AF000000102', -60.58, 4, (0.1, 0.25, 0.0, 45.0), 1717400000.125, '3FF', 5, 1.5),
+    ('E2009A4050003AF000000085', -71.3, 1, (0.6, 0.4, 0.05, -90.0), 1717400001.5, None, None, None),
+    ('E2009A4050003AF000000102', -48.0, 2, (1.2, 0.4, 0.0, 0.0), 1717400002.0, 1023, 3, 0.75),
+]
+
+def write_reads(path, reads, flush_every=2):
+    with MeasurementWriter(path, flush_every=flush_every) as writer:
+        writer.set_tag_location('E2009A4050003AF000000102', 0.9, 1.4)
+        for tag_id, rssi, antenna, pose, timestamp, phase, rounds, dwell in reads:
+            writer.add(tag_id, rssi, antenna, pose, timestamp, phase, rounds, dwell)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'session.rfid')
+    write_reads(path, READS)
+    records, epcs, tag_locations = open_measurements(path)
+    assert record_count(path) == len(records) == 3
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * MEASUREMENT_DTYPE.itemsize == HEADER_SIZE + 3 * 41
+    assert epcs == ['E2009A4050003AF000000102', 'E2009A4050003AF000000085']
+    assert tag_locations == {'E2009A4050003AF000000102': (0.9, 1.4)}
+    frame = to_frame(records, epcs, tag_locations)
+    assert frame['Tag ID'].tolist() == [read[0] for read in READS]
+    assert frame['RSSI'].tolist() == [read[1] for read in READS]
+    assert frame['Antenna'].tolist() == [read[2] for read in READS]
+    assert frame[['Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]', 'Antenna Rot Z [deg]']].values.tolist() == \
+        [list(read[3]) for read in READS]
+    assert frame['Timestamp'].to_numpy() == pytest.approx([read[4] for read in READS], abs=1e-6)
+    assert frame['Phase'].tolist()[::2] == [0x3FF, 1023] and np.isnan(frame['Phase'][1])
+    assert frame['Rounds'].tolist()[::2] == [5, 3] and np.isnan(frame['Rounds'][1])
+    assert frame['Dwell [s]'].tolist()[::2] == [1.5, 0.75] and np.isnan(frame['Dwell [s]'][1])
+    assert frame['Tag X [m]'].tolist()[::2] == [0.9, 0.9] and np.isnan(frame['Tag X [m]'][1])
+    assert records['phase'][1] == PHASE_UNKNOWN
+
+def test_append_to_an_existing_file(tmp_path):
+    path = str(tmp_path / 'session.rfid')
+    write_reads(path, READS[:2])
+    write_reads(path, READS[2:])
+    records, epcs, _ = open_measurements(path)
+    assert len(records) == 3 and len(epcs) == 2
+    assert to_frame(records, epcs)['Tag ID'].tolist() == [read[0] for read in READS]
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / 'session.rfid')
+    MeasurementWriter(path).close()
+    records, epcs, _ = open_measurements(path)
+    assert len(records) == 0 and epcs == []
+    assert to_frame(records, epcs).empty
+
+def test_other_record_sizes_are_rejected(tmp_path):
+    path = tmp_path / 'session.rfid'
+    path.write_bytes(MAGIC + np.array([VERSION, MEASUREMENT_DTYPE.itemsize - 8], dtype='<u2').tobytes() + bytes(4))
+    with pytest.raises(ValueError, match='Unsupported measurement file'):
+        open_measurements(str(path))
+    with pytest.raises(ValueError, match='Unsupported measurement file'):
+        MeasurementWriter(str(path))
+
+def test_missing_sidecar(tmp_path):
+    path = str(tmp_path / 'session.rfid')
+    write_reads(path, READS)
+    os.remove(sidecar_path(path))
+    with pytest.raises(FileNotFoundError, match='sidecar'):
+        read_metadata(path)
+
+def test_not_a_measurement_file(tmp_path):
+    path = tmp_path / 'session.rfid'
+    path.write_bytes(b'not a measurement file')
+    with pytest.raises(ValueError, match='not a binary measurement file'):
+        open_measurements(str(path))
+
+def test_convert_excel_round_trip(tmp_path):
+    excel_file = os.path.join(EXPERIMENT_DATA, 'rfid_data_140525_132422-Test6.xlsx')
+    path = str(tmp_path / 'Test6.rfid')
+    convert_excel(excel_file, path)
+    records, epcs, tag_locations = open_measurements(path)
+    frame = to_frame(records, epcs, tag_locations)
+    excel = pd.read_excel(excel_file, sheet_name='All Data')
+    columns = ['Tag ID', 'RSSI', 'Antenna', 'Antenna X [m]', 'Antenna Y [m]', 'Antenna Z [m]', 'Antenna Rot Z [deg]',
+               'Tag X [m]', 'Tag Y [m]']
+    pd.testing.assert_frame_equal(frame[columns], excel[columns], check_dtype=False)
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import EXPERIMENT_DATA
+from localization_core import MAX_EFFECTIVE_READS, NOISE_MODEL, band_polygon, localize, sensitivity_band
+from monte_carlo import (MAX_RANGE, SENSITIVITY, band_polygons, cep_summary, expected_rssi, load_layout,
+                         localize_trials, parse_points, run_monte_carlo, simulate_rssi)
+from pattern_atlas import rssi_angle, rssi_distance
+
+EXPERIMENT_FILE = os.path.join(EXPERIMENT_DATA, 'rfid_data_140525_132422-Test6.xlsx')
+
+@pytest.fixture(scope='module')
+def layout():
+    return load_layout(EXPERIMENT_FILE)
+
+def noiseless_estimates(tags, poses):
+    """localize on the noise-free RSSI of every tag, as the batch script would."""
+    expected = expected_rssi(tags, poses)
+    return [localize([(rssi, *pose) for rssi, pose in zip(row, poses) if not np.isnan(rssi)])[1] for row in expected]
+
+def test_expected_rssi():
+    poses = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 180.0], [0.0, -3.0, 0.0]])
+    rssi = expected_rssi([[0.6, 0.8]], poses)[0]
+    assert rssi[0] == pytest.approx(rssi_distance(1.0) + rssi_angle(np.degrees(np.arctan2(0.6, 0.8))))
+    # Behind the antenna, and beyond MAX_RANGE
+    assert np.isnan(rssi[1]) and np.isnan(rssi[2]) and np.hypot(0.6, 3.8) > MAX_RANGE
+
+def test_read_noise_without_model_error():
+    tags, poses = [[1.0, 1.5]], [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
+    expected = expected_rssi(tags, poses)[0]
+    rssi = simulate_rssi(tags, poses, 4000, reads=16, model_std=0.0, seed=1)[:, 0]
+    # The mean of 16 reads has the read std of MAX_EFFECTIVE_READS independent reads
+    assert rssi.std(axis=0) == pytest.approx(NOISE_MODEL.std(expected) / np.sqrt(MAX_EFFECTIVE_READS), rel=0.05)
+    assert rssi.mean(axis=0) == pytest.approx(expected, abs=0.05)
+    assert np.all(np.isnan(simulate_rssi(tags, poses, 10, model_std=0.0)[..., expected < SENSITIVITY]))
+
+def test_batched_bands_match_the_localization_bands(layout):
+    _, poses = layout
+    rssi = np.array([-55.0, np.nan, -62.5])
+    polygons, index = band_polygons(rssi, poses[:3])
+    assert index.tolist() == [0, 2]
+    for polygon, i in zip(polygons, index):
+        assert polygon.symmetric_difference(band_polygon(sensitivity_band(rssi[i], *poses[i]))).area < 1e-9
+
+def test_noiseless_trial_is_the_batch_estimate(layout):
+    tags, poses = layout
+    expected = expected_rssi(tags, poses)
+    for row, estimate in zip(expected, noiseless_estimates(tags, poses)):
+        assert localize_trials(row[None], poses)[0, :2] == pytest.approx(estimate, abs=1e-9)
+
+def test_without_model_error_only_the_bias_is_left(layout):
+    # README: with --model-std 0 the spread collapses to the bias of the intersection centroid
+    tags, poses = layout
+    summary = cep_summary(run_monte_carlo(tags, poses, trials=20, model_std=0.0, workers=2, seed=1))
+    noisy = cep_summary(run_monte_carlo(tags, poses, trials=20, model_std=3.0, workers=2, seed=1))
+    for (_, row), (_, noisy_row), estimate, tag in zip(summary.iterrows(), noisy.iterrows(),
+                                                       noiseless_estimates(tags, poses), tags):
+        bias = np.hypot(estimate[0] - tag[0], estimate[1] - tag[1])
+        assert row['Localized [%]'] == 100.0
+        assert row['CEP50 [m]'] == pytest.approx(bias, abs=0.02)
+        assert row['CEP95 [m]'] - row['CEP50 [m]'] < 0.05
+        assert noisy_row['CEP95 [m]'] > row['CEP95 [m]'] + 0.1
+
+def test_cep_of_missed_trials():
+    results = pd.DataFrame({'Tag': 0, 'Trial': range(4), 'Tag X [m]': 0.0, 'Tag Y [m]': 0.0, 'Locations': 3,
+                            'X [m]': [0.1, 0.2, np.nan, 0.3], 'Y [m]': 0.0, 'Error [m]': [0.1, 0.2, np.nan, 0.3],
+                            'Area [m2]': 0.01})
+    row = cep_summary(results).iloc[0]
+    assert row['Localized [%]'] == 75.0
+    # The miss counts as the largest error: half of the trials are within 0.3 m
+    assert row['CEP50 [m]'] == 0.3 and row['CEP95 [m]'] == np.inf
+    assert row['Mean Error [m]'] == pytest.approx(0.2)
+
+def test_parse_points():
+    assert parse_points('0,1;2,3', 2).tolist() == [[0.0, 1.0], [2.0, 3.0]]
+    with pytest.raises(ValueError, match='3 comma-separated'):
+        parse_points('0,1', 3)
@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import threading
+import time
+import pytest
+import multi_reader
+from multi_reader import MultiReaderAcquisition, collect
+from reader_simulator import ReaderSimulator
+
+TAGS = {'E2009A4050003AF000000001': (0.0, 1.0), 'E2009A4050003AF000000002': (0.2, 1.0)}
+
+@pytest.fixture
+def simulators(monkeypatch):
+    # No settling time after `$ir`: the simulated reader applies the setting at once
+    monkeypatch.setattr(multi_reader, 'init', functools.partial(multi_reader.init, delay=0))
+    sims = [ReaderSimulator(TAGS, read_rate=500.0, inventory_time=0.02, seed=seed).start() for seed in (1, 2)]
+    try:
+        yield sims
+    finally:
+        for simulator in sims:
+            simulator.stop()
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Record every serial connection multi_reader opens."""
+    connections = []
+
+    def open_reader(port):
+        connections.append(original(port))
+        return connections[-1]
+
+    original = multi_reader.open_reader
+    monkeypatch.setattr(multi_reader, 'open_reader', open_reader)
+    return connections
+
+def reader_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('reader-')]
+
+def test_collects_from_every_reader(simulators):
+    acquisition = MultiReaderAcquisition([simulator.port for simulator in simulators])
+    df, _ = asyncio.run(collect(acquisition, 0.5))
+    summary = acquisition.summary().set_index('Reader')
+    assert set(df['Reader']) == {simulator.port for simulator in simulators}
+    assert (summary['Rounds'] > 0).all()
+    assert not summary['Dropped'].any()
+    assert summary['Reads'].sum() == len(df)
+
+def test_failing_reader_backs_off_and_is_dropped(simulators, monkeypatch):
+    monkeypatch.setattr(multi_reader, 'RETRY_DELAY', 0.02)
+    monkeypatch.setattr(multi_reader, 'MAX_RETRY_DELAY', 0.08)
+    monkeypatch.setattr(multi_reader, 'MAX_FAILURES', 5)
+    broken = simulators[1].port
+    attempts = []
+
+    def inventory(ser):
+        if ser.port == broken:
+            attempts.append(time.monotonic())
+            raise Exception('Incomplete response: timed out after 0 bytes')
+        return original(ser)
+
+    original = multi_reader.inventory
+    monkeypatch.setattr(multi_reader, 'inventory', inventory)
+    acquisition = MultiReaderAcquisition([simulator.port for simulator in simulators])
+    df, _ = asyncio.run(collect(acquisition, 0.6))
+    summary = acquisition.summary().set_index('Reader')
+
+    # The wait doubles after every failure up to MAX_RETRY_DELAY; the fifth failure drops the reader
+    assert len(attempts) == 5
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    for gap, delay in zip(gaps, [0.02, 0.04, 0.08, 0.08]):
+        assert gap >= delay * 0.9
+    assert summary.loc[broken, 'Dropped']
+    assert summary.loc[broken, 'Errors'] == 5
+    assert summary.loc[broken, 'Reads'] == 0
+    # The other reader carries on
+    working = simulators[0].port
+    assert not summary.loc[working, 'Dropped']
+    assert set(df['Reader']) == {working}
+
+def test_start_closes_opened_readers_when_a_port_fails(simulators, opened):
+    acquisition = MultiReaderAcquisition([simulators[0].port, '/dev/does-not-exist'])
+    with pytest.raises(Exception):
+        asyncio.run(acquisition.start())
+    assert len(opened) == 1
+    assert not opened[0].is_open
+    assert acquisition.sessions == []
+    assert not reader_threads()
+
+def test_start_closes_the_reader_whose_init_fails(simulators, opened, monkeypatch):
+    failing = simulators[1].port
+
+    def init(ser, antenna_number, power):
+        if ser.port == failing:
+            raise Exception(f"Antenna setting to {antenna_number} failed. EC: 1")
+        original(ser, antenna_number, power)
+
+    original = multi_reader.init
+    monkeypatch.setattr(multi_reader, 'init', init)
+    acquisition = MultiReaderAcquisition([simulator.port for simulator in simulators])
+    with pytest.raises(Exception, match='EC: 1'):
+        asyncio.run(acquisition.start())
+    assert len(opened) == 2
+    assert not any(ser.is_open for ser in opened)
+    assert acquisition.sessions == []
+    assert not reader_threads()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+import localization_core
+from localization_core import get_rms_rssi, get_rms_rssi_map, get_rms_rssi_reads, localize, sensitivity_band
+from noise_map import (FACTOR_RANGE, MAX_AZIMUTH, MAX_RANGE, NoiseMap, learn_noise_map, load_noise_map,
+                       save_noise_map)
+from noise_model import load_noise_model
+from pattern_atlas import LOCALIZATION_MODEL, load_atlas
+
+def residual_poses(cells):
+    """Pose residuals (pose_residuals columns) with (range, azimuth, variance ratio, residual) per pose."""
+    return pd.DataFrame(cells, columns=['Range [m]', 'Azimuth [deg]', 'Variance Ratio', 'Residual [dB]'])
+
+def test_cells_and_factors_off_the_grid():
+    noise_map = NoiseMap.uniform()
+    noise_map.read[:] = 0.7
+    i, j, inside = noise_map.cells([0.2, 0.2, 0.2, MAX_RANGE + 0.1, -0.1], [-MAX_AZIMUTH, MAX_AZIMUTH, 95.0, 0.0, 0.0])
+    # The +-90 deg rays belong to the outermost cells
+    assert inside.tolist() == [True, True, False, False, False]
+    assert (i[:2].tolist(), j[:2].tolist()) == ([0, 0], [0, noise_map.read.shape[1] - 1])
+    read, model = noise_map.factors([0.2, 0.2], [0.0, 95.0])
+    assert read.tolist() == [0.7, 1.0] and model.tolist() == [1.0, 1.0]
+
+def test_uniform_map_gives_the_noise_model_bands():
+    rssi = np.array([-70.0, -55.0])
+    half_width = NoiseMap.uniform().half_width(rssi, [1.0, 2.0], [0.0, 45.0])
+    assert half_width == pytest.approx(load_noise_model().half_width(rssi))
+
+def test_learned_cells_are_shrunk_and_limited():
+    noisy = [(0.7, 10.0, 4.0, 2.0)] * 5  # Cell (1, 3): reads twice as noisy as predicted
+    clean = [(1.2, -40.0, 0.25, 2.0)] * 45  # Cell (2, 1): half as noisy
+    outlier = [(2.2, 80.0, 100.0, 20.0)] * 100  # Cell (4, 5): far beyond the factor limits
+    noise_map = learn_noise_map(residual_poses(noisy + clean + outlier), prior=5)
+    assert noise_map.poses[1, 3] == 5 and noise_map.poses.sum() == 150
+    # 5 poses against a prior of 5: halfway between the cell and the global model
+    assert noise_map.read[1, 3] == pytest.approx(np.sqrt((5 * 4.0 + 5) / 10))
+    assert noise_map.read[2, 1] == pytest.approx(np.sqrt((45 * 0.25 + 5) / 50))
+    assert noise_map.read[4, 5] == FACTOR_RANGE[1]
+    # Model factors are relative to the mean squared residual of all poses
+    assert noise_map.model[2, 1] < 1 < noise_map.model[4, 5]
+    assert noise_map.read[0, 0] == 1.0 and noise_map.model[0, 0] == 1.0
+
+def test_artifact_round_trip(tmp_path):
+    noise_map = learn_noise_map(residual_poses([(0.7, 10.0, 4.0, 2.0), (1.2, -40.0, 0.25, 3.0)]))
+    path = str(tmp_path / 'noise-map.json')
+    save_noise_map(noise_map, path)
+    loaded = load_noise_map(path)
+    assert loaded.read == pytest.approx(noise_map.read, abs=1e-6)
+    assert loaded.model == pytest.approx(noise_map.model, abs=1e-6)
+    assert (loaded.poses == noise_map.poses).all()
+
+def test_varying_contours_of_constant_levels():
+    atlas = load_atlas(LOCALIZATION_MODEL)
+    levels = np.array([-60.3, -75.0])
+    constant = np.repeat(levels[:, None], len(atlas.angles), axis=1)
+    assert atlas.varying_contours(constant) == pytest.approx(atlas.contours(levels), nan_ok=True)
+    # Outside the atlas the levels are solved
+    outside = np.full((1, len(atlas.angles)), -10.0)
+    assert atlas.varying_contours(outside) == pytest.approx(atlas.contours([-10.0]), nan_ok=True)
+
+@pytest.fixture
+def uniform_map(monkeypatch):
+    monkeypatch.setattr(localization_core, 'load_noise_map', NoiseMap.uniform)
+
+def test_map_half_width_without_spatial_variation(uniform_map):
+    angles = np.linspace(-90.0, 90.0, 181)
+    distance = np.full(181, 1.5)
+    assert get_rms_rssi_map(-62.0, distance, angles) == pytest.approx(get_rms_rssi(-62.0))
+    assert get_rms_rssi_map(-62.0, distance, angles, reads=9) == pytest.approx(get_rms_rssi_reads(-62.0, 9))
+
+def test_map_bands_without_spatial_variation(uniform_map):
+    default = sensitivity_band(-62.0, 0.5, 0.2, 30.0)
+    mapped = sensitivity_band(-62.0, 0.5, 0.2, 30.0, noise_map=True)
+    for default_curve, mapped_curve in zip(default, mapped):
+        assert mapped_curve == pytest.approx(default_curve, abs=1e-9)
+    measurements = [(-60.0, 0.0, 0.0, 0.0), (-62.0, 1.0, 0.0, 0.0), (-61.0, 2.0, 0.0, 0.0)]
+    assert localize(measurements, noise_map=True)[1] == pytest.approx(localize(measurements)[1], abs=1e-9)
+
+def test_map_widens_the_band_where_the_reads_were_noisy(monkeypatch):
+    noise_map = NoiseMap.uniform()
+    noise_map.read[:] = 2.0
+    monkeypatch.setattr(localization_core, 'load_noise_map', lambda: noise_map)
+    angles = np.linspace(-90.0, 90.0, 181)
+    half_width = get_rms_rssi_map(-62.0, np.full(181, 1.5), angles)
+    assert half_width == pytest.approx(get_rms_rssi(-62.0) + load_noise_model().spread(-62.0))
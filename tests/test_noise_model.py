@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from localization_core import get_rms_rssi
+from noise_model import NOISE_MODEL_PATH, NoiseModel, load_noise_model, save_noise_model
+from pattern_atlas import LOCALIZATION_MODEL, band_half_width
+
+RSSI = np.linspace(-95.0, -25.0, 7001)
+
+def closed_form(rssi):
+    """The calibrated spread and band half-width as get_rms_rssi wrote them out."""
+    spread = 0.0000330307 * np.exp(-0.154 * rssi) + 0.9145
+    return spread, spread + 1.5 + 2
+
+def test_spread_matches_the_closed_form():
+    spread, half_width = closed_form(RSSI)
+    model = NoiseModel.build()
+    np.testing.assert_array_equal(model.spread(RSSI), spread)
+    np.testing.assert_array_equal(model.half_width(RSSI), half_width)
+
+def test_spread_of_a_scalar():
+    value = NoiseModel.build().spread(-60.0)
+    assert isinstance(value, float)
+    assert value == closed_form(np.float64(-60.0))[0]
+
+def test_artifact_is_the_calibrated_default():
+    model = load_noise_model()
+    assert (model.form, model.params, model.margins) == ('Exponential', (0.0000330307, -0.154, 0.9145),
+                                                         {'model': 1.5, 'orientation': 2.0})
+
+def test_localization_and_atlas_bands_agree():
+    half_width = closed_form(RSSI)[1]
+    np.testing.assert_array_equal(get_rms_rssi(RSSI), half_width)
+    np.testing.assert_array_equal(band_half_width(LOCALIZATION_MODEL, RSSI), half_width)
+
+def test_artifact_holds_the_form_only():
+    with open(NOISE_MODEL_PATH) as f:
+        assert set(json.load(f)) == {'form', 'params', 'k_score', 'margins'}
+
+def test_artifact_round_trip(tmp_path):
+    path = str(tmp_path / 'noise-model.json')
+    model = NoiseModel.build('Quadratic', (0.002, 0.2, 5.0), {'model': 1.0})
+    save_noise_model(model, path)
+    loaded = load_noise_model(path)
+    assert (loaded.form, loaded.params, loaded.margins) == (model.form, model.params, model.margins)
+    assert loaded.half_width(-60.0) == pytest.approx(0.002 * 3600 - 12.0 + 5.0 + 1.0)
+
+def test_pattern_atlas_loads_the_artifact_lazily():
+    code = ('import pattern_atlas, noise_model; '
+            'print(noise_model.load_noise_model.cache_info().currsize); '
+            'pattern_atlas.band_half_width(pattern_atlas.LOCALIZATION_MODEL, -60.0); '
+            'print(noise_model.load_noise_model.cache_info().currsize)')
+    output = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+                            capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['0', '1']
+
+def test_unknown_form():
+    with pytest.raises(ValueError, match='Unknown noise model form'):
+        NoiseModel('Cubic', (1.0,), {})
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from noise_statistics import KEY_COLUMNS, chunk_statistics, merge_statistics, summarize
+from std_models import exponential, fit_std_model, model_equation, quadratic
+
+def pose_reads(seed=0, count=600):
+    """Reads of a few poses in random order, with very different means and spreads."""
+    rng = np.random.default_rng(seed)
+    pose = rng.integers(0, 4, count)
+    return pd.DataFrame({
+        'Source': 'test', 'Tag ID': 'A', 'Antenna': 1,
+        'Antenna X [m]': pose * 0.5, 'Antenna Y [m]': 0.0, 'Antenna Rot Z [deg]': 0.0,
+        'RSSI': -40.0 - 10.0 * pose + rng.normal(0.0, 0.5 + pose, count)
+    })
+
+def merged_chunks(df, bounds):
+    stats = None
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        stats = merge_statistics(stats, chunk_statistics(df.iloc[start:stop]))
+    return stats
+
+def test_merged_chunks_match_numpy_on_the_concatenated_reads():
+    df = pose_reads()
+    stats = merged_chunks(df, [0, 7, 100, 101, 350, 600])
+    for key, group in df.groupby(KEY_COLUMNS):
+        rssi = group['RSSI'].to_numpy()
+        row = stats.loc[key]
+        assert row['count'] == len(rssi)
+        assert row['mean'] == pytest.approx(np.mean(rssi), rel=1e-12)
+        assert row['M2'] / row['count'] == pytest.approx(np.var(rssi), rel=1e-12)
+        assert (row['min'], row['max']) == (rssi.min(), rssi.max())
+
+def test_merge_does_not_depend_on_the_chunking():
+    df = pose_reads(seed=1)
+    one = merged_chunks(df, [0, len(df)]).sort_index()
+    many = merged_chunks(df, list(range(0, len(df), 13)) + [len(df)]).sort_index()
+    pd.testing.assert_frame_equal(one, many, check_dtype=False, check_exact=False, rtol=1e-12)
+
+def test_merge_keeps_poses_of_one_side():
+    df = pose_reads(seed=2)
+    a = chunk_statistics(df[df['Antenna X [m]'] < 1.0])
+    b = chunk_statistics(df[df['Antenna X [m]'] >= 1.0])
+    merged = merge_statistics(a, b)
+    assert len(merged) == len(a) + len(b)
+    pd.testing.assert_frame_equal(merged.loc[a.index], a, check_dtype=False)
+    assert merge_statistics(None, b) is b and merge_statistics(a, None) is a
+
+def test_summarize_uses_the_sample_std():
+    df = pose_reads(seed=3)
+    summary = summarize(chunk_statistics(df), min_reads=5)
+    expected = df.groupby(KEY_COLUMNS)['RSSI'].std()
+    assert summary.set_index(KEY_COLUMNS)['std'].sort_index().to_numpy() == pytest.approx(
+        expected.sort_index().to_numpy(), rel=1e-12)
+    assert summarize(chunk_statistics(df), min_reads=10 ** 6).empty
+
+def test_fit_std_model_recovers_the_form():
+    x = np.linspace(-80.0, -40.0, 41)
+    label, _, params, _, rms = fit_std_model(x, quadratic(x, 0.002, 0.2, 5.0))
+    assert label == 'Quadratic' and params == pytest.approx([0.002, 0.2, 5.0], rel=1e-6) and rms < 1e-9
+    label, _, params, _, _ = fit_std_model(x, exponential(x, 3.3e-5, -0.154, 0.9))
+    assert label == 'Exponential' and params == pytest.approx([3.3e-5, -0.154, 0.9], rel=1e-4)
+    assert model_equation(label, params) == 'std = 0.000 * e^(-0.154 * RSSI) + 0.900'
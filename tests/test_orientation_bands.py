@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from localization_core import get_rms_rssi, rssi_angle
+from orientation_bands import (ALPHA_GRID, ORIENTATION_MARGIN, RSSI_GRID, alpha_loss, band_lookup, fit_alpha_model,
+                               inverse_rssi_distance)
+
+@pytest.fixture(scope='module')
+def lookup():
+    return band_lookup()
+
+def test_alpha_model_fits_the_calibration():
+    model = fit_alpha_model()
+    assert model['peak'] == pytest.approx(model['offset'] + model['amplitude'])
+    # The orientation explains most of the ORIENTATION_MARGIN it replaces
+    assert model['rms'] < ORIENTATION_MARGIN
+
+def test_alpha_loss_is_relative_to_the_best_orientation(lookup):
+    loss = alpha_loss(np.linspace(-180.0, 180.0, 3601), lookup.alpha_model)
+    assert loss.max() == pytest.approx(0.0, abs=1e-3)
+    assert np.all(loss <= 1e-12)
+
+def test_grid_solves_the_rssi_model(lookup):
+    i, k = 160, 9
+    phi = lookup.angles
+    expected = inverse_rssi_distance(RSSI_GRID[i] - rssi_angle(phi) - alpha_loss(ALPHA_GRID[k], lookup.alpha_model))
+    assert lookup.distances(RSSI_GRID[i], ALPHA_GRID[k]) == pytest.approx(expected, abs=1e-5)
+
+def test_marginalized_distances_span_every_orientation(lookup):
+    rssi = RSSI_GRID[160]
+    near = lookup.distances(rssi, edge='near')
+    far = lookup.distances(rssi, edge='far')
+    for alpha in ALPHA_GRID:
+        distances = lookup.distances(rssi, alpha)
+        assert np.all(near <= distances + 1e-6) and np.all(distances <= far + 1e-6)
+    assert lookup.distances(rssi) == pytest.approx((near + far) / 2)
+
+def test_interpolation_between_grid_rows(lookup):
+    step = RSSI_GRID[1] - RSSI_GRID[0]
+    rssi = RSSI_GRID[100] + step / 2
+    middle = (lookup.distances(RSSI_GRID[100], 0.0) + lookup.distances(RSSI_GRID[101], 0.0)) / 2
+    assert lookup.distances(rssi, 0.0) == pytest.approx(middle, abs=1e-5)
+
+def test_half_width(lookup):
+    # Marginalized: the orientation margin is replaced by the span of the orientations
+    assert lookup.half_width(-60.0) == pytest.approx(get_rms_rssi(-60.0) - ORIENTATION_MARGIN)
+    assert lookup.half_width(-60.0, alpha=0.0) == pytest.approx(lookup.half_width(-60.0) + lookup.alpha_model['rms'])
+    assert lookup.half_width(-60.0, reads=16) < lookup.half_width(-60.0)
+
+def test_known_orientation_narrows_the_band(lookup):
+    rssi = -60.0
+    known = lookup.band(rssi, 0.0, 0.0, 0.0, alpha=0.0)
+    marginalized = lookup.band(rssi, 0.0, 0.0, 0.0)
+    # Antenna at the origin facing +Y: the band at phi = 0 crosses the y axis
+    def on_axis(x, y):
+        return y[np.argmin(np.abs(x))]
+    for band in (known, marginalized):
+        assert on_axis(*band[0:2]) < on_axis(*band[4:6]) < on_axis(*band[2:4])
+    width = [on_axis(*band[2:4]) - on_axis(*band[0:2]) for band in (known, marginalized)]
+    assert 0 < width[0] < width[1]
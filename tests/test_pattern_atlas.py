@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from scipy.optimize import fsolve
+from pattern_atlas import (ATLAS_PATH, LOCALIZATION_MODEL, RSSI_STEP, VISUALIZATION_MODEL, PatternAtlas, azimuth_loss,
+                           band_half_width, contour_family, load_atlas, model_hash, rssi_angle, rssi_distance,
+                           save_atlas, solve_distances)
+
+@pytest.fixture(scope='module')
+def atlas():
+    return PatternAtlas.build(LOCALIZATION_MODEL)
+
+def test_solve_distances_matches_fsolve():
+    rssi = np.array([-45.0, -55.5, -62.25, -70.0])
+    expected = [fsolve(lambda d: rssi_distance(d) - value, 1.0)[0] for value in rssi]
+    assert solve_distances(LOCALIZATION_MODEL, rssi) == pytest.approx(expected, abs=1e-9)
+
+def test_solve_distances_out_of_range():
+    assert np.isnan(solve_distances(LOCALIZATION_MODEL, [50.0, -3000.0])).all()
+
+def test_atlas_levels_are_solved_contours(atlas):
+    index = 120
+    expected = solve_distances(LOCALIZATION_MODEL, atlas.levels[index] + azimuth_loss(LOCALIZATION_MODEL, atlas.angles))
+    assert atlas.contour(atlas.levels[index]) == pytest.approx(expected, abs=1e-12, nan_ok=True)
+
+def test_interpolated_contours_match_solve_distances(atlas):
+    # Levels between the atlas levels: the README promises 99% within 0.05 mm, at most 1.4 mm
+    levels = np.arange(-99.9, -20.1, 0.0937)
+    expected = solve_distances(LOCALIZATION_MODEL, levels[:, None] + azimuth_loss(LOCALIZATION_MODEL, atlas.angles))
+    error = np.abs(atlas.contours(levels) - expected)[np.isfinite(expected)]
+    assert np.percentile(error, 99) < 5e-5
+    assert error.max() < 1.5e-3
+
+def test_levels_and_angles_off_the_atlas(atlas):
+    angles = np.array([-12.5, 0.3, 40.0])
+    for level, angle_set in [(-10.0, None), (-60.1, angles), (-60.0, angles[2:])]:
+        angle_values = atlas.angles if angle_set is None else angle_set
+        expected = solve_distances(LOCALIZATION_MODEL, level + azimuth_loss(LOCALIZATION_MODEL, angle_values))
+        assert atlas.contour(level, angle_set) == pytest.approx(expected, abs=1e-4, nan_ok=True)
+
+def test_band_edges(atlas):
+    for rssi in (atlas.levels[150], atlas.levels[150] + 0.1):
+        upper, lower = atlas.band(rssi)
+        width = band_half_width(LOCALIZATION_MODEL, rssi)
+        assert upper == pytest.approx(atlas.contour(rssi + width), abs=1.5e-3, nan_ok=True)
+        assert lower == pytest.approx(atlas.contour(rssi - width), abs=1.5e-3, nan_ok=True)
+        # The upper RSSI is nearer the antenna
+        assert np.nanmax(upper - lower) < 0
+
+def test_models_have_their_own_entries(tmp_path):
+    path = str(tmp_path / 'atlas.npz')
+    save_atlas(PatternAtlas.build(LOCALIZATION_MODEL), path)
+    save_atlas(PatternAtlas.build(VISUALIZATION_MODEL), path)
+    assert model_hash(LOCALIZATION_MODEL) != model_hash(VISUALIZATION_MODEL)
+    with np.load(path) as stored:
+        keys = {name.split('_')[0] for name in stored.files}
+    assert keys == {model_hash(LOCALIZATION_MODEL), model_hash(VISUALIZATION_MODEL)}
+    assert not [name for name in tmp_path.iterdir() if name.suffix == '.tmp']
+
+def test_load_builds_a_missing_atlas(tmp_path, atlas):
+    path = str(tmp_path / 'atlas.npz')
+    (tmp_path / 'atlas.npz').write_bytes(b'not an archive')
+    loaded = load_atlas(LOCALIZATION_MODEL, path)
+    assert loaded.distance == pytest.approx(atlas.distance, nan_ok=True)
+    load_atlas.cache_clear()
+    stored = load_atlas(LOCALIZATION_MODEL, path)
+    assert stored.band_upper == pytest.approx(atlas.band_upper, nan_ok=True)
+    load_atlas.cache_clear()
+
+def test_shipped_atlas_is_current():
+    # A stale file would be rebuilt on every first use
+    with np.load(ATLAS_PATH) as stored:
+        assert f'{model_hash(LOCALIZATION_MODEL)}_distance' in stored.files
+        assert f'{model_hash(VISUALIZATION_MODEL)}_distance' in stored.files
+
+def test_contour_family_matches_the_atlas(atlas):
+    levels = [-70.0, -62.3, -55.0]
+    family = contour_family(LOCALIZATION_MODEL, levels, atlas.angles)
+    assert family.shape == (3, len(atlas.angles), 2)
+    assert family == pytest.approx(atlas.polylines(atlas.contours(levels)), abs=1.5e-3, nan_ok=True)
+
+def test_contour_family_of_a_model_variant():
+    # A variant of the calibration needs no atlas entry
+    model = VISUALIZATION_MODEL._replace(angle=(-58.0, 0.05, -0.004), max_angle=60)
+    angles = np.arange(-60.0, 61.0, 5.0)
+    family = contour_family(model, [-60.0, -50.0], angles)
+    peak = np.max(rssi_angle(angles, model))
+    for level, points in zip([-60.0, -50.0], family):
+        distance = np.hypot(points[:, 0], points[:, 1])
+        for angle, d, (x, y) in zip(angles, distance, points):
+            # The level plus the loss relative to the pattern peak on the distance curve; points at the azimuth
+            assert rssi_distance(d, model) == pytest.approx(level + peak - rssi_angle(angle, model), abs=1e-9)
+            assert np.degrees(np.arctan2(x, y)) == pytest.approx(angle)
+
+def test_contour_family_without_a_root():
+    family = contour_family(LOCALIZATION_MODEL, [-3000.0], [0.0, 10.0])
+    assert np.isnan(family).all()
@@ -0,0 +1,56 @@
+import json
+import pandas as pd
+import pytest
+from pattern_batch import expand_jobs, job_name, load_config, parse_values, render_job, run_batch
+
+def test_parse_values_lists_and_ranges():
+    assert parse_values('-60,-50') == [-60.0, -50.0]
+    # The stop is included, also when the step does not add up exactly in floating point
+    assert parse_values('-70:-40:7.5') == [-70.0, -62.5, -55.0, -47.5, -40.0]
+    assert parse_values('0:1:0.1')[-1] == pytest.approx(1.0) and len(parse_values('0:1:0.1')) == 11
+    assert parse_values('-70:-60:5,-42.5, ') == [-70.0, -65.0, -60.0, -42.5]
+    assert parse_values('10:0:5') == []
+
+def test_parse_values_from_a_config():
+    assert parse_values([30, 45]) == [30.0, 45.0]
+    assert parse_values(60) == [60.0]
+
+def test_parse_values_rejects_bad_text():
+    with pytest.raises(ValueError):
+        parse_values('a,b')
+    with pytest.raises(ValueError):
+        parse_values('1:2')
+
+def test_expand_jobs():
+    jobs = expand_jobs('uncertainty', {'rssi': '-60:-50:10', 'alpha': [30, 60], 'angle': None})
+    assert jobs == [('uncertainty', {'rssi': -60.0, 'alpha': 30.0}), ('uncertainty', {'rssi': -60.0, 'alpha': 60.0}),
+                    ('uncertainty', {'rssi': -50.0, 'alpha': 30.0}), ('uncertainty', {'rssi': -50.0, 'alpha': 60.0})]
+    assert job_name(*jobs[1]) == 'uncertainty_rssi-60_alpha60'
+
+def test_expand_jobs_needs_every_parameter():
+    with pytest.raises(ValueError, match='alpha'):
+        expand_jobs('uncertainty', {'rssi': '-60', 'alpha': None})
+
+def test_load_config(tmp_path):
+    path = tmp_path / 'figures.json'
+    path.write_text(json.dumps({'out': 'report', 'dpi': 50, 'jobs': [
+        {'figure': 'unique-rssi', 'rssi': '-60:-55:5'}, {'figure': 'intersecting', 'angle': [45]}]}))
+    jobs, settings = load_config(str(path))
+    assert jobs == [('unique-rssi', {'rssi': -60.0}), ('unique-rssi', {'rssi': -55.0}),
+                    ('intersecting', {'angle': 45.0})]
+    assert settings == {'out': 'report', 'dpi': 50}
+
+def test_render_job(tmp_path):
+    row = render_job(('unique-rssi', {'rssi': -55.0}), str(tmp_path), dpi=20)
+    assert row == {'Figure': 'unique-rssi', 'rssi': -55.0, 'Image': 'unique-rssi_rssi-55.png',
+                   'Data': 'unique-rssi_rssi-55.csv'}
+    assert (tmp_path / row['Image']).stat().st_size > 0
+    assert not pd.read_csv(tmp_path / row['Data'], sep=';').empty
+
+def test_run_batch_writes_the_index(tmp_path):
+    jobs = expand_jobs('intersecting', {'angle': '30,60'})
+    index = run_batch(jobs, str(tmp_path), workers=2, dpi=20)
+    assert list(index.columns) == ['Figure', 'angle', 'Image', 'Data']
+    assert index['angle'].tolist() == [30.0, 60.0]
+    assert pd.read_csv(tmp_path / 'index.csv', sep=';').equals(index)
+    assert all((tmp_path / name).exists() for name in index['Image'].tolist() + index['Data'].tolist())
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from pattern_atlas import LOCALIZATION_MODEL, band_half_width, load_atlas, rssi_angle, rssi_distance
+from pattern_raster import load_raster
+
+LEVELS = np.arange(-90.0, -35.0 + 0.25, 0.5)
+
+@pytest.fixture(scope='module')
+def atlas():
+    return load_atlas(LOCALIZATION_MODEL)
+
+@pytest.fixture(scope='module')
+def raster():
+    return load_raster(LOCALIZATION_MODEL)
+
+def polar(points):
+    return np.degrees(np.arctan2(points[:, 0], points[:, 1])), np.hypot(points[:, 0], points[:, 1])
+
+def test_raster_contours_follow_the_atlas(atlas, raster):
+    # Every raster point lies on the atlas contour of its azimuth (README: within 0.7 mm)
+    for level in LEVELS:
+        phi, distance = polar(raster.contour(level))
+        assert np.abs(distance - atlas.contour(level, phi)).max() < 0.7e-3
+
+def test_atlas_contours_lie_on_the_raster_level(atlas, raster):
+    for level in LEVELS:
+        distance = atlas.contour(level)
+        # Behind the antenna plane (non-positive distances) and at the antenna the raster has no contour
+        keep = distance > 0.01
+        points = atlas.polylines(distance[None, keep], atlas.angles[keep])[0]
+        assert raster.rssi(points[:, 0], points[:, 1]) == pytest.approx(level, abs=2e-3)
+
+def test_contours_are_ordered_by_azimuth(raster):
+    phi, distance = polar(raster.contour(-70.0))
+    assert np.all(np.diff(phi) >= -1e-9)
+    # Polar raster: the contour ends on the +-max_angle rays
+    assert phi[0] == pytest.approx(-90.0) and phi[-1] == pytest.approx(90.0)
+    assert np.all(distance > 0)
+
+def test_level_above_the_field(raster):
+    assert raster.contour(-10.0).shape == (0, 2)
+
+def test_field(raster):
+    x, y = np.array([0.0, 1.0, 0.5]), np.array([1.0, 1.0, -2.0])
+    rssi = raster.rssi(x, y)
+    phi = np.degrees(np.arctan2(x[:2], y[:2]))
+    assert rssi[:2] == pytest.approx(rssi_distance(np.hypot(x[:2], y[:2])) + rssi_angle(phi), abs=1e-3)
+    # Behind the antenna is outside the raster
+    assert np.isnan(rssi[2])
+
+def test_band(atlas, raster):
+    upper, lower, nominal = raster.band(-60.0)
+    width = band_half_width(LOCALIZATION_MODEL, -60.0)
+    for points, level in [(upper, -60.0 + width), (lower, -60.0 - width), (nominal, -60.0)]:
+        phi, distance = polar(points)
+        assert np.abs(distance - atlas.contour(level, phi)).max() < 0.7e-3
+    assert np.median(polar(upper)[1]) < np.median(polar(nominal)[1]) < np.median(polar(lower)[1])
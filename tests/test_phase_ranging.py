@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+from phase_ranging import (PHASE_STEPS, RANGE_AMBIGUITY, WAVELENGTH, location_phases, path_constraints,
+                           phase_consistency, range_differences, refine_with_phase, unwrap_path,
+                           wrapped_range_differences)
+
+TAG = (1.0, 1.5)
+
+def path_phases(antenna_xy, tag=TAG):
+    """Backscatter phase 4*pi*d/lambda (wrapped) and range of the tag at every antenna location."""
+    ranges = np.hypot(antenna_xy[:, 0] - tag[0], antenna_xy[:, 1] - tag[1])
+    return (4 * np.pi * ranges / WAVELENGTH) % (2 * np.pi), ranges
+
+def straight_path(step, count=20):
+    return np.column_stack((np.arange(count) * step, np.zeros(count)))
+
+def test_unwrap_along_a_dense_path():
+    # Steps below lambda/4: the phase wraps many times along the path but unwraps to the range change
+    antenna_xy = straight_path(0.05)
+    phases, ranges = path_phases(antenna_xy, tag=(1.0, 0.5))
+    assert np.ptp(ranges) > 2 * RANGE_AMBIGUITY
+    assert unwrap_path(phases) == pytest.approx(ranges - ranges[0], abs=1e-9)
+
+def test_wrapped_range_differences():
+    antenna_xy = straight_path(0.3, count=6)
+    phases, ranges = path_phases(antenna_xy)
+    wrapped = wrapped_range_differences(phases)
+    assert np.all(np.abs(wrapped) <= RANGE_AMBIGUITY / 2)
+    # The true range difference is the wrapped one plus a multiple of lambda/2
+    multiples = (np.diff(ranges) - wrapped) / RANGE_AMBIGUITY
+    assert multiples == pytest.approx(np.round(multiples), abs=1e-9)
+
+def test_range_differences_resolved_with_reference_ranges():
+    antenna_xy = straight_path(0.3, count=6)
+    phases, ranges = path_phases(antenna_xy)
+    # A reference within lambda/4 of the truth picks the right multiple
+    reference = ranges + np.array([0.03, -0.02, 0.04, 0.0, -0.03, 0.02])
+    assert range_differences(phases, reference) == pytest.approx(np.diff(ranges), abs=1e-9)
+
+def test_path_constraints():
+    # Two dense runs joined by one long step
+    antenna_xy = np.vstack((straight_path(0.05, count=4), straight_path(0.05, count=3) + [1.0, 0.0]))
+    phases, ranges = path_phases(antenna_xy)
+    constraints = path_constraints(antenna_xy, phases)
+    unambiguous = [(i, j) for i, j, _, modular in constraints if not modular]
+    assert unambiguous == [(0, 1), (0, 2), (0, 3), (4, 5), (4, 6)]
+    assert [(i, j) for i, j, _, modular in constraints if modular] == [(3, 4)]
+    for i, j, measured, modular in constraints:
+        if not modular:
+            assert measured == pytest.approx(ranges[j] - ranges[i], abs=1e-9)
+
+def test_unknown_phase_breaks_the_run():
+    antenna_xy = straight_path(0.05, count=5)
+    phases, _ = path_phases(antenna_xy)
+    phases[2] = np.nan
+    constraints = path_constraints(antenna_xy, phases)
+    assert {(i, j) for i, j, _, _ in constraints} == {(0, 1), (3, 4)}
+
+def test_phase_consistency_of_the_true_position():
+    antenna_xy = straight_path(0.05)
+    phases, _ = path_phases(antenna_xy)
+    count = len(path_constraints(antenna_xy, phases))
+    score = phase_consistency(np.array([TAG[0], TAG[0] + 0.2]), np.array([TAG[1], TAG[1]]), antenna_xy, phases)
+    assert score[0] == count
+    assert score[1] < count
+
+def test_refine_with_phase_shrinks_the_region():
+    # An L-shaped path constrains both coordinates
+    antenna_xy = np.vstack((straight_path(0.05, count=15), np.column_stack((np.zeros(15), np.arange(1, 16) * 0.05))))
+    phases, _ = path_phases(antenna_xy)
+    region = box(TAG[0] - 0.2, TAG[1] - 0.2, TAG[0] + 0.2, TAG[1] + 0.2)
+    points, centroid, area, satisfied = refine_with_phase(region, antenna_xy, phases)
+    assert satisfied == len(path_constraints(antenna_xy, phases))
+    assert area < region.area / 4
+    assert np.hypot(centroid[0] - TAG[0], centroid[1] - TAG[1]) < 0.03
+
+def test_refine_without_phase():
+    antenna_xy = straight_path(0.05, count=3)
+    phases = np.full(3, np.nan)
+    points, centroid, area, satisfied = refine_with_phase(box(0, 0, 1, 1), antenna_xy, phases)
+    assert len(points) == 0 and centroid is None and area == 0.0 and satisfied == 0
+
+def test_location_phases():
+    # Circular mean across the wrap; locations in the order they were visited
+    df = pd.DataFrame({'Distance [m]': [2.0, 2.0, 1.0, 1.0, 3.0],
+                       'Phase': [PHASE_STEPS - 10, 10, PHASE_STEPS / 4, np.nan, np.nan]})
+    phases = location_phases(df)
+    assert min(phases[0], 2 * np.pi - phases[0]) == pytest.approx(0.0, abs=1e-9)
+    assert phases[1] == pytest.approx(np.pi / 2)
+    assert np.isnan(phases[2])
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+import pytest
+from pose_aggregator import CircularStats, PoseAggregator, RunningStats
+
+def running_stats(values):
+    stats = RunningStats()
+    for value in values:
+        stats.add(float(value))
+    return stats
+
+def circular_stats(angles):
+    stats = CircularStats()
+    for angle in angles:
+        stats.add(float(angle))
+    return stats
+
+def test_running_stats_against_numpy():
+    values = np.random.default_rng(1).normal(-60.0, 3.0, 1000)
+    stats = running_stats(values)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(np.mean(values), abs=1e-9)
+    assert stats.variance == pytest.approx(np.var(values, ddof=1), rel=1e-9)
+    assert stats.std == pytest.approx(np.std(values, ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (np.min(values), np.max(values))
+
+def test_running_stats_large_offset():
+    # Welford stays accurate where the naive sum of squares cancels
+    values = 1e9 + np.random.default_rng(2).normal(0.0, 0.01, 500)
+    assert running_stats(values).variance == pytest.approx(np.var(values, ddof=1), rel=1e-6)
+
+def test_running_stats_single_value():
+    stats = running_stats([-55.0])
+    assert stats.mean == -55.0
+    assert math.isnan(stats.variance) and math.isnan(stats.std)
+
+def test_circular_stats_against_numpy():
+    # Around the wrap at 0 / 2*pi, where a linear mean would be wrong
+    angles = np.random.default_rng(3).normal(0.0, 0.3, 1000) % (2 * np.pi)
+    stats = circular_stats(angles)
+    resultant = np.mean(np.exp(1j * angles))
+    assert stats.mean == pytest.approx(np.angle(resultant) % (2 * np.pi), abs=1e-9)
+    assert stats.resultant_length == pytest.approx(np.abs(resultant), abs=1e-12)
+    assert stats.variance == pytest.approx(1 - np.abs(resultant), abs=1e-12)
+
+def test_circular_stats_identical_angles():
+    stats = circular_stats([1.25] * 10)
+    assert stats.mean == pytest.approx(1.25)
+    assert stats.variance == pytest.approx(0.0, abs=1e-12)
+
+def test_circular_stats_empty():
+    stats = CircularStats()
+    assert math.isnan(stats.mean) and math.isnan(stats.variance)
+
+def test_pose_aggregator_groups_reads():
+    aggregator = PoseAggregator(pose_columns=('X [m]', 'Y [m]'))
+    for rssi, phase in [(-50.0, 4090), (-52.0, 10), (-54.0, math.nan)]:
+        aggregator.add('A', (0.0, 1.0), 1, rssi, phase)
+    aggregator.add('A', (0.0, 2.0), 1, -60.0)
+    aggregator.add('B', (0.0, 1.0), 2, -70.0, 100)
+    frame = aggregator.to_frame().set_index(['Tag ID', 'Y [m]'])
+    assert len(frame) == 3
+    row = frame.loc[('A', 1.0)]
+    assert row['Read Count'] == 3
+    assert row['RSSI Mean'] == pytest.approx(-52.0)
+    assert row['RSSI Std'] == pytest.approx(2.0)
+    # The phase mean wraps across 0 instead of averaging to the middle of the range
+    assert min(row['Phase Mean Decimal'], 4096 - row['Phase Mean Decimal']) == pytest.approx(2.0, abs=1e-6)
+    assert list(aggregator.pose_summary((0.0, 1.0))['Tag ID']) == ['A', 'B']
@@ -0,0 +1,84 @@
+import json
+import socket
+import time
+import pytest
+from pose_sources import Pose, PoseTrack, SocketPoseSource, load_pose_track, load_poses, load_tag_locations
+
+def pose(timestamp, x=0.0):
+    return Pose(timestamp, x, 0.0, 0.0, 0.0)
+
+def test_nearest_picks_the_closest_pose():
+    # Added out of order, as poses from a socket can arrive
+    track = PoseTrack([pose(10.0, 1), pose(12.0, 3), pose(11.0, 2)])
+    assert track.nearest(11.2).x == 2
+    assert track.nearest(11.8).x == 3
+    assert track.nearest(12.0).x == 3
+
+def test_nearest_before_and_after_the_track():
+    track = PoseTrack([pose(10.0, 1), pose(11.0, 2)])
+    assert track.nearest(9.7).x == 1
+    assert track.nearest(11.4).x == 2
+
+def test_nearest_tie_takes_the_earlier_pose():
+    track = PoseTrack([pose(10.0, 1), pose(11.0, 2)])
+    assert track.nearest(10.5).x == 1
+
+def test_nearest_respects_max_gap():
+    track = PoseTrack([pose(10.0, 1), pose(11.0, 2)])
+    assert track.nearest(12.0, max_gap=0.5) is None
+    assert track.nearest(12.0, max_gap=1.0).x == 2
+    assert track.nearest(10.5, max_gap=0.4) is None
+
+def test_nearest_on_an_empty_track():
+    assert PoseTrack().nearest(10.0) is None
+
+def test_add_keeps_the_track_sorted():
+    track = PoseTrack()
+    for timestamp in (3.0, 1.0, 2.0, 1.0):
+        track.add(pose(timestamp))
+    assert track.timestamps == [1.0, 1.0, 2.0, 3.0]
+    assert len(track) == 4 and track.latest().timestamp == 3.0
+
+def test_load_poses_accepts_the_logger_column_names(tmp_path):
+    path = tmp_path / 'poses.csv'
+    path.write_text('Antenna X [m],Antenna Y [m],Antenna Rot Z [deg]\n0.5,1.0,-90\n0.6,1.0,0\n')
+    assert load_poses(str(path)) == [Pose(None, 0.5, 1.0, 0.0, -90.0), Pose(None, 0.6, 1.0, 0.0, 0.0)]
+
+def test_load_pose_track_needs_timestamps(tmp_path):
+    path = tmp_path / 'track.jsonl'
+    path.write_text(json.dumps({'t': 10.0, 'x': 0.0, 'y': 1.0, 'z': 0.2, 'rot_z': 90}) + '\n' +
+                    json.dumps({'x': 0.1, 'y': 1.0, 'rot_z': 90}) + '\n')
+    with pytest.raises(ValueError, match='1 of the 2 poses'):
+        load_pose_track(str(path))
+
+def test_load_pose_record_needs_a_rotation(tmp_path):
+    path = tmp_path / 'poses.jsonl'
+    path.write_text(json.dumps({'x': 0.0, 'y': 1.0}) + '\n')
+    with pytest.raises(ValueError, match='Rot Z'):
+        load_poses(str(path))
+
+def test_load_tag_locations(tmp_path):
+    path = tmp_path / 'tags.csv'
+    path.write_text('Tag ID,Tag X [m],Tag Y [m]\nE2009A4050003AF000000001,0.5,1.5\n')
+    assert load_tag_locations(str(path)) == {'E2009A4050003AF000000001': (0.5, 1.5)}
+
+def test_udp_pose_source():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    source = SocketPoseSource(f'udp://127.0.0.1:{port}').start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            deadline = time.time() + 2.0
+            # Resend until the source has bound its socket
+            while len(source.track) < 1 and time.time() < deadline:
+                sender.sendto(b'{"t": 10.0, "x": 0.6, "y": 0.4, "rot_z": -90}\nnot json\n', ('127.0.0.1', port))
+                time.sleep(0.05)
+    finally:
+        source.stop()
+    assert source.track.nearest(10.1) == Pose(10.0, 0.6, 0.4, 0.0, -90.0)
+    assert source.errors >= 1
+
+def test_unsupported_pose_socket_scheme():
+    with pytest.raises(ValueError, match='scheme'):
+        SocketPoseSource('http://127.0.0.1:9000')
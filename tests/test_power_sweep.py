@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from power_sweep import PowerSweep, parse_ports, sweep_order, tidy_dataset
+from reader_simulator import ReaderSimulator
+from tsl_reader import open_reader
+
+def test_parse_ports():
+    assert parse_ports('1, 2,,4') == [1, 2, 4]
+
+def test_parse_ports_rejects_powers():
+    with pytest.raises(ValueError, match='--powers'):
+        parse_ports('1:2500')
+
+def test_sweep_order_alternates():
+    configurations = [(1500, 1), (1500, 2), (3000, 1), (3000, 2)]
+    assert sweep_order(configurations, 0) == configurations
+    assert sweep_order(configurations, 1) == configurations[::-1]
+    assert sweep_order(configurations, 2) == configurations
+    # The last configuration of a pose is the first of the next
+    for index in range(3):
+        assert sweep_order(configurations, index)[-1] == sweep_order(configurations, index + 1)[0]
+
+def test_sweep_rejects_invalid_settings():
+    with pytest.raises(ValueError, match='Power'):
+        PowerSweep(None, [3500], [1])
+    with pytest.raises(ValueError, match='port'):
+        PowerSweep(None, [3000], [5])
+
+def test_tidy_dataset_adds_distance_and_phi():
+    reads = [
+        {'Tag ID': 'A', 'RSSI': -50.0, 'Phase': '3FF', 'Power': 3000, 'Antenna': 1, 'Timestamp': 1.0, 'Pose': 0,
+         'Antenna X [m]': 0.0, 'Antenna Y [m]': 0.0, 'Antenna Z [m]': 0.0, 'Antenna Rot Z [deg]': 90.0},
+        {'Tag ID': 'B', 'RSSI': -60.0, 'Phase': '100', 'Power': 1500, 'Antenna': 1, 'Timestamp': 1.0, 'Pose': 0,
+         'Antenna X [m]': 0.0, 'Antenna Y [m]': 0.0, 'Antenna Z [m]': 0.0, 'Antenna Rot Z [deg]': 90.0},
+    ]
+    df = tidy_dataset(reads, {'A': (1.0, 1.0)})
+    # Sorted by power first
+    assert list(df['Tag ID']) == ['B', 'A']
+    a = df.set_index('Tag ID').loc['A']
+    assert a['Distance'] == pytest.approx(np.sqrt(2), abs=1e-3)
+    # Bearing 45 deg from +Y, antenna heading 90 deg
+    assert a['phi'] == pytest.approx(-45.0)
+    assert np.isnan(df.set_index('Tag ID').loc['B', 'Distance'])
+
+def test_tidy_dataset_of_no_reads():
+    assert tidy_dataset([], {}).empty
+
+def test_sweep_saves_a_switch_per_pose():
+    tags = {'E2009A4050003AF000000001': (0.0, 1.0)}
+    with ReaderSimulator(tags, read_rate=500.0, inventory_time=0.01, seed=1) as simulator:
+        ser = open_reader(simulator.port)
+        try:
+            sweep = PowerSweep(ser, [2000, 3000], [1, 2], rounds=2, switch_delay=0)
+            poses = [sweep.measure_pose(index) for index in range(3)]
+        finally:
+            ser.close()
+    assert len(sweep.configurations) == 4
+    # 4 switches at the first pose, then 3 at every further one
+    assert sweep.switches == 4 + 3 + 3
+    reads = poses[0]
+    assert {(read['Power'], read['Antenna']) for read in reads} == {(2000, 1), (3000, 1)}
+    # 10 dB less power gives about 10 dB less RSSI
+    rssi = {power: np.mean([read['RSSI'] for read in reads if read['Power'] == power]) for power in (2000, 3000)}
+    assert rssi[3000] - rssi[2000] == pytest.approx(10.0, abs=1.0)
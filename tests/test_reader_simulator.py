@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from noise_model import load_noise_model
+from pattern_atlas import rssi_angle, rssi_distance
+from reader_simulator import SENSITIVITY, ReaderSimulator, load_test, random_layout, rssi_std
+from tsl_reader import calculate_checksum, init, inventory, open_reader, read_response, response_complete
+
+TAGS = {'E2009A4050003AF000000001': (0.0, 1.0), 'E2009A4050003AF000000002': (1.0, -0.2)}
+
+@pytest.fixture
+def reader():
+    simulator = ReaderSimulator(TAGS, read_rate=500.0, inventory_time=0.02, seed=1)
+    with simulator:
+        ser = open_reader(simulator.port)
+        try:
+            yield simulator, ser
+        finally:
+            ser.close()
+
+def test_inventory_reads_the_tags_in_view(reader):
+    simulator, ser = reader
+    init(ser, 1, 3000, delay=0)
+    tags = inventory(ser)
+    # Only the tag 1 m ahead of antenna 1 is in view; its reads scatter around the forward model
+    assert tags and {tag['Tag ID'] for tag in tags} == {'E2009A4050003AF000000001'}
+    assert {tag['Antenna'] for tag in tags} == {'1'}
+    assert np.mean([tag['RSSI'] for tag in tags]) == pytest.approx(rssi_distance(1.0) + rssi_angle(0.0), abs=1.0)
+    assert len(tags) == simulator.reads
+
+def test_antenna_and_power_setting(reader):
+    simulator, ser = reader
+    init(ser, 2, 2500, delay=0)
+    assert (simulator.antenna, simulator.power) == (2, 2500)
+    tags = inventory(ser)
+    assert {tag['Tag ID'] for tag in tags} == {'E2009A4050003AF000000002'}
+    # Antenna 2 faces +X; 5 dB less power than the model was calibrated at
+    expected = rssi_distance(np.hypot(1.0, 0.2)) + rssi_angle(np.degrees(np.arctan2(-0.2, 1.0))) - 5.0
+    assert np.mean([tag['RSSI'] for tag in tags]) == pytest.approx(expected, abs=1.0)
+
+def test_responses_end_with_their_terminating_line(reader):
+    _, ser = reader
+    command = b'$ba -go'
+    ser.write(command + calculate_checksum(command) + b'\n')
+    response = read_response(ser)
+    assert response_complete(response)
+    assert response.startswith(b'BH: A=1') and response.endswith(b'EC: 0\r\n')
+
+def test_bad_checksum_is_answered_with_error_code(reader):
+    simulator, ser = reader
+    ser.write(b'$ba -go\x00\x00\n')
+    assert read_response(ser) == b'EC: 5\r\n'
+    assert simulator.checksum_errors == 1
+    # A valid command afterwards is answered normally
+    init(ser, 1, 3000, delay=0)
+    assert simulator.checksum_errors == 1
+
+def test_large_responses_arrive_in_full():
+    # Hundreds of reads per round do not fit the pty buffer at once
+    simulator = ReaderSimulator(random_layout(50, area=(-1.0, 1.0), seed=3), read_rate=2000.0,
+                                inventory_time=0.01, seed=3)
+    simulator.set_pose(0.0, -1.5, 0.0)
+    with simulator:
+        reads, _ = load_test(simulator, rounds=5)
+    assert reads == simulator.reads > 500
+
+def test_read_noise_is_the_noise_model():
+    rssi = np.array([-75.0, -60.0, -45.0])
+    assert np.allclose(rssi_std(rssi), load_noise_model().std(rssi))
+    # Below the sensitivity the spread no longer grows
+    assert rssi_std(SENSITIVITY - 20.0) == pytest.approx(rssi_std(SENSITIVITY))
@@ -0,0 +1,89 @@
+import json
+import math
+import pytest
+from reader_simulator import ReaderSimulator
+from reader_telemetry import LatencyHistogram, ReaderTelemetry, TelemetrySerial
+from tsl_reader import init, inventory, open_reader
+
+def test_histogram_buckets():
+    histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+    # A value on a bucket bound counts in that bucket (le)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(2.565)
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+    assert math.isnan(histogram.quantile(0.5))
+    for value in [0.005] * 90 + [0.5] * 9 + [3.0]:
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.95) == 1.0
+    assert histogram.quantile(1.0) == math.inf
+    assert histogram.snapshot()['buckets'] == {'0.01': 90, '0.1': 0, '1.0': 9, '+Inf': 1}
+
+def test_record_command_counts_error_codes_and_truncation():
+    telemetry = ReaderTelemetry()
+    telemetry.record_command(b'$ba -go', 0.02, b'BH: A=1\r\nTR: 0001 | EP: 3000 | RI: -4000\r\nEC: 0\r\n')
+    telemetry.record_command(b'$ba -go', 0.03, b'EC: 5\r\n')
+    telemetry.record_command(b'$ir -anx1', 0.5, b'BH: A=1\r\n')
+    snapshot = telemetry.snapshot()
+    assert snapshot['commands'] == 3
+    assert snapshot['truncated responses'] == 1
+    assert snapshot['error codes'] == {'0': 1, '5': 1}
+    assert snapshot['error rate'] == pytest.approx(1 / 3)
+    assert snapshot['command latency [s]']['$ba']['count'] == 2
+    assert snapshot['command latency [s]']['$ir']['count'] == 1
+
+def test_prometheus_text():
+    telemetry = ReaderTelemetry()
+    telemetry.record_command(b'$ba -go', 0.003, b'EC: 0\r\n')
+    telemetry.record_inventory([{'Tag ID': 'E200'}, {'Tag ID': 'E200'}], 0.02)
+    telemetry.record_inventory_failure(0.5)
+    lines = telemetry.prometheus_text().splitlines()
+    assert 'rfid_reader_commands_total 1' in lines
+    assert 'rfid_reader_error_codes_total{code="0"} 1' in lines
+    assert 'rfid_reader_inventory_rounds_total 2' in lines
+    assert 'rfid_reader_inventory_failures_total 1' in lines
+    assert 'rfid_reader_tag_reads_total{epc="E200"} 2' in lines
+    # Histogram buckets are cumulative and end with +Inf = count
+    assert 'rfid_reader_command_latency_seconds_bucket{command="$ba",le="0.002"} 0' in lines
+    assert 'rfid_reader_command_latency_seconds_bucket{command="$ba",le="0.005"} 1' in lines
+    assert 'rfid_reader_command_latency_seconds_bucket{command="$ba",le="+Inf"} 1' in lines
+    assert 'rfid_reader_inventory_duration_seconds_bucket{le="0.02"} 1' in lines
+    assert 'rfid_reader_inventory_duration_seconds_bucket{le="+Inf"} 2' in lines
+    assert 'rfid_reader_inventory_duration_seconds_count 2' in lines
+    # Every metric family is declared once
+    types = [line for line in lines if line.startswith('# TYPE')]
+    assert len(types) == len(set(types))
+
+def test_export(tmp_path):
+    telemetry = ReaderTelemetry(str(tmp_path), interval=3600)
+    telemetry.record_command(b'$ba -go', 0.01, b'EC: 0\r\n')
+    telemetry.export()
+    telemetry.export()
+    snapshots = [json.loads(line) for line in (tmp_path / 'reader-telemetry.jsonl').read_text().splitlines()]
+    assert len(snapshots) == 2 and snapshots[-1]['commands'] == 1
+    assert (tmp_path / 'reader-telemetry.prom').read_text() == telemetry.prometheus_text()
+    assert not (tmp_path / 'reader-telemetry.prom.tmp').exists()
+
+def test_telemetry_serial_times_every_command():
+    telemetry = ReaderTelemetry()
+    tags = {'E2009A4050003AF000000001': (0.0, 1.0)}
+    with ReaderSimulator(tags, read_rate=500.0, inventory_time=0.02, seed=1) as simulator:
+        ser = TelemetrySerial(open_reader(simulator.port), telemetry)
+        try:
+            init(ser, 1, 3000, delay=0)
+            for _ in range(3):
+                inventory(ser)
+        finally:
+            ser.close()
+    snapshot = telemetry.snapshot()
+    assert snapshot['commands'] == 4
+    assert snapshot['truncated responses'] == 0
+    assert snapshot['error codes'] == {'0': 4}
+    # Every inventory round takes at least the simulated round time
+    assert snapshot['command latency [s]']['$ba']['count'] == 3
+    assert snapshot['command latency [s]']['$ba']['sum'] >= 3 * 0.02
@@ -0,0 +1,85 @@
+import pytest
+from reader_simulator import ReaderSimulator
+from traffic_capture import (CAPTURE_MAGIC, HOST_TO_READER, READER_TO_HOST, RECORD_HEADER, CaptureWriter,
+                             RecordingSerial, ReplaySerial, read_capture, replay)
+from tsl_reader import init, inventory, open_reader, read_response
+
+INVENTORY_RESPONSE = (b'BH: A=2, B=0, R=0, P=2500\r\n'
+                      b'TR: 0001 | EP: E28011606000020D8B4F3A11 | RI: -5532 | PH: 3FF\r\n'
+                      b'TR: 0002 | EP: E28011606000020D8B4F3A12 | RI: -6100\r\n'
+                      b'EC: 0\r\n')
+
+def replay_serial(tmp_path, chunks):
+    """ReplaySerial answering with `chunks`, each a separately recorded read."""
+    path = tmp_path / 'session.tslcap'
+    with CaptureWriter(str(path)) as writer:
+        for chunk in chunks:
+            writer.write(READER_TO_HOST, chunk)
+    return ReplaySerial(str(path))
+
+def test_read_capture_round_trip(tmp_path):
+    path = str(tmp_path / 'session.tslcap')
+    with CaptureWriter(path) as writer:
+        writer.write(HOST_TO_READER, b'$ba -go\x12\x34\n', timestamp=1)
+        writer.write(READER_TO_HOST, INVENTORY_RESPONSE, timestamp=2)
+    assert list(read_capture(path)) == [(1, HOST_TO_READER, b'$ba -go\x12\x34\n'), (2, READER_TO_HOST, INVENTORY_RESPONSE)]
+
+def test_read_capture_stops_at_a_cut_record(tmp_path):
+    path = str(tmp_path / 'session.tslcap')
+    with CaptureWriter(path) as writer:
+        writer.write(READER_TO_HOST, INVENTORY_RESPONSE, timestamp=1)
+        writer.write(READER_TO_HOST, INVENTORY_RESPONSE, timestamp=2)
+    with open(path, 'r+b') as f:
+        f.truncate(len(CAPTURE_MAGIC) + 2 * RECORD_HEADER.size + len(INVENTORY_RESPONSE) + 10)
+    assert [timestamp for timestamp, _, _ in read_capture(path)] == [1]
+
+def test_read_capture_rejects_other_files(tmp_path):
+    path = tmp_path / 'not-a-capture.bin'
+    path.write_bytes(b'hello world')
+    with pytest.raises(ValueError, match='not a TSL capture'):
+        list(read_capture(str(path)))
+
+def test_read_response_joins_chunks(tmp_path):
+    ser = replay_serial(tmp_path, [INVENTORY_RESPONSE[:30], INVENTORY_RESPONSE[30:95], INVENTORY_RESPONSE[95:],
+                                   b'EC: 0\r\n'])
+    assert read_response(ser) == INVENTORY_RESPONSE
+    # The next response is left for the next command
+    assert read_response(ser) == b'EC: 0\r\n'
+
+def test_read_response_times_out(tmp_path):
+    ser = replay_serial(tmp_path, [INVENTORY_RESPONSE[:40]])
+    with pytest.raises(Exception, match='timed out after 40 bytes'):
+        read_response(ser)
+
+def test_read_response_truncated(tmp_path):
+    ser = replay_serial(tmp_path, [INVENTORY_RESPONSE])
+    with pytest.raises(Exception, match='Truncated'):
+        read_response(ser, max_size=64)
+
+def test_inventory_on_replayed_response(tmp_path):
+    ser = replay_serial(tmp_path, [INVENTORY_RESPONSE[:50], INVENTORY_RESPONSE[50:]])
+    assert [tag['RSSI'] for tag in inventory(ser)] == [-55.32, -61.0]
+
+def test_capture_then_replay(tmp_path):
+    # Record a session against the simulated reader, then run the same commands against the capture
+    path = str(tmp_path / 'session.tslcap')
+    tags = {'E2009A4050003AF000000001': (0.0, 1.0), 'E2009A4050003AF000000002': (0.3, 1.5)}
+    with ReaderSimulator(tags, read_rate=300.0, inventory_time=0.02, seed=4) as simulator:
+        ser = RecordingSerial(open_reader(simulator.port), CaptureWriter(path))
+        try:
+            init(ser, 1, 3000, delay=0)
+            recorded = [inventory(ser) for _ in range(3)]
+        finally:
+            ser.close()
+    directions = [direction for _, direction, _ in read_capture(path)]
+    assert directions.count(HOST_TO_READER) == 4
+
+    ser = ReplaySerial(path)
+    init(ser, 1, 3000, delay=0)
+    assert [inventory(ser) for _ in range(3)] == recorded
+    assert ser.read() == b''
+
+    stats = replay(path)
+    assert stats['responses'] == 4
+    assert stats['reads'] == sum(len(reads) for reads in recorded)
+    assert stats['errors'] == 0
@@ -0,0 +1,43 @@
+import pytest
+from tsl_reader import calculate_checksum, extract_tag_details, response_complete
+
+INVENTORY_RESPONSE = (b'BH: A=2, B=0, R=0, P=2500\r\n'
+                      b'TR: 0001 | EP: E28011606000020D8B4F3A11 | RI: -5532 | PH: 3FF\r\n'
+                      b'TR: 0002 | EP: E28011606000020D8B4F3A12 | RI: -6100\r\n'
+                      b'EC: 0\r\n')
+
+@pytest.mark.parametrize('command, checksum', [
+    (b'abcde', 0xC8F0),  # Fletcher-16 reference values
+    (b'abcdef', 0x2057),
+    (b'abcdefgh', 0x0627),
+    (b'', 0x0000),
+])
+def test_calculate_checksum(command, checksum):
+    assert calculate_checksum(command) == checksum.to_bytes(2, byteorder='big')
+
+def test_extract_tag_details():
+    tags = extract_tag_details(INVENTORY_RESPONSE.decode().split('\n'))
+    assert tags == [
+        {'Tag ID': 'E28011606000020D8B4F3A11', 'RSSI': -55.32, 'Phase': '3FF', 'Antenna': '2'},
+        {'Tag ID': 'E28011606000020D8B4F3A12', 'RSSI': -61.0, 'Phase': 'Unknown', 'Antenna': '2'},
+    ]
+
+def test_extract_tag_details_without_bank_header():
+    tags = extract_tag_details(['TR: 0001 | EP: 3000 | RI: -4000', 'EC: 0'])
+    assert tags == [{'Tag ID': '3000', 'RSSI': -40.0, 'Phase': 'Unknown', 'Antenna': 'Unknown'}]
+
+@pytest.mark.parametrize('error_code, message', [('10', 'antenna'), ('5', 'EC: 5')])
+def test_extract_tag_details_raises_on_error_codes(error_code, message):
+    with pytest.raises(Exception, match=message):
+        extract_tag_details(['TR: 0001 | EP: 3000 | RI: -4000', f'EC: {error_code}'])
+
+@pytest.mark.parametrize('response, complete', [
+    (INVENTORY_RESPONSE, True),
+    (b'OK:\r\n', True),
+    (b'ER: 4\r\n', True),
+    (INVENTORY_RESPONSE[:-2], False),
+    (b'BH: A=1\r\nTR: 0001 | EP: 3000 | RI: -4000\r\n', False),
+    (b'', False),
+])
+def test_response_complete(response, complete):
+    assert response_complete(response) == complete